@@ -0,0 +1,120 @@
+import atexit
+import asyncio
+import threading
+
+# 全进程共享的后台事件循环：所有异步服务调用（LLM / TTS）在同一个循环上复用，
+# 同步代码（Flask 请求、后台任务线程）通过 run_sync / submit 提交协程
+_loop = None
+_thread = None
+_lock = threading.Lock()
+# 停止循环前依次等待的清理协程函数（如关闭共享 HTTP 会话）
+_shutdown_hooks = []
+
+
+def get_loop():
+    """获取后台事件循环（首次调用时在守护线程中启动）"""
+    global _loop, _thread
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(_loop)
+                _loop.call_soon(ready.set)
+                _loop.run_forever()
+
+            _thread = threading.Thread(target=run, name='aio-loop', daemon=True)
+            _thread.start()
+            ready.wait()
+        return _loop
+
+
+def in_loop_thread():
+    """当前线程是否为后台事件循环线程"""
+    return _thread is not None and threading.current_thread() is _thread
+
+
+def submit(coro):
+    """
+    将协程提交到后台事件循环
+
+    Returns:
+        concurrent.futures.Future: 可在任意线程等待结果
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+def run_sync(coro, timeout=None):
+    """
+    在后台事件循环上运行协程并阻塞等待结果（同步 API 的包装）
+
+    Args:
+        coro: 协程
+        timeout: 等待秒数（超时抛出 TimeoutError 并取消协程）
+    """
+    if in_loop_thread():
+        coro.close()
+        raise RuntimeError('run_sync() cannot be called from the event loop thread; await the coroutine instead')
+    future = submit(coro)
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
+
+
+def submit_limited(coros, limit):
+    """
+    提交一组协程，最多 limit 个同时运行
+
+    Returns:
+        list: 与 coros 顺序一致的 concurrent.futures.Future
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def bounded(coro):
+        async with semaphore:
+            return await coro
+
+    return [submit(bounded(coro)) for coro in coros]
+
+
+def add_shutdown_hook(hook):
+    """登记停止循环前执行的清理函数（无参数的协程函数，重复登记只执行一次）"""
+    with _lock:
+        if hook not in _shutdown_hooks:
+            _shutdown_hooks.append(hook)
+
+
+def shutdown_loop(timeout=5):
+    """停止后台事件循环（取消未完成的协程）"""
+    global _loop, _thread
+    with _lock:
+        loop, thread = _loop, _thread
+        _loop = _thread = None
+    if loop is None or loop.is_closed():
+        return
+
+    async def cancel_pending():
+        for hook in list(_shutdown_hooks):
+            try:
+                await hook()
+            except Exception as e:
+                print(f"⚠️ 事件循环清理失败: {e}")
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    try:
+        asyncio.run_coroutine_threadsafe(cancel_pending(), loop).result(timeout)
+    except Exception:
+        pass
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout)
+    if not thread.is_alive():
+        loop.close()
+
+
+atexit.register(shutdown_loop)
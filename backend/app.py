@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_from_directory, render_template_string
+from flask import Flask, request, jsonify, send_from_directory, abort, stream_with_context
 from flask_cors import CORS
 import os
 import sys
@@ -6,41 +6,212 @@ import json
 import uuid
 import threading
 import time
+import atexit
+import ipaddress
+from concurrent.futures import as_completed
 from datetime import datetime
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backend.config import Config
-from backend.services.tts_service import TTSService
-from backend.services.llm_service import LLMService
+from backend.compression import init_compression
+from backend.utils import remove_temp_files
+from backend.aio import submit_limited, shutdown_loop
+from backend.retry import RetryBudget
+from backend import http_pool
+from backend.templating import (
+    assets, pages, send_cached, RenderCache, render_lesson_content,
+    CachedContent, ASSET_CACHE_CONTROL, PAGE_CACHE_CONTROL
+)
+from backend.services.tts_service import (
+    TTSService, AUDIO_FORMATS, audio_alternatives, filename_profile, profile_kbps
+)
+from backend.services.llm_service import LLMService, normalize_dialogue, normalize_keywords
+from backend.services.task_manager import TaskManager, TaskInterrupted
+from backend.services.lesson_store import LessonStore, reuse_audio, content_hash
+from backend.services.batch_scheduler import BatchScheduler
+from backend.services.audio_repair import AudioRepairQueue
+from backend.services.prefetch import Prefetcher
+from backend.services.topic_index import TopicIndex
+from backend.services.topic_suggest import TopicSuggester
+from backend.services.vocabulary import VocabularyAudio
+from backend.services.phonetics import PhoneticDict
+from backend.services.audio_variants import AudioVariants
+from backend.services.key_pool import ApiKeyPool, mask_key
 
 app = Flask(__name__)
 app.config.from_object(Config)
 CORS(app, resources={
     r"/api/*": {
         "origins": "*",
-        "methods": ["GET", "POST", "OPTIONS"],
+        "methods": ["GET", "POST", "PATCH", "DELETE", "OPTIONS"],
         "allow_headers": ["Content-Type", "Authorization"],
         "supports_credentials": True
     }
 })
 
 Config.init_app(app)
+init_compression(app)
 
-# 全局服务实例 - 从环境变量自动初始化
+# 全局服务实例 - 首次使用时从环境变量初始化（dashscope SDK 也在首次调用时才导入）
 tts_service = None
 llm_service = None
+services_lock = threading.Lock()
+services_init_attempted = False
+
+# API Key 池（LLM 与 TTS 共享，按负载选择 Key）
+key_pool = ApiKeyPool.from_config()
 
 # 任务状态存储（简单内存存储，生产环境建议使用 Redis）
 task_status = {}
 task_status_lock = threading.Lock()
 
+# 后台任务管理（优雅停机、任务恢复）
+task_manager = TaskManager()
+
+# 学习记录存储（结构化 JSON），页面按需渲染并缓存
+lesson_store = LessonStore()
+lesson_pages = RenderCache(Config.LESSON_CACHE_SIZE)
+
+# 缺少音频的句子在后台补合成，成功后就地更新学习记录
+audio_repair = AudioRepairQueue(
+    synthesize=lambda text, voice: get_tts_service().synthesize_cached(text, voice, prefix='dialogue'),
+    patch=lesson_store.patch_audio
+)
+
+# 关键词发音（所有课程共享，每个词汇只合成一次）
+vocabulary = VocabularyAudio(get_tts=lambda: get_tts_service())
+
+# 离线音标词典（首次查询时才打开）
+phonetics = PhoneticDict()
+
+# 句子的慢速音频（首次请求时合成并缓存）
+audio_variants = AudioVariants(get_tts=lambda: get_tts_service())
+
+def speaker_voice(speaker):
+    """说话人对应的音色"""
+    return Config.SPEAKER_VOICES.get(speaker, Config.SPEAKER_VOICES['default'])
+
+def queue_pending_audio(record):
+    """将学习记录中待补齐音频的句子登记到后台补合成"""
+    if record.get('pending_audio'):
+        audio_repair.submit(record['name'], [
+            {
+                'index': i,
+                'text': record['dialogue'][i]['english'],
+                'voice': speaker_voice(record['dialogue'][i].get('speaker'))
+            }
+            for i in record['pending_audio']
+        ])
+
+def save_lesson(topic, dialogue, keywords, **meta):
+    """
+    保存学习记录（按内容哈希命名，相同内容不会重复保存）并返回页面文件名
+    
+    语音合成失败的句子记录在 pending_audio 中并登记后台补合成，学习页面立即可用；
+    关键词从词汇发音库取得发音，未合成过的词汇在保存前合成；
+    关键词与句子的音标由离线音标词典补齐
+    """
+    vocabulary.fill(keywords)
+    phonetics.fill(dialogue, keywords)
+    missing = [i for i, item in enumerate(dialogue) if item.get('english') and not item.get('audio_url')]
+    if missing:
+        meta['pending_audio'] = missing
+    record = lesson_store.save(topic, dialogue, keywords, **meta)
+    name = record['name']
+    queue_pending_audio(record)
+    topic_index.add(record['topic'], name)
+    topic_suggester.add(record['topic'], name)
+    # 保存时即渲染并预压缩，首次访问无需等待
+    lesson_pages.get(name, lesson_store.mtime(name), lambda: render_lesson_page(record))
+    return f'{name}.html'
+
+def render_lesson_page(record):
+    """渲染学习记录（旧记录缺少的音标在渲染时补齐，不写回记录）"""
+    phonetics.fill(record.get('dialogue') or [], record.get('keywords') or [])
+    return render_lesson_content(record, audio_variants.rates)
+
+# 已有课程的话题相似度索引与输入提示（启动时由学习记录建立，保存与删除时更新）
+topic_index = TopicIndex()
+topic_suggester = TopicSuggester()
+
+def index_lessons():
+    """为已有学习记录建立话题索引与输入提示"""
+    for summary in lesson_store.list():
+        topic_index.add(summary['topic'], summary['name'])
+        topic_suggester.add(summary['topic'], summary['name'])
+    return len(topic_index)
+
+def find_similar_lesson(topic, num_exchanges):
+    """
+    查找话题相似且轮数相同的已有课程（TOPIC_REUSE_POLICY 为 off 时不查找）
+    
+    未记录轮数的旧课程，对话句数不少于请求轮数即可
+    
+    Returns:
+        dict: 学习记录（附加 similarity），没有时返回 None
+    """
+    if Config.TOPIC_REUSE_POLICY not in ('reuse', 'suggest'):
+        return None
+    records = {}
+    
+    def accept(name):
+        record = lesson_store.load(name)
+        if record is None or record.get('pending_audio'):
+            return False
+        recorded = record.get('num_exchanges')
+        if recorded is None:
+            matched = len(record.get('dialogue') or []) >= num_exchanges
+        else:
+            matched = recorded == num_exchanges
+        if matched:
+            records[name] = record
+        return matched
+    
+    matches = topic_index.search(topic, threshold=Config.TOPIC_MATCH_THRESHOLD, accept=accept)
+    if not matches:
+        return None
+    score, _, name = matches[0]
+    return dict(records[name], similarity=round(score, 3))
+
+# 批量生成调度（所有批次共享工作线程，首次提交时启动）
+batch_scheduler = BatchScheduler(
+    generate=lambda topic, num_exchanges: get_llm_service().generate_dialogue(topic, num_exchanges),
+    synthesize=lambda text, voice: get_tts_service().synthesize_cached(text, voice, prefix='dialogue'),
+    save=save_lesson
+)
+
+def batch_lesson_status(batch_id):
+    """单话题批次的状态与课程文件名"""
+    status = batch_scheduler.status(batch_id)
+    return status and status['lessons'][0]
+
+def workers_idle():
+    """没有用户任务、批量队列为空时视为空闲"""
+    stats = batch_scheduler.stats()
+    return (task_manager.active_count() == 0 and not stats['busy_workers']
+            and not stats['llm_queued'] and not stats['tts_queued'])
+
+# 热门话题预生成（复用批量生成的工作线程，以最低优先级在空闲时运行）
+def submit_prefetch(topic, num_exchanges):
+    """提交预生成任务（服务未就绪时不提交）"""
+    if not init_services():
+        return None
+    return batch_scheduler.submit([topic], num_exchanges, priority=-1)
+
+prefetcher = Prefetcher(
+    submit=submit_prefetch,
+    status=batch_lesson_status,
+    is_idle=workers_idle,
+    exists=lambda filename: lesson_store.exists(filename[:-5])
+)
+
 def update_task_status(task_id, status, progress=None, result=None, error=None):
     """更新任务状态"""
     with task_status_lock:
         task_status[task_id] = {
-            'status': status,  # 'pending', 'running', 'completed', 'failed'
+            'status': status,  # 'pending', 'running', 'completed', 'failed', 'interrupted'
             'progress': progress or 0,
             'result': result,
             'error': error,
@@ -61,13 +232,23 @@ def cleanup_old_tasks():
 
 def init_services():
     """从环境变量初始化服务"""
+    global services_init_attempted
+    with services_lock:
+        if tts_service is not None and llm_service is not None:
+            return True
+        if services_init_attempted and not len(key_pool):
+            return False
+        services_init_attempted = True
+        return _create_services()
+
+def _create_services():
     global tts_service, llm_service
-    api_key = Config.DASHSCOPE_API_KEY
+    api_key = key_pool.primary
     if api_key:
         try:
-            tts_service = TTSService(api_key=api_key)
-            llm_service = LLMService(api_key=api_key)
-            print(f"✅ 服务初始化成功 (API Key: {api_key[:8]}...)")
+            tts_service = TTSService(api_key=api_key, key_pool=key_pool)
+            llm_service = LLMService(api_key=api_key, key_pool=key_pool)
+            print(f"✅ 服务初始化成功 (API Key: {mask_key(api_key)}，共 {len(key_pool)} 个)")
             return True
         except Exception as e:
             print(f"❌ 服务初始化失败: {e}")
@@ -76,17 +257,119 @@ def init_services():
         print("⚠️ 未配置 DASHSCOPE_API_KEY，请在 .env 文件中设置")
         return False
 
-# 应用启动时自动初始化
-init_services()
+def get_llm_service():
+    """获取 LLM 服务（首次调用时初始化）"""
+    if llm_service is None:
+        init_services()
+    return llm_service
+
+def get_tts_service():
+    """获取 TTS 服务（首次调用时初始化）"""
+    if tts_service is None:
+        init_services()
+    return tts_service
+
+def resume_pending_tasks():
+    """
+    恢复上次停机时未完成的生成任务
+    
+    服务未就绪时保留任务记录，等待下次启动再恢复；任务全部重新提交后才删除记录
+    """
+    pending = task_manager.load_pending()
+    if not pending:
+        return 0
+    if not init_services():
+        print(f"⚠️ 服务未就绪，{len(pending)} 个未完成任务将在下次启动时恢复")
+        return 0
+    for item in pending:
+        task_id = item['task_id']
+        update_task_status(task_id, 'pending', progress=0)
+        task_manager.submit(task_id, generate_content_async, item['spec'])
+    task_manager.clear_pending()
+    print(f"🔁 已恢复 {len(pending)} 个未完成任务")
+    return len(pending)
+
+def resume_pending_batches():
+    """恢复上次停机时未完成的批量话题（沿用原批次ID，服务未就绪时保留记录）"""
+    pending = batch_scheduler.load_pending()
+    if not pending:
+        return 0
+    if not init_services():
+        print(f"⚠️ 服务未就绪，{len(pending)} 个未完成批次将在下次启动时恢复")
+        return 0
+    for batch_id, topics in pending.items():
+        batch_scheduler.submit(topics, batch_id=batch_id)
+    batch_scheduler.clear_pending()
+    print(f"🔁 已恢复 {len(pending)} 个未完成批次")
+    return len(pending)
+
+def resume_audio_repairs():
+    """按学习记录中的 pending_audio 恢复未补齐的音频（包括上次进程异常退出时的任务）"""
+    records = (lesson_store.load(summary['name']) for summary in lesson_store.list() if summary['pending_audio'])
+    return audio_repair.resume([record for record in records if record], speaker_voice)
+
+def shutdown_tasks(timeout=None):
+    """优雅停机：停止接收新任务并等待运行中的任务完成"""
+    summary = task_manager.shutdown(timeout)
+    summary['persisted'] += batch_scheduler.shutdown(timeout)
+    summary['persisted'] += audio_repair.shutdown()
+    prefetcher.shutdown()
+    # 关闭共享事件循环（同时关闭 HTTP 连接池）
+    shutdown_loop()
+    # 任务已全部结束，清理原子写入遗留的临时文件
+    for directory in (Config.GENERATED_DIR, Config.AUDIO_DIR):
+        remove_temp_files(directory)
+    if summary['drained'] or summary['persisted']:
+        print(f"🛑 任务已停止 (完成 {summary['drained']}, 待恢复 {summary['persisted']})")
+    return summary
+
+atexit.register(shutdown_tasks)
+
+def send_page(template_name):
+    """发送预渲染页面（调试模式下每次重新渲染，便于修改模板）"""
+    if app.debug:
+        pages.clear()
+        assets.clear()
+    return send_cached(pages.get(template_name))
 
 @app.route('/')
 def index():
-    return render_template_string(INDEX_HTML)
+    return send_page('index.html')
+
+@app.route('/assets/<path:filename>')
+def serve_asset(filename):
+    """提供带指纹的 CSS/JS 资源"""
+    content, is_current = assets.resolve(filename)
+    if content is None:
+        abort(404)
+    # 旧指纹仍返回当前内容，但不允许长期缓存
+    return send_cached(content, ASSET_CACHE_CONTROL if is_current else PAGE_CACHE_CONTROL)
 
 @app.route('/api/health')
 def health_check():
     return jsonify({'status': 'ok'})
 
+@app.route('/api/metrics')
+def metrics():
+    """运行指标（连接池复用率、模型与 Key 负载、重试次数、任务与批量队列）"""
+    return jsonify({
+        'http': http_pool.stats(),
+        'llm': llm_service.router.stats() if llm_service is not None else None,
+        'keys': key_pool.stats(),
+        'retry': {
+            'llm': llm_service.retry.stats() if llm_service is not None else None,
+            'tts': tts_service.retry.stats() if tts_service is not None else None
+        },
+        'tasks': {'active': task_manager.active_count()},
+        'batch': batch_scheduler.stats(),
+        'audio_repair': audio_repair.stats(),
+        'prefetch': prefetcher.stats(),
+        'topic_index': topic_index.stats(),
+        'vocabulary': vocabulary.stats(),
+        'phonetics': phonetics.stats(),
+        'audio_variants': audio_variants.stats()
+    })
+
 @app.route('/api/test-long-request')
 def test_long_request():
     """测试长请求是否正常"""
@@ -97,8 +380,8 @@ def test_long_request():
 @app.route('/api/config', methods=['GET'])
 def get_config():
     """获取当前配置状态"""
-    api_key_configured = bool(Config.DASHSCOPE_API_KEY)
-    services_ready = tts_service is not None and llm_service is not None
+    api_key_configured = len(key_pool) > 0
+    services_ready = init_services()
     
     return jsonify({
         'success': True,
@@ -107,11 +390,49 @@ def get_config():
         'message': '服务已就绪' if services_ready else '请在 .env 文件中配置 DASHSCOPE_API_KEY'
     })
 
+def is_local_request():
+    """
+    请求是否来自本机且不是其他网站发起的跨域请求
+
+    浏览器中打开的任意网页都能向本机服务发起 POST（来源地址同样是本机），
+    因此带 Origin 头时还要求与本服务同源
+    """
+    try:
+        if not ipaddress.ip_address(request.remote_addr or '').is_loopback:
+            return False
+    except ValueError:
+        return False
+    origin = request.headers.get('Origin')
+    return origin is None or origin.rstrip('/') == request.host_url.rstrip('/')
+
+@app.route('/api/keys/reload', methods=['POST'])
+def reload_keys():
+    """
+    重新读取 .env 中的 API Key（轮换 Key 无需重启，已有 Key 的隔离状态保留）
+    
+    只接受本机的同源请求
+    """
+    global services_init_attempted
+    if not is_local_request():
+        return jsonify({'success': False, 'error': '只允许在本机调用'}), 403
+    key_pool.set_keys(Config.reload_api_keys())
+    with services_lock:
+        services_init_attempted = False
+    services_ready = init_services()
+    return jsonify({
+        'success': True,
+        'keys': key_pool.stats(),
+        'retry': {
+            'llm': llm_service.retry.stats() if llm_service is not None else None,
+            'tts': tts_service.retry.stats() if tts_service is not None else None
+        },
+        'services_ready': services_ready
+    })
+
 @app.route('/api/dialogue/generate', methods=['POST'])
 def generate_dialogue():
     """生成对话内容"""
-    global llm_service
-    
+    llm_service = get_llm_service()
     if llm_service is None:
         return jsonify({
             'success': False,
@@ -131,8 +452,7 @@ def generate_dialogue():
 @app.route('/api/translate', methods=['POST'])
 def translate():
     """翻译中文到英文"""
-    global llm_service
-    
+    llm_service = get_llm_service()
     if llm_service is None:
         return jsonify({
             'success': False,
@@ -151,8 +471,7 @@ def translate():
 @app.route('/api/tts', methods=['POST'])
 def text_to_speech():
     """单文本语音合成"""
-    global tts_service
-    
+    tts_service = get_tts_service()
     if tts_service is None:
         return jsonify({
             'success': False,
@@ -172,8 +491,7 @@ def text_to_speech():
 @app.route('/api/tts/dialogue', methods=['POST'])
 def dialogue_to_speech():
     """对话语音合成"""
-    global tts_service
-    
+    tts_service = get_tts_service()
     if tts_service is None:
         return jsonify({
             'success': False,
@@ -182,11 +500,33 @@ def dialogue_to_speech():
     
     data = request.get_json()
     dialogue = data.get('dialogue', [])
+    voices = {
+        'voice_a': data.get('voice_a', 'longxiaochun_v2'),
+        'voice_b': data.get('voice_b', 'longxiaocheng_v2')
+    }
+    # 并发数不超过服务端上限
+    try:
+        max_workers = int(data.get('concurrency') or Config.TTS_MAX_CONCURRENCY)
+    except (TypeError, ValueError):
+        max_workers = 0
+    if max_workers < 1:
+        return jsonify({'success': False, 'error': 'concurrency must be a positive integer'}), 400
+    max_workers = min(max_workers, Config.TTS_MAX_CONCURRENCY)
     
     if not dialogue:
         return jsonify({'success': False, 'error': 'Dialogue list is required'}), 400
     
-    results = tts_service.synthesize_dialogue(dialogue)
+    # 流式返回：每合成完一句输出一行 JSON (NDJSON)
+    if data.get('stream') or request.accept_mimetypes.best == 'application/x-ndjson':
+        def generate():
+            success_count = 0
+            for result in tts_service.iter_synthesize_dialogue(dialogue, max_workers=max_workers, **voices):
+                success_count += 1 if result.get('success') else 0
+                yield json.dumps(result, ensure_ascii=False) + '\n'
+            yield json.dumps({'done': True, 'total': len(dialogue), 'success_count': success_count}) + '\n'
+        return app.response_class(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    results = tts_service.synthesize_dialogue(dialogue, max_workers=max_workers, **voices)
     return jsonify({
         'success': True,
         'results': results
@@ -195,8 +535,8 @@ def dialogue_to_speech():
 @app.route('/api/generate-full', methods=['POST'])
 def generate_full_content():
     """生成完整的学习内容（对话+翻译+语音）"""
-    global llm_service, tts_service
-    
+    llm_service = get_llm_service()
+    tts_service = get_tts_service()
     if llm_service is None or tts_service is None:
         return jsonify({
             'success': False,
@@ -217,9 +557,11 @@ def generate_full_content():
     print(f"📌 轮数: {num_exchanges}")
     print(f"{'='*60}\n")
     
+    budget = RetryBudget()
+    
     # 1. 生成对话
     print("[1/3] ⏳ 正在生成对话内容...")
-    dialogue_result = llm_service.generate_dialogue(topic, num_exchanges)
+    dialogue_result = llm_service.generate_dialogue(topic, num_exchanges, budget=budget)
     if not dialogue_result.get('success'):
         print(f"❌ 对话生成失败: {dialogue_result.get('error')}")
         return jsonify(dialogue_result)
@@ -243,7 +585,7 @@ def generate_full_content():
         print(f"  [{i+1}/{len(dialogue_for_tts)}] 合成 {speaker}: {text_preview}")
         
         voice = Config.SPEAKER_VOICES.get(speaker, Config.SPEAKER_VOICES['default'])
-        result = tts_service.synthesize(item['text'], voice=voice)
+        result = tts_service.synthesize(item['text'], voice=voice, budget=budget)
         tts_results.append(result)
         
         if result.get('success'):
@@ -290,14 +632,20 @@ def generate_full_content():
 
 def generate_content_async(task_id, topic, num_exchanges):
     """异步生成学习内容"""
-    global tts_service, llm_service
+    llm_service = get_llm_service()
+    tts_service = get_tts_service()
     
     try:
         update_task_status(task_id, 'running', progress=10)
+        started_at = time.perf_counter()
+        
+        # 对话生成与全部语音合成共享一份重试预算，故障时不会无限重试拖慢任务
+        budget = RetryBudget()
         
         # 1. 生成对话
         print(f"[Task {task_id}] 生成对话...")
-        dialogue_result = llm_service.generate_dialogue(topic, num_exchanges)
+        dialogue_result = llm_service.generate_dialogue(topic, num_exchanges, budget=budget)
+        llm_ms = (time.perf_counter() - started_at) * 1000
         if not dialogue_result.get('success'):
             update_task_status(task_id, 'failed', error=dialogue_result.get('error'))
             return
@@ -313,13 +661,26 @@ def generate_content_async(task_id, topic, num_exchanges):
             for item in dialogue
         ]
         
-        tts_results = []
-        for i, item in enumerate(dialogue_for_tts):
-            voice = Config.SPEAKER_VOICES.get(item['speaker'], Config.SPEAKER_VOICES['default'])
-            result = tts_service.synthesize(item['text'], voice=voice)
-            tts_results.append(result)
-            progress = 40 + int((i + 1) / len(dialogue_for_tts) * 40)
-            update_task_status(task_id, 'running', progress=progress)
+        tts_started_at = time.perf_counter()
+        # 各句与关键词发音在共享事件循环上并发合成，本线程只等待结果并更新进度
+        words = [kw for kw in keywords if kw.get('word')]
+        # 句子音频按内容哈希命名：相同句子直接复用，/audio 也能找到同一音频的其他格式
+        futures = submit_limited([
+            tts_service.asynthesize_cached(item['text'], speaker_voice(item['speaker']), 'dialogue', budget)
+            for item in dialogue_for_tts
+        ] + [vocabulary.asynthesize(kw['word'], budget=budget) for kw in words], Config.TTS_MAX_CONCURRENCY)
+        line_futures = futures[:len(dialogue_for_tts)]
+        try:
+            for completed, future in enumerate(as_completed(futures), 1):
+                task_manager.check_stop()
+                progress = 40 + int(completed / len(futures) * 40)
+                update_task_status(task_id, 'running', progress=progress)
+        finally:
+            # 停机中断时取消未完成的合成；已生成的音频可能被其他课程共用，保留，重启后的任务直接复用
+            for future in futures:
+                future.cancel()
+        tts_results = [future.result() for future in line_futures]
+        tts_ms = (time.perf_counter() - tts_started_at) * 1000
         
         # 3. 合并结果
         print(f"[Task {task_id}] 合并结果...")
@@ -327,24 +688,40 @@ def generate_content_async(task_id, topic, num_exchanges):
             if i < len(tts_results) and tts_results[i].get('success'):
                 item['audio_url'] = tts_results[i].get('url')
             item.pop('phonetic', None)
+        for kw, future in zip(words, futures[len(dialogue_for_tts):]):
+            if future.result().get('success'):
+                kw['audio_url'] = future.result()['url']
         
-        # 4. 保存HTML
-        html_content = generate_learn_html(topic, dialogue, keywords)
-        filename = f"learn_{topic.replace(' ', '_').replace('/', '_')}.html"
-        filepath = os.path.join(Config.GENERATED_DIR, filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        # 4. 保存学习记录（页面在访问时由记录渲染）
+        task_manager.check_stop()
+        filename = save_lesson(
+            topic, dialogue, keywords,
+            num_exchanges=num_exchanges,
+            model={
+                'llm': ', '.join(dialogue_result.get('models') or [llm_service.model]),
+                'tts': tts_service.model
+            },
+            timings={
+                'llm_ms': round(llm_ms),
+                'tts_ms': round(tts_ms),
+                'total_ms': round((time.perf_counter() - started_at) * 1000)
+            }
+        )
         
+        # 合成失败的句子已登记后台补齐：任务完成，学习页面可立即打开
         update_task_status(task_id, 'completed', progress=100, result={
             'topic': topic,
             'dialogue': dialogue,
             'keywords': keywords,
             'filename': filename,
-            'url': f'/generated/{filename}'
+            'url': f'/generated/{filename}',
+            'audio_pending': audio_repair.pending(filename[:-5])
         })
         print(f"[Task {task_id}] 完成!")
         
+    except TaskInterrupted:
+        update_task_status(task_id, 'interrupted', error='服务正在重启，任务将在重启后继续')
+        raise
     except Exception as e:
         print(f"[Task {task_id}] 错误: {e}")
         update_task_status(task_id, 'failed', error=str(e))
@@ -352,9 +729,7 @@ def generate_content_async(task_id, topic, num_exchanges):
 @app.route('/api/generate-async', methods=['POST'])
 def generate_async():
     """启动异步生成任务"""
-    global llm_service, tts_service
-    
-    if llm_service is None or tts_service is None:
+    if not init_services():
         return jsonify({
             'success': False,
             'error': 'Services not initialized'
@@ -367,24 +742,142 @@ def generate_async():
     if not topic:
         return jsonify({'success': False, 'error': 'Topic is required'}), 400
     
+    if not task_manager.accepting:
+        return jsonify({
+            'success': False,
+            'error': '服务正在停止，请稍后重试'
+        }), 503
+    
     # 生成任务ID
     task_id = str(uuid.uuid4())
     
+    # 热门话题有预生成的课程时直接返回
+    topic_suggester.touch(topic)
+    prefetched = prefetcher.take(topic, num_exchanges)
+    record = prefetched and lesson_store.load(prefetched[:-5])
+    if record:
+        return complete_from_lesson(task_id, record, '已使用预生成的课程', prefetched=True)
+    
+    # 已有相似话题的课程：按 TOPIC_REUSE_POLICY 直接复用，或在生成的同时提示
+    similar = find_similar_lesson(topic, num_exchanges)
+    if similar and Config.TOPIC_REUSE_POLICY == 'reuse':
+        return complete_from_lesson(task_id, similar, '已复用相似话题的课程', similarity=similar['similarity'])
+    
     # 初始化任务状态
     update_task_status(task_id, 'pending', progress=0)
     
-    # 启动后台线程
-    thread = threading.Thread(
-        target=generate_content_async,
-        args=(task_id, topic, num_exchanges)
-    )
-    thread.daemon = True
-    thread.start()
+    # 启动后台任务
+    accepted = task_manager.submit(task_id, generate_content_async, {
+        'topic': topic,
+        'num_exchanges': num_exchanges
+    })
+    if not accepted:
+        update_task_status(task_id, 'failed', error='服务正在停止')
+        return jsonify({
+            'success': False,
+            'error': '服务正在停止，请稍后重试'
+        }), 503
     
-    return jsonify({
+    response = {
         'success': True,
         'task_id': task_id,
         'message': '任务已启动'
+    }
+    if similar:
+        response['similar'] = {
+            'topic': similar['topic'],
+            'url': f"/generated/{similar['name']}.html",
+            'similarity': similar['similarity']
+        }
+    return jsonify(response)
+
+def complete_from_lesson(task_id, record, message, **extra):
+    """以已有课程完成任务并直接返回结果（无需轮询）"""
+    filename = f"{record['name']}.html"
+    result = {
+        'topic': record['topic'],
+        'dialogue': record['dialogue'],
+        'keywords': record['keywords'],
+        'filename': filename,
+        'url': f'/generated/{filename}',
+        'audio_pending': audio_repair.pending(record['name'])
+    }
+    result.update(extra)
+    update_task_status(task_id, 'completed', progress=100, result=result)
+    return jsonify({
+        'success': True,
+        'task_id': task_id,
+        'message': message,
+        'result': result
+    })
+
+@app.route('/api/topics/suggest', methods=['GET'])
+def suggest_topics():
+    """话题输入提示：按前缀（英文、汉字或拼音）返回已有课程的话题，课程多、请求多的在前"""
+    limit = min(max(request.args.get('limit', 8, type=int), 1), 20)
+    return jsonify({
+        'success': True,
+        'suggestions': topic_suggester.suggest(request.args.get('q', ''), limit)
+    })
+
+@app.route('/api/batch', methods=['POST'])
+def create_batch():
+    """
+    批量生成学习内容
+    
+    请求体: {"topics": ["话题", {"topic": "话题", "priority": 1, "num_exchanges": 6}],
+             "num_exchanges": 5, "priority": 0}
+    """
+    if not init_services():
+        return jsonify({
+            'success': False,
+            'error': 'Services not initialized'
+        }), 400
+    
+    data = request.get_json() or {}
+    topics = data.get('topics')
+    if not isinstance(topics, list) or not topics:
+        return jsonify({'success': False, 'error': 'Topics list is required'}), 400
+    if len(topics) > Config.BATCH_MAX_TOPICS:
+        return jsonify({
+            'success': False,
+            'error': f'Too many topics (max {Config.BATCH_MAX_TOPICS})'
+        }), 400
+    
+    try:
+        batch_id = batch_scheduler.submit(
+            topics,
+            num_exchanges=data.get('num_exchanges', 5),
+            priority=data.get('priority', 0)
+        )
+    except (ValueError, TypeError, AttributeError) as e:
+        return jsonify({'success': False, 'error': f'Invalid topics: {e}'}), 400
+    if batch_id is None:
+        return jsonify({
+            'success': False,
+            'error': '服务正在停止，请稍后重试'
+        }), 503
+    
+    return jsonify({
+        'success': True,
+        'batch_id': batch_id,
+        'total': batch_scheduler.status(batch_id)['total']
+    })
+
+@app.route('/api/batch/<batch_id>', methods=['GET'])
+def get_batch_status(batch_id):
+    """获取批次进度与吞吐量"""
+    status = batch_scheduler.status(batch_id)
+    if status is None:
+        return jsonify({
+            'success': False,
+            'error': 'Batch not found'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'batch': status,
+        'scheduler': batch_scheduler.stats()
     })
 
 @app.route('/api/task/<task_id>', methods=['GET'])
@@ -399,6 +892,17 @@ def get_task_status(task_id):
             'error': 'Task not found'
         }), 404
     
+    result = task.get('result') or {}
+    if task['status'] == 'completed' and result.get('audio_pending'):
+        # 音频仍在后台补齐：返回学习记录中的最新对话与剩余待补齐句数
+        name = result['filename'][:-5]
+        record = lesson_store.load(name)
+        task = dict(task, result=dict(
+            result,
+            dialogue=record['dialogue'] if record else result['dialogue'],
+            audio_pending=audio_repair.pending(name)
+        ))
+    
     return jsonify({
         'success': True,
         'task': task
@@ -406,19 +910,13 @@ def get_task_status(task_id):
 
 @app.route('/api/save-html', methods=['POST'])
 def save_html():
-    """保存学习页面为静态HTML"""
+    """保存学习页面（保存为学习记录，访问时渲染）"""
     data = request.get_json()
     topic = data.get('topic', '英语学习')
     dialogue = data.get('dialogue', [])
     keywords = data.get('keywords', [])
     
-    html_content = generate_learn_html(topic, dialogue, keywords)
-    
-    filename = f"learn_{topic.replace(' ', '_')}.html"
-    filepath = os.path.join(Config.GENERATED_DIR, filename)
-    
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    filename = save_lesson(topic, dialogue, keywords)
     
     return jsonify({
         'success': True,
@@ -428,13 +926,64 @@ def save_html():
 
 @app.route('/generated/<path:filename>')
 def serve_generated(filename):
-    """提供生成的HTML文件"""
+    """提供学习页面（有学习记录时由记录渲染，否则返回旧版静态HTML文件）"""
+    if filename.endswith('.html'):
+        name = filename[:-5]
+        version = lesson_store.mtime(name)
+        if version is not None:
+            content = lesson_pages.get(name, version, lambda: render_lesson_page(lesson_store.load(name)))
+            return send_cached(content)
+        # 旧版 HTML 文件同样缓存预压缩版本
+        filepath = os.path.join(Config.GENERATED_DIR, filename)
+        if os.path.basename(filename) == filename and os.path.isfile(filepath):
+            content = lesson_pages.get(filename, os.stat(filepath).st_mtime_ns, lambda: read_static_content(filepath))
+            return send_cached(content)
     return send_from_directory(Config.GENERATED_DIR, filename)
 
+def read_static_content(filepath):
+    """读取静态 HTML 文件为可缓存内容"""
+    with open(filepath, 'rb') as f:
+        return CachedContent(f.read(), 'text/html; charset=utf-8')
+
 @app.route('/audio/<path:filename>')
 def serve_audio(filename):
-    """提供音频文件"""
-    return send_from_directory(Config.AUDIO_DIR, filename)
+    """
+    提供音频文件
+    
+    同一音频已合成其他格式时按客户端选择返回：?profile= 指定配置名称，
+    或在 Accept 头明确列出的格式中选择码率最低的（只发送 */* 的客户端得到原文件）
+    """
+    if os.path.basename(filename) == filename:
+        filename = negotiate_audio(filename)
+    response = send_from_directory(Config.AUDIO_DIR, filename)
+    response.vary.add('Accept')
+    return response
+
+def negotiate_audio(filename):
+    """
+    选择客户端可以播放的更小的音频格式（只在该格式已合成时替换）
+    
+    Returns:
+        str: 实际返回的文件名
+    """
+    profiles = Config.AUDIO_PROFILES
+    requested = request.args.get('profile')
+    if requested in profiles:
+        candidates = [profiles[requested]]
+    else:
+        current = filename_profile(filename)
+        if current is None:
+            return filename
+        accepted = {mimetype for mimetype, quality in request.accept_mimetypes if quality > 0}
+        candidates = sorted(
+            (p for p in profiles.values() if p[0] in AUDIO_FORMATS and AUDIO_FORMATS[p[0]][1] in accepted
+             and profile_kbps(p) < profile_kbps(current)),
+            key=profile_kbps
+        )
+    for name, _ in audio_alternatives(filename, candidates):
+        if os.path.isfile(os.path.join(Config.AUDIO_DIR, name)):
+            return name
+    return filename
 
 @app.route('/static/<path:filename>')
 def serve_static(filename):
@@ -446,9 +995,21 @@ def get_history():
     """获取学习历史记录列表"""
     try:
         history_items = []
+        for summary in lesson_store.list():
+            filename = f"{summary['name']}.html"
+            created_at = summary['created_at'].replace('T', ' ')
+            history_items.append({
+                'filename': filename,
+                'topic': summary['topic'],
+                'url': f'/generated/{filename}',
+                'created_at': created_at,
+                'size': summary['size']
+            })
+        # 兼容旧版直接保存的 HTML 文件
+        recorded = {item['filename'] for item in history_items}
         if os.path.exists(Config.GENERATED_DIR):
             for filename in os.listdir(Config.GENERATED_DIR):
-                if filename.startswith('learn_') and filename.endswith('.html'):
+                if filename.startswith('learn_') and filename.endswith('.html') and filename not in recorded:
                     filepath = os.path.join(Config.GENERATED_DIR, filename)
                     stat = os.stat(filepath)
                     # 从文件名提取主题
@@ -477,13 +1038,22 @@ def get_history():
 def delete_history_item(filename):
     """删除指定的学习历史记录"""
     try:
-        filepath = os.path.join(Config.GENERATED_DIR, filename)
-        # 安全检查：确保文件在生成的目录中
-        if not filepath.startswith(os.path.abspath(Config.GENERATED_DIR)):
+        # 安全检查：只允许删除生成目录中的文件
+        if os.path.basename(filename) != filename or not filename.endswith('.html'):
             return jsonify({'success': False, 'error': 'Invalid filename'}), 400
         
+        name = filename[:-5]
+        deleted = lesson_store.delete(name)
+        topic_index.remove(name)
+        topic_suggester.remove(name)
+        lesson_pages.invalidate(name)
+        lesson_pages.invalidate(filename)
+        filepath = os.path.join(Config.GENERATED_DIR, filename)
         if os.path.exists(filepath):
             os.remove(filepath)
+            deleted = True
+        
+        if deleted:
             return jsonify({
                 'success': True,
                 'message': f'{filename} 已删除'
@@ -499,891 +1069,194 @@ def delete_history_item(filename):
             'error': str(e)
         }), 500
 
+@app.route('/api/history/<filename>', methods=['GET'])
+def get_history_item(filename):
+    """获取学习记录内容（用于编辑）"""
+    if os.path.basename(filename) != filename or not filename.endswith('.html'):
+        return jsonify({'success': False, 'error': 'Invalid filename'}), 400
+    record = lesson_store.load(filename[:-5])
+    if record is None:
+        return jsonify({'success': False, 'error': '学习记录不存在'}), 404
+    return jsonify({'success': True, 'lesson': record})
+
+@app.route('/api/history/<filename>', methods=['PATCH'])
+def edit_history_item(filename):
+    """
+    编辑学习记录（页面地址不变）
+    
+    只重新合成英文或说话人改变的句子，其余句子沿用原音频；
+    合成失败的句子登记后台补齐
+    """
+    if os.path.basename(filename) != filename or not filename.endswith('.html'):
+        return jsonify({'success': False, 'error': 'Invalid filename'}), 400
+    name = filename[:-5]
+    record = lesson_store.load(name)
+    if record is None:
+        return jsonify({'success': False, 'error': '学习记录不存在'}), 404
+    
+    data = request.get_json(silent=True) or {}
+    if 'dialogue' in data:
+        dialogue = normalize_dialogue(data['dialogue'])
+        if not dialogue:
+            return jsonify({'success': False, 'error': 'Dialogue is required'}), 400
+    else:
+        dialogue = record.get('dialogue') or []
+    dialogue, changed = reuse_audio(record.get('dialogue') or [], dialogue, speaker_voice)
+    
+    started_at = time.perf_counter()
+    if changed:
+        tts_service = get_tts_service()
+        if tts_service is None:
+            return jsonify({
+                'success': False,
+                'error': 'TTS service not initialized. Please set config first.'
+            }), 400
+        budget = RetryBudget()
+        # 相同内容的音频按内容哈希命名，撤销修改时直接复用已合成的文件
+        futures = submit_limited([
+            tts_service.asynthesize_cached(dialogue[i]['english'], speaker_voice(dialogue[i]['speaker']), 'dialogue', budget)
+            for i in changed
+        ], Config.TTS_MAX_CONCURRENCY)
+        for i, future in zip(changed, futures):
+            result = future.result()
+            if result.get('success'):
+                dialogue[i]['audio_url'] = result['url']
+    pending = [i for i, item in enumerate(dialogue) if not item.get('audio_url')]
+    if 'keywords' in data:
+        keywords = normalize_keywords(data['keywords'])
+        vocabulary.fill(keywords)
+    phonetics.fill(dialogue, keywords if 'keywords' in data else [])
+    
+    def change(current):
+        current['dialogue'] = dialogue
+        if 'keywords' in data:
+            current['keywords'] = keywords
+        if isinstance(data.get('topic'), str) and data['topic'].strip():
+            current['topic'] = data['topic'].strip()
+        # 内容已改变：相同的原内容再次保存时不再返回这条记录
+        current['content_hash'] = content_hash(current['topic'], dialogue, current.get('keywords') or [])
+        if pending:
+            current['pending_audio'] = pending
+        else:
+            current.pop('pending_audio', None)
+        current['updated_at'] = datetime.now().isoformat(timespec='seconds')
+    
+    # 原有的补合成任务对应旧句子，取消后按新的待补齐列表重新登记
+    audio_repair.cancel(name)
+    record = lesson_store.update(name, change)
+    if record is None:
+        return jsonify({'success': False, 'error': '学习记录不存在'}), 404
+    queue_pending_audio(record)
+    topic_index.remove(name)
+    topic_index.add(record['topic'], name)
+    topic_suggester.add(record['topic'], name)
+    
+    return jsonify({
+        'success': True,
+        'filename': filename,
+        'url': f'/generated/{filename}',
+        'resynthesized': len(changed),
+        'reused': len(dialogue) - len(changed),
+        'audio_pending': len(pending),
+        'tts_ms': round((time.perf_counter() - started_at) * 1000)
+    })
+
+@app.route('/api/history/<filename>/audio/<int:index>', methods=['GET'])
+def get_line_audio(filename, index):
+    """
+    句子的变体音频（首次请求时合成，之后直接复用）
+    
+    查询参数 rate 为语速倍率：1 为原语速，其余须为 AUDIO_VARIANT_RATES 之一；
+    profile 为音频配置名称（见 AUDIO_PROFILES），省略时使用默认格式
+    """
+    if os.path.basename(filename) != filename or not filename.endswith('.html'):
+        return jsonify({'success': False, 'error': 'Invalid filename'}), 400
+    record = lesson_store.load(filename[:-5])
+    if record is None:
+        return jsonify({'success': False, 'error': '学习记录不存在'}), 404
+    dialogue = record.get('dialogue') or []
+    if index >= len(dialogue):
+        return jsonify({'success': False, 'error': '句子不存在'}), 404
+    try:
+        rate = float(request.args.get('rate', 1))
+    except ValueError:
+        rate = None
+    if rate != 1 and rate not in audio_variants.rates:
+        return jsonify({
+            'success': False,
+            'error': f'rate must be one of {[1] + list(audio_variants.rates)}'
+        }), 400
+    profile = request.args.get('profile') or None
+    if profile is not None and profile not in Config.AUDIO_PROFILES:
+        return jsonify({
+            'success': False,
+            'error': f'profile must be one of {list(Config.AUDIO_PROFILES)}'
+        }), 400
+    
+    line = dialogue[index]
+    if rate == 1 and profile is None:
+        if not line.get('audio_url'):
+            return jsonify({'success': False, 'error': '音频生成中'}), 404
+        return jsonify({'success': True, 'url': line['audio_url'], 'rate': 1})
+    if get_tts_service() is None:
+        return jsonify({
+            'success': False,
+            'error': 'TTS service not initialized. Please set config first.'
+        }), 400
+    result = audio_variants.get(line['english'], speaker_voice(line.get('speaker')), rate, profile=profile)
+    if not result.get('success'):
+        return jsonify({'success': False, 'error': result.get('error', 'TTS synthesis failed')}), 500
+    return jsonify({
+        'success': True,
+        'url': result['url'],
+        'rate': rate,
+        'profile': profile,
+        'cached': result.get('cached', False)
+    })
+
 @app.route('/history')
 def history_page():
     """学习历史页面"""
-    return render_template_string(HISTORY_HTML)
-
-def generate_learn_html(topic, dialogue, keywords):
-    """生成学习页面HTML"""
-    keywords_html = ''
-    for kw in keywords:
-        keywords_html += f'''
-        <div class="keyword-item">
-            <span class="word">{kw.get('word', '')}</span>
-            <span class="phonetic">{kw.get('phonetic', '')}</span>
-            <span class="meaning">{kw.get('chinese', '')}</span>
-        </div>
-        '''
-    
-    dialogue_html = ''
-    for item in dialogue:
-        dialogue_html += f'''
-        <div class="dialogue-row">
-            <div class="col chinese">{item.get('chinese', '')}</div>
-            <div class="col english">{item.get('english', '')}</div>
-            <div class="col audio">
-                {f'<audio controls src="{item.get("audio_url", "")}"></audio>' if item.get('audio_url') else '无音频'}
-            </div>
-        </div>
-        '''
-    
-    return f'''<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{topic} - 英语口语练习</title>
-    <style>
-        :root {{
-            --primary: #0d9488;
-            --primary-dark: #0f766e;
-            --primary-light: #ccfbf1;
-            --text-primary: #1e293b;
-            --text-secondary: #64748b;
-            --bg-page: #f0fdfa;
-            --bg-card: #ffffff;
-            --bg-muted: #f0fdfa;
-            --border: #cbd5e1;
-            --success: #22c55e;
-        }}
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(135deg, #f0fdfa 0%, #e0f2fe 50%, #f0f9ff 100%);
-            padding: 20px;
-            color: var(--text-primary);
-            min-height: 100vh;
-        }}
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            background: rgba(255, 255, 255, 0.98);
-            padding: 40px;
-            border-radius: 24px;
-            box-shadow: 0 20px 60px rgba(13, 148, 136, 0.1), 0 8px 25px rgba(0,0,0,0.06);
-            border: 1px solid rgba(255, 255, 255, 0.5);
-        }}
-        h1 {{
-            text-align: center;
-            color: var(--text-primary);
-            margin-bottom: 32px;
-            font-size: 28px;
-            font-weight: 700;
-        }}
-        .keywords {{
-            background: var(--bg-muted);
-            padding: 24px;
-            border-radius: 16px;
-            margin-bottom: 32px;
-        }}
-        .keywords h2 {{
-            color: var(--text-primary);
-            margin-bottom: 16px;
-            font-size: 16px;
-            font-weight: 600;
-        }}
-        .keyword-list {{ display: flex; flex-wrap: wrap; gap: 12px; }}
-        .keyword-item {{
-            background: var(--bg-card);
-            padding: 12px 18px;
-            border-radius: 12px;
-            border: 1px solid var(--border);
-            display: flex;
-            align-items: center;
-            gap: 10px;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.05);
-        }}
-        .keyword-item .word {{
-            font-weight: 600;
-            color: var(--primary);
-            font-size: 15px;
-        }}
-        .keyword-item .phonetic {{
-            color: var(--text-secondary);
-            font-size: 13px;
-        }}
-        .keyword-item .meaning {{
-            color: var(--text-secondary);
-            font-size: 14px;
-            border-left: 1px solid var(--border);
-            padding-left: 10px;
-        }}
-        .dialogue-table {{
-            width: 100%;
-            border-radius: 16px;
-            overflow: hidden;
-            border: 1px solid var(--border);
-        }}
-        .dialogue-header {{
-            display: grid;
-            grid-template-columns: 1fr 1fr 200px;
-            gap: 0;
-            padding: 16px 20px;
-            background: var(--primary);
-            color: white;
-            font-weight: 600;
-            font-size: 14px;
-        }}
-        .dialogue-row {{
-            display: grid;
-            grid-template-columns: 1fr 1fr 200px;
-            gap: 0;
-            padding: 0;
-            border-bottom: 1px solid var(--border);
-            align-items: stretch;
-        }}
-        .dialogue-row:last-child {{ border-bottom: none; }}
-        .dialogue-row:nth-child(even) {{ background: var(--bg-muted); }}
-        .col {{
-            padding: 16px 20px;
-            display: flex;
-            align-items: center;
-        }}
-        .col:not(:last-child) {{ border-right: 1px solid var(--border); }}
-        .chinese {{
-            color: var(--text-primary);
-            font-size: 15px;
-        }}
-        .english {{
-            color: var(--primary);
-            font-weight: 500;
-            font-size: 15px;
-        }}
-        .audio {{
-            justify-content: center;
-        }}
-        .audio audio {{
-            width: 100%;
-            height: 36px;
-        }}
-        .back-btn {{
-            display: inline-flex;
-            align-items: center;
-            gap: 8px;
-            margin-top: 24px;
-            padding: 12px 24px;
-            background: var(--primary);
-            color: white;
-            text-decoration: none;
-            border-radius: 12px;
-            font-weight: 500;
-            font-size: 14px;
-            transition: all 0.2s;
-        }}
-        .back-btn:hover {{
-            background: var(--primary-dark);
-            transform: translateY(-1px);
-            box-shadow: 0 4px 12px rgba(37, 99, 235, 0.3);
-        }}
-        @media (max-width: 768px) {{
-            .container {{ padding: 20px; }}
-            .dialogue-header,
-            .dialogue-row {{
-                grid-template-columns: 1fr;
-            }}
-            .col:not(:last-child) {{
-                border-right: none;
-                border-bottom: 1px solid var(--border);
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>📚 {topic}</h1>
-
-        <div class="keywords">
-            <h2>🎯 关键词汇</h2>
-            <div class="keyword-list">
-                {keywords_html}
-            </div>
-        </div>
-
-        <div class="dialogue-table">
-            <div class="dialogue-header">
-                <div>中文</div>
-                <div>英文</div>
-                <div>读音</div>
-            </div>
-            {dialogue_html}
-        </div>
-
-        <a href="/" class="back-btn">← 返回首页</a>
-    </div>
-</body>
-</html>'''
-
-# 配置页面HTML
-INDEX_HTML = '''<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>英语口语练习 - 配置</title>
-    <style>
-        :root {
-            --primary: #0d9488;
-            --primary-dark: #0f766e;
-            --primary-light: #ccfbf1;
-            --primary-soft: #5eead4;
-            --success: #22c55e;
-            --success-light: #dcfce7;
-            --error: #ef4444;
-            --error-light: #fee2e2;
-            --warning: #f59e0b;
-            --warning-light: #fef3c7;
-            --text-primary: #1e293b;
-            --text-secondary: #64748b;
-            --bg-page: #f0fdfa;
-            --bg-card: #ffffff;
-            --border: #cbd5e1;
-        }
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(135deg, #f0fdfa 0%, #e0f2fe 50%, #f0f9ff 100%);
-            min-height: 100vh;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            padding: 20px;
-            position: relative;
-            overflow-x: hidden;
-        }
-        /* 背景装饰元素 */
-        .bg-decoration {
-            position: fixed;
-            border-radius: 50%;
-            opacity: 0.6;
-            filter: blur(40px);
-            z-index: 0;
-            pointer-events: none;
-        }
-        .bg-decoration-1 {
-            width: 300px;
-            height: 300px;
-            background: linear-gradient(135deg, #5eead4 0%, #0d9488 100%);
-            top: -100px;
-            right: -100px;
-            animation: float 8s ease-in-out infinite;
-        }
-        .bg-decoration-2 {
-            width: 200px;
-            height: 200px;
-            background: linear-gradient(135deg, #a5f3fc 0%, #22d3ee 100%);
-            bottom: 10%;
-            left: -50px;
-            animation: float 10s ease-in-out infinite reverse;
-        }
-        .bg-decoration-3 {
-            width: 150px;
-            height: 150px;
-            background: linear-gradient(135deg, #c4b5fd 0%, #8b5cf6 100%);
-            top: 40%;
-            right: 5%;
-            animation: float 12s ease-in-out infinite;
-        }
-        .bg-decoration-4 {
-            width: 100px;
-            height: 100px;
-            background: linear-gradient(135deg, #fbcfe8 0%, #f472b6 100%);
-            bottom: 20%;
-            right: 10%;
-            animation: float 6s ease-in-out infinite reverse;
-        }
-        @keyframes float {
-            0%, 100% { transform: translateY(0) rotate(0deg); }
-            50% { transform: translateY(-20px) rotate(5deg); }
-        }
-        .container {
-            background: rgba(255, 255, 255, 0.95);
-            padding: 48px;
-            border-radius: 24px;
-            box-shadow: 0 20px 60px rgba(13, 148, 136, 0.15), 0 8px 25px rgba(0,0,0,0.08);
-            width: 100%;
-            max-width: 480px;
-            border: 1px solid rgba(255, 255, 255, 0.5);
-            position: relative;
-            z-index: 1;
-            backdrop-filter: blur(10px);
-        }
-        h1 {
-            text-align: center;
-            color: var(--text-primary);
-            margin-bottom: 8px;
-            font-size: 32px;
-            font-weight: 700;
-        }
-        .subtitle {
-            text-align: center;
-            color: var(--text-secondary);
-            margin-bottom: 32px;
-            font-size: 15px;
-        }
-        .form-group { margin-bottom: 24px; }
-        label {
-            display: block;
-            margin-bottom: 8px;
-            color: var(--text-primary);
-            font-weight: 500;
-            font-size: 14px;
-        }
-        input[type="text"], input[type="password"], input[type="number"] {
-            width: 100%;
-            padding: 12px 16px;
-            border: 1px solid var(--border);
-            border-radius: 12px;
-            font-size: 15px;
-            transition: all 0.2s;
-            background: var(--bg-card);
-            color: var(--text-primary);
-        }
-        input[type="text"]:focus, input[type="password"]:focus, input[type="number"]:focus {
-            outline: none;
-            border-color: var(--primary);
-            box-shadow: 0 0 0 3px var(--primary-light);
-        }
-        input::placeholder {
-            color: #9ca3af;
-        }
-        .btn {
-            width: 100%;
-            padding: 14px 24px;
-            background: var(--primary);
-            color: white;
-            border: none;
-            border-radius: 12px;
-            font-size: 16px;
-            font-weight: 600;
-            cursor: pointer;
-            transition: all 0.2s;
-        }
-        .btn:hover:not(:disabled) {
-            background: var(--primary-dark);
-            transform: translateY(-1px);
-            box-shadow: 0 10px 20px -5px rgba(37, 99, 235, 0.3);
-        }
-        .btn:disabled {
-            background: #d1d5db;
-            cursor: not-allowed;
-        }
-        .status {
-            margin-top: 20px;
-            padding: 12px 16px;
-            border-radius: 10px;
-            text-align: center;
-            display: none;
-            font-size: 14px;
-            font-weight: 500;
-        }
-        .status.success {
-            background: var(--success-light);
-            color: #065f46;
-            display: block;
-            border: 1px solid #a7f3d0;
-        }
-        .status.error {
-            background: var(--error-light);
-            color: #991b1b;
-            display: block;
-            border: 1px solid #fecaca;
-        }
-        .status.loading {
-            background: var(--warning-light);
-            color: #92400e;
-            display: block;
-            border: 1px solid #fde68a;
-        }
-        .link-btn {
-            display: block;
-            text-align: center;
-            margin-top: 20px;
-            color: var(--primary);
-            text-decoration: none;
-            font-size: 14px;
-            font-weight: 500;
-            padding: 12px;
-            border-radius: 10px;
-            transition: all 0.2s;
-        }
-        .link-btn:hover {
-            background: var(--primary-light);
-            text-decoration: none;
-        }
-    </style>
-</head>
-<body>
-    <!-- 背景装饰元素 -->
-    <div class="bg-decoration bg-decoration-1"></div>
-    <div class="bg-decoration bg-decoration-2"></div>
-    <div class="bg-decoration bg-decoration-3"></div>
-    <div class="bg-decoration bg-decoration-4"></div>
-    
-    <div class="container">
-        <h1>🎓 英语口语练习</h1>
-        <p class="subtitle">配置学习参数，生成专属对话内容</p>
-        
-        <div id="configStatus" class="status" style="display: block; margin-bottom: 20px;">
-            ⏳ 正在检查配置...
-        </div>
-        
-        <form id="configForm">
-            <div class="form-group">
-                <label for="topic">学习话题</label>
-                <input type="text" id="topic" placeholder="例如：餐厅点餐、机场登机、酒店入住..." required>
-            </div>
-            
-            <div class="form-group">
-                <label for="exchanges">对话轮数</label>
-                <input type="number" id="exchanges" value="5" min="3" max="10">
-            </div>
-            
-            <button type="submit" class="btn" id="submitBtn" disabled>🚀 生成学习内容</button>
-        </form>
-        
-        <div id="status" class="status"></div>
-        <a href="/history" class="link-btn">📚 查看学习历史</a>
-    </div>
-
-    <script>
-        // 页面加载时检查配置
-        async function checkConfig() {
-            const configStatus = document.getElementById('configStatus');
-            const submitBtn = document.getElementById('submitBtn');
-            
-            try {
-                const res = await fetch('/api/config');
-                const data = await res.json();
-                
-                if (data.success && data.services_ready) {
-                    configStatus.className = 'status success';
-                    configStatus.innerHTML = '✅ ' + data.message;
-                    submitBtn.disabled = false;
-                } else {
-                    configStatus.className = 'status error';
-                    configStatus.innerHTML = '❌ ' + data.message + '<br><small>请在 .env 文件中配置 DASHSCOPE_API_KEY</small>';
-                }
-            } catch (error) {
-                configStatus.className = 'status error';
-                configStatus.textContent = '❌ 无法连接到服务器';
-            }
-        }
-        
-        // 页面加载时检查配置
-        checkConfig();
-        
-        document.getElementById('configForm').addEventListener('submit', async (e) => {
-            e.preventDefault();
-            
-            const topic = document.getElementById('topic').value;
-            const exchanges = document.getElementById('exchanges').value;
-            const statusDiv = document.getElementById('status');
-            const submitBtn = document.getElementById('submitBtn');
-            
-            submitBtn.disabled = true;
-            statusDiv.className = 'status loading';
-            statusDiv.textContent = '⏳ 正在启动生成任务...';
-            
-            try {
-                // 1. 启动异步生成任务
-                console.log('Step 1: 启动异步任务, topic:', topic);
-                const startRes = await fetch('/api/generate-async', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ topic: topic, num_exchanges: parseInt(exchanges) })
-                });
-                
-                if (!startRes.ok) {
-                    throw new Error('启动任务失败');
-                }
-                
-                const startData = await startRes.json();
-                if (!startData.success) {
-                    throw new Error(startData.error || '启动任务失败');
-                }
-                
-                const taskId = startData.task_id;
-                console.log('任务已启动:', taskId);
-                
-                // 2. 轮询任务状态
-                statusDiv.textContent = '⏳ 正在生成内容，请稍候...';
-                
-                let completed = false;
-                let attempts = 0;
-                const maxAttempts = 120; // 最多轮询120次（2分钟）
-                
-                while (!completed && attempts < maxAttempts) {
-                    await new Promise(resolve => setTimeout(resolve, 1000)); // 每秒查询一次
-                    attempts++;
-                    
-                    const statusRes = await fetch(`/api/task/${taskId}`);
-                    if (!statusRes.ok) continue;
-                    
-                    const statusData = await statusRes.json();
-                    if (!statusData.success) continue;
-                    
-                    const task = statusData.task;
-                    console.log(`任务状态: ${task.status}, 进度: ${task.progress}%`);
-                    
-                    if (task.status === 'running') {
-                        statusDiv.textContent = `⏳ 正在生成内容... (${task.progress}%)`;
-                    } else if (task.status === 'completed') {
-                        completed = true;
-                        const result = task.result;
-                        statusDiv.className = 'status success';
-                        statusDiv.innerHTML = `✅ 生成成功！<br><a href="${result.url}" target="_blank">点击打开学习页面</a>`;
-                    } else if (task.status === 'failed') {
-                        throw new Error(task.error || '生成失败');
-                    }
-                }
-                
-                if (!completed) {
-                    throw new Error('生成超时，请稍后重试');
-                }
-            } catch (error) {
-                console.error('Error:', error);
-                statusDiv.className = 'status error';
-                let errorMsg = error.message;
-                statusDiv.innerHTML = '❌ ' + errorMsg + '<br><small>请查看浏览器控制台(F12)获取详细信息</small>';
-            } finally {
-                submitBtn.disabled = false;
-            }
-        });
-    </script>
-</body>
-</html>'''
-
-# 学习历史页面HTML
-HISTORY_HTML = '''<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>学习历史 - 英语口语练习</title>
-    <style>
-        :root {
-            --primary: #0d9488;
-            --primary-dark: #0f766e;
-            --primary-light: #ccfbf1;
-            --primary-soft: #5eead4;
-            --text-primary: #1e293b;
-            --text-secondary: #64748b;
-            --bg-page: #f0fdfa;
-            --bg-card: #ffffff;
-            --bg-muted: #f0fdfa;
-            --border: #cbd5e1;
-            --error: #ef4444;
-            --error-light: #fee2e2;
-        }
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(135deg, #f0fdfa 0%, #e0f2fe 50%, #f0f9ff 100%);
-            min-height: 100vh;
-            padding: 20px;
-            color: var(--text-primary);
-            position: relative;
-            overflow-x: hidden;
-        }
-        /* 背景装饰元素 */
-        .bg-decoration {
-            position: fixed;
-            border-radius: 50%;
-            opacity: 0.5;
-            filter: blur(50px);
-            z-index: 0;
-            pointer-events: none;
-        }
-        .bg-decoration-1 {
-            width: 250px;
-            height: 250px;
-            background: linear-gradient(135deg, #5eead4 0%, #0d9488 100%);
-            top: -80px;
-            left: -80px;
-            animation: float 9s ease-in-out infinite;
-        }
-        .bg-decoration-2 {
-            width: 180px;
-            height: 180px;
-            background: linear-gradient(135deg, #a5f3fc 0%, #22d3ee 100%);
-            bottom: 15%;
-            right: -40px;
-            animation: float 11s ease-in-out infinite reverse;
-        }
-        .bg-decoration-3 {
-            width: 120px;
-            height: 120px;
-            background: linear-gradient(135deg, #c4b5fd 0%, #8b5cf6 100%);
-            top: 30%;
-            left: 5%;
-            animation: float 7s ease-in-out infinite;
-        }
-        @keyframes float {
-            0%, 100% { transform: translateY(0) rotate(0deg); }
-            50% { transform: translateY(-15px) rotate(3deg); }
-        }
-        .container {
-            max-width: 900px;
-            margin: 0 auto;
-            background: rgba(255, 255, 255, 0.95);
-            padding: 40px;
-            border-radius: 24px;
-            box-shadow: 0 20px 60px rgba(13, 148, 136, 0.12), 0 8px 25px rgba(0,0,0,0.06);
-            border: 1px solid rgba(255, 255, 255, 0.5);
-            position: relative;
-            z-index: 1;
-            backdrop-filter: blur(10px);
-        }
-        h1 {
-            text-align: center;
-            color: var(--text-primary);
-            margin-bottom: 8px;
-            font-size: 28px;
-            font-weight: 700;
-        }
-        .subtitle {
-            text-align: center;
-            color: var(--text-secondary);
-            margin-bottom: 32px;
-        }
-        .header-actions {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 24px;
-            padding-bottom: 24px;
-            border-bottom: 1px solid var(--border);
-        }
-        .back-btn {
-            display: inline-flex;
-            align-items: center;
-            gap: 8px;
-            padding: 10px 20px;
-            background: var(--bg-muted);
-            color: var(--text-secondary);
-            text-decoration: none;
-            border-radius: 10px;
-            font-size: 14px;
-            font-weight: 500;
-            transition: all 0.2s;
-        }
-        .back-btn:hover {
-            background: var(--border);
-            color: var(--text-primary);
-        }
-        .refresh-btn {
-            padding: 10px 20px;
-            background: var(--primary);
-            color: white;
-            border: none;
-            border-radius: 10px;
-            cursor: pointer;
-            font-size: 14px;
-            font-weight: 500;
-            transition: all 0.2s;
-        }
-        .refresh-btn:hover {
-            background: var(--primary-dark);
-            transform: translateY(-1px);
-            box-shadow: 0 4px 12px rgba(37, 99, 235, 0.3);
-        }
-        .history-list {
-            display: flex;
-            flex-direction: column;
-            gap: 12px;
-        }
-        .history-item {
-            display: flex;
-            align-items: center;
-            justify-content: space-between;
-            padding: 20px;
-            background: var(--bg-muted);
-            border-radius: 12px;
-            border: 1px solid var(--border);
-            transition: all 0.2s;
-        }
-        .history-item:hover {
-            background: var(--bg-card);
-            border-color: var(--primary-light);
-            box-shadow: 0 2px 8px rgba(37, 99, 235, 0.08);
-        }
-        .history-info {
-            flex: 1;
-        }
-        .history-topic {
-            font-size: 16px;
-            font-weight: 600;
-            color: var(--text-primary);
-            margin-bottom: 6px;
-        }
-        .history-meta {
-            font-size: 13px;
-            color: var(--text-secondary);
-        }
-        .history-actions {
-            display: flex;
-            gap: 8px;
-        }
-        .btn {
-            padding: 8px 16px;
-            border: none;
-            border-radius: 8px;
-            cursor: pointer;
-            font-size: 13px;
-            font-weight: 500;
-            text-decoration: none;
-            transition: all 0.2s;
-        }
-        .btn-primary {
-            background: var(--primary);
-            color: white;
-        }
-        .btn-primary:hover {
-            background: var(--primary-dark);
-            box-shadow: 0 2px 8px rgba(13, 148, 136, 0.3);
-        }
-        .btn-danger {
-            background: transparent;
-            color: var(--error);
-            border: 1px solid var(--error);
-        }
-        .btn-danger:hover {
-            background: var(--error-light);
-        }
-        .empty-state {
-            text-align: center;
-            padding: 60px 20px;
-            color: var(--text-secondary);
-        }
-        .empty-state .icon {
-            font-size: 48px;
-            margin-bottom: 16px;
-        }
-        .loading {
-            text-align: center;
-            padding: 40px;
-            color: var(--text-secondary);
-        }
-        .error {
-            text-align: center;
-            padding: 40px;
-            color: var(--error);
-        }
-    </style>
-</head>
-<body>
-    <!-- 背景装饰元素 -->
-    <div class="bg-decoration bg-decoration-1"></div>
-    <div class="bg-decoration bg-decoration-2"></div>
-    <div class="bg-decoration bg-decoration-3"></div>
-    
-    <div class="container">
-        <h1>📚 学习历史</h1>
-        <p class="subtitle">查看和管理您的学习记录</p>
-        
-        <div class="header-actions">
-            <a href="/" class="back-btn">← 返回首页</a>
-            <button class="refresh-btn" onclick="loadHistory()">🔄 刷新列表</button>
-        </div>
-        
-        <div id="historyList" class="history-list">
-            <div class="loading">⏳ 加载中...</div>
-        </div>
-    </div>
-
-    <script>
-        async function loadHistory() {
-            const listContainer = document.getElementById('historyList');
-            listContainer.innerHTML = '<div class="loading">⏳ 加载中...</div>';
-            
-            try {
-                const response = await fetch('/api/history');
-                const data = await response.json();
-                
-                if (!data.success) {
-                    throw new Error(data.error || '加载失败');
-                }
-                
-                if (data.history.length === 0) {
-                    listContainer.innerHTML = `
-                        <div class="empty-state">
-                            <div class="icon">📝</div>
-                            <p>暂无学习记录</p>
-                            <p style="font-size: 14px; margin-top: 10px;">去首页生成您的第一个学习内容吧！</p>
-                        </div>
-                    `;
-                    return;
-                }
-                
-                listContainer.innerHTML = data.history.map(item => `
-                    <div class="history-item" data-filename="${item.filename}">
-                        <div class="history-info">
-                            <div class="history-topic">${escapeHtml(item.topic)}</div>
-                            <div class="history-meta">
-                                📅 ${item.created_at} · 📄 ${formatSize(item.size)}
-                            </div>
-                        </div>
-                        <div class="history-actions">
-                            <a href="${item.url}" class="btn btn-primary" target="_blank">开始学习</a>
-                            <button class="btn btn-danger" onclick="deleteItem('${item.filename}', this)">删除</button>
-                        </div>
-                    </div>
-                `).join('');
-            } catch (error) {
-                console.error('Error:', error);
-                listContainer.innerHTML = `<div class="error">❌ 加载失败: ${error.message}</div>`;
-            }
-        }
-        
-        async function deleteItem(filename, btn) {
-            if (!confirm(`确定要删除 "${filename}" 吗？`)) {
-                return;
-            }
-            
-            btn.disabled = true;
-            btn.textContent = '删除中...';
-            
-            try {
-                const response = await fetch(`/api/history/${filename}`, {
-                    method: 'DELETE'
-                });
-                const data = await response.json();
-                
-                if (data.success) {
-                    // 移除该项
-                    const item = btn.closest('.history-item');
-                    item.style.opacity = '0';
-                    item.style.transform = 'translateX(-100%)';
-                    setTimeout(() => item.remove(), 300);
-                } else {
-                    throw new Error(data.error || '删除失败');
-                }
-            } catch (error) {
-                console.error('Error:', error);
-                alert('删除失败: ' + error.message);
-                btn.disabled = false;
-                btn.textContent = '删除';
-            }
-        }
-        
-        function escapeHtml(text) {
-            const div = document.createElement('div');
-            div.textContent = text;
-            return div.innerHTML;
-        }
-        
-        function formatSize(bytes) {
-            if (bytes < 1024) return bytes + ' B';
-            if (bytes < 1024 * 1024) return (bytes / 1024).toFixed(1) + ' KB';
-            return (bytes / (1024 * 1024)).toFixed(1) + ' MB';
-        }
-        
-        // 页面加载时自动加载历史记录
-        loadHistory();
-    </script>
-</body>
-</html>'''
+    return send_page('history.html')
+
+startup_lock = threading.Lock()
+startup_thread = None
+
+def start_background_work():
+    """
+    在后台线程中恢复未完成的任务、为已有课程建立索引并启动预生成
+    
+    需要读取所有学习记录，由 run.py 在端口绑定后调用，不拖慢启动；重复调用无效
+    
+    Returns:
+        threading.Thread: 启动线程
+    """
+    global startup_thread
+    with startup_lock:
+        if startup_thread is None:
+            startup_thread = threading.Thread(target=_run_startup, name='startup', daemon=True)
+            startup_thread.start()
+        return startup_thread
+
+def _run_startup():
+    started_at = time.perf_counter()
+    # 恢复上次停机时未完成的任务
+    resume_pending_tasks()
+    resume_pending_batches()
+    resume_audio_repairs()
+    count = index_lessons()
+    prefetcher.load()
+    # 话题热度计入输入提示的排序
+    for score, key in prefetcher.hottest(Config.PREFETCH_MAX_TRACKED):
+        topic_suggester.touch(key.split('|', 1)[1], score)
+    prefetcher.start()
+    # 词典不存在时在启动日志中提示一次（不显示音标）
+    phonetics.available
+    print(f"📚 已索引 {count} 个课程 ({(time.perf_counter() - started_at) * 1000:.0f} ms)")
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    start_background_work()
+    try:
+        app.run(host='0.0.0.0', port=5000, debug=True)
+    finally:
+        shutdown_tasks()
\ No newline at end of file
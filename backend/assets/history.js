@@ -0,0 +1,88 @@
+async function loadHistory() {
+    const listContainer = document.getElementById('historyList');
+    listContainer.innerHTML = '<div class="loading">⏳ 加载中...</div>';
+
+    try {
+        const response = await fetch('/api/history');
+        const data = await response.json();
+
+        if (!data.success) {
+            throw new Error(data.error || '加载失败');
+        }
+
+        if (data.history.length === 0) {
+            listContainer.innerHTML = `
+                <div class="empty-state">
+                    <div class="icon">📝</div>
+                    <p>暂无学习记录</p>
+                    <p style="font-size: 14px; margin-top: 10px;">去首页生成您的第一个学习内容吧！</p>
+                </div>
+            `;
+            return;
+        }
+
+        listContainer.innerHTML = data.history.map(item => `
+            <div class="history-item" data-filename="${item.filename}">
+                <div class="history-info">
+                    <div class="history-topic">${escapeHtml(item.topic)}</div>
+                    <div class="history-meta">
+                        📅 ${item.created_at} · 📄 ${formatSize(item.size)}
+                    </div>
+                </div>
+                <div class="history-actions">
+                    <a href="${item.url}" class="btn btn-primary" target="_blank">开始学习</a>
+                    <button class="btn btn-danger" onclick="deleteItem('${item.filename}', this)">删除</button>
+                </div>
+            </div>
+        `).join('');
+    } catch (error) {
+        console.error('Error:', error);
+        listContainer.innerHTML = `<div class="error">❌ 加载失败: ${error.message}</div>`;
+    }
+}
+
+async function deleteItem(filename, btn) {
+    if (!confirm(`确定要删除 "${filename}" 吗？`)) {
+        return;
+    }
+
+    btn.disabled = true;
+    btn.textContent = '删除中...';
+
+    try {
+        const response = await fetch(`/api/history/${filename}`, {
+            method: 'DELETE'
+        });
+        const data = await response.json();
+
+        if (data.success) {
+            // 移除该项
+            const item = btn.closest('.history-item');
+            item.style.opacity = '0';
+            item.style.transform = 'translateX(-100%)';
+            setTimeout(() => item.remove(), 300);
+        } else {
+            throw new Error(data.error || '删除失败');
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        alert('删除失败: ' + error.message);
+        btn.disabled = false;
+        btn.textContent = '删除';
+    }
+}
+
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
+
+function formatSize(bytes) {
+    if (bytes < 1024) return bytes + ' B';
+    if (bytes < 1024 * 1024) return (bytes / 1024).toFixed(1) + ' KB';
+    return (bytes / (1024 * 1024)).toFixed(1) + ' MB';
+}
+
+// 页面加载时自动加载历史记录
+loadHistory();
@@ -0,0 +1,154 @@
+// 页面加载时检查配置
+async function checkConfig() {
+    const configStatus = document.getElementById('configStatus');
+    const submitBtn = document.getElementById('submitBtn');
+
+    try {
+        const res = await fetch('/api/config');
+        const data = await res.json();
+
+        if (data.success && data.services_ready) {
+            configStatus.className = 'status success';
+            configStatus.innerHTML = '✅ ' + data.message;
+            submitBtn.disabled = false;
+        } else {
+            configStatus.className = 'status error';
+            configStatus.innerHTML = '❌ ' + data.message + '<br><small>请在 .env 文件中配置 DASHSCOPE_API_KEY</small>';
+        }
+    } catch (error) {
+        configStatus.className = 'status error';
+        configStatus.textContent = '❌ 无法连接到服务器';
+    }
+}
+
+// 页面加载时检查配置
+checkConfig();
+
+// 话题输入提示（已有课程的话题，支持拼音前缀）
+let suggestController = null;
+let suggestTimer = null;
+document.getElementById('topic').addEventListener('input', (e) => {
+    clearTimeout(suggestTimer);
+    const query = e.target.value.trim();
+    suggestTimer = setTimeout(async () => {
+        if (suggestController) suggestController.abort();
+        const datalist = document.getElementById('topicSuggestions');
+        if (!query) {
+            datalist.innerHTML = '';
+            return;
+        }
+        suggestController = new AbortController();
+        try {
+            const res = await fetch(`/api/topics/suggest?q=${encodeURIComponent(query)}`, { signal: suggestController.signal });
+            const data = await res.json();
+            datalist.innerHTML = '';
+            for (const topic of data.suggestions || []) {
+                const option = document.createElement('option');
+                option.value = topic;
+                datalist.appendChild(option);
+            }
+        } catch (error) {
+            // 请求被新的输入取消或失败时保留原提示
+        }
+    }, 100);
+});
+
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
+
+// 已有相似话题课程的提示
+function similarNote(similar) {
+    if (!similar) return '';
+    return `<br><small>已有相似课程「${escapeHtml(similar.topic)}」，<a href="${similar.url}" target="_blank">可直接打开</a></small>`;
+}
+
+// 显示生成结果（部分音频仍在后台补齐时给出提示）
+function showResult(statusDiv, result, similar) {
+    statusDiv.className = 'status success';
+    const pendingNote = result.audio_pending ? `<br><small>${result.audio_pending} 句音频正在后台补齐，稍后刷新页面即可播放</small>` : '';
+    const reusedNote = result.similarity ? `<br><small>已复用相似话题「${escapeHtml(result.topic)}」的课程</small>` : '';
+    statusDiv.innerHTML = `✅ 生成成功！<br><a href="${result.url}" target="_blank">点击打开学习页面</a>${reusedNote}${pendingNote}${similarNote(similar)}`;
+}
+
+document.getElementById('configForm').addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const topic = document.getElementById('topic').value;
+    const exchanges = document.getElementById('exchanges').value;
+    const statusDiv = document.getElementById('status');
+    const submitBtn = document.getElementById('submitBtn');
+
+    submitBtn.disabled = true;
+    statusDiv.className = 'status loading';
+    statusDiv.textContent = '⏳ 正在启动生成任务...';
+
+    try {
+        // 1. 启动异步生成任务
+        console.log('Step 1: 启动异步任务, topic:', topic);
+        const startRes = await fetch('/api/generate-async', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ topic: topic, num_exchanges: parseInt(exchanges) })
+        });
+
+        if (!startRes.ok) {
+            throw new Error('启动任务失败');
+        }
+
+        const startData = await startRes.json();
+        if (!startData.success) {
+            throw new Error(startData.error || '启动任务失败');
+        }
+
+        const taskId = startData.task_id;
+        console.log('任务已启动:', taskId);
+
+        // 2. 轮询任务状态
+        statusDiv.innerHTML = '⏳ 正在生成内容，请稍候...' + similarNote(startData.similar);
+
+        // 热门话题已预生成时直接返回结果，无需轮询
+        let completed = Boolean(startData.result);
+        if (completed) {
+            showResult(statusDiv, startData.result);
+        }
+        let attempts = 0;
+        const maxAttempts = 120; // 最多轮询120次（2分钟）
+
+        while (!completed && attempts < maxAttempts) {
+            await new Promise(resolve => setTimeout(resolve, 1000)); // 每秒查询一次
+            attempts++;
+
+            const statusRes = await fetch(`/api/task/${taskId}`);
+            if (!statusRes.ok) continue;
+
+            const statusData = await statusRes.json();
+            if (!statusData.success) continue;
+
+            const task = statusData.task;
+            console.log(`任务状态: ${task.status}, 进度: ${task.progress}%`);
+
+            if (task.status === 'running') {
+                statusDiv.innerHTML = `⏳ 正在生成内容... (${task.progress}%)${similarNote(startData.similar)}`;
+            } else if (task.status === 'completed') {
+                completed = true;
+                showResult(statusDiv, task.result, startData.similar);
+            } else if (task.status === 'failed') {
+                throw new Error(task.error || '生成失败');
+            }
+        }
+
+        if (!completed) {
+            throw new Error('生成超时，请稍后重试');
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        statusDiv.className = 'status error';
+        let errorMsg = error.message;
+        statusDiv.innerHTML = '❌ ' + errorMsg + '<br><small>请查看浏览器控制台(F12)获取详细信息</small>';
+    } finally {
+        submitBtn.disabled = false;
+    }
+});
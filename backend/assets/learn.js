@@ -0,0 +1,42 @@
+// 句子变速播放：首次选择某个语速时由服务端合成，之后直接复用；关键词发音按钮
+async function playRate(button) {
+    const col = button.closest('.audio');
+    const audio = col.querySelector('audio');
+    audio.dataset.src = audio.dataset.src || audio.getAttribute('src');
+
+    button.disabled = true;
+    try {
+        let url = audio.dataset.src;
+        if (button.dataset.rate !== '1') {
+            const filename = location.pathname.split('/').pop();
+            const response = await fetch(`/api/history/${encodeURIComponent(filename)}/audio/${button.dataset.line}?rate=${button.dataset.rate}`);
+            const data = await response.json();
+            if (!data.success) {
+                throw new Error(data.error || '生成失败');
+            }
+            url = data.url;
+        }
+        audio.src = url;
+        audio.play();
+        col.querySelectorAll('.rates button').forEach(b => b.classList.toggle('active', b === button));
+        button.title = '';
+    } catch (error) {
+        console.error('Error:', error);
+        button.title = `❌ ${error.message}`;
+    } finally {
+        button.disabled = false;
+    }
+}
+
+document.addEventListener('click', (event) => {
+    const button = event.target.closest('.rates button');
+    if (button) {
+        playRate(button);
+        return;
+    }
+    // 关键词发音：地址只从 data-src 读取，不拼接进脚本
+    const speak = event.target.closest('.speak');
+    if (speak && speak.dataset.src) {
+        new Audio(speak.dataset.src).play();
+    }
+});
@@ -0,0 +1,97 @@
+import gzip
+from backend.config import Config
+
+# brotli 为可选依赖，未安装时只提供 gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 服务端优先使用的编码顺序
+PREFERRED_ENCODINGS = ('br', 'gzip')
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/css', 'application/javascript'}
+
+
+def compress(body, encoding, level=None):
+    """
+    按指定编码压缩字节
+
+    Args:
+        body: 原始字节
+        encoding: 'gzip' 或 'br'
+        level: 压缩级别（默认使用动态响应级别）
+    """
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=level or 5)
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(body, quality=level or 5)
+    raise ValueError(f'Unsupported encoding: {encoding}')
+
+
+def precompress(body):
+    """
+    预压缩静态内容（只做一次，使用最高压缩级别）
+
+    Returns:
+        dict: 编码 -> 字节，包含 'identity'
+    """
+    variants = {'identity': body, 'gzip': compress(body, 'gzip', level=9)}
+    if brotli is not None:
+        variants['br'] = compress(body, 'br', level=11)
+    return variants
+
+
+def available_encodings():
+    return tuple(e for e in PREFERRED_ENCODINGS if e != 'br' or brotli is not None)
+
+
+def choose_encoding(accept_encodings, available):
+    """
+    根据 Accept-Encoding 选择编码
+
+    Args:
+        accept_encodings: werkzeug 解析后的 request.accept_encodings
+        available: 可用编码集合
+
+    Returns:
+        str: 'br'、'gzip' 或 'identity'
+    """
+    best, best_quality = 'identity', 0
+    for encoding in PREFERRED_ENCODINGS:
+        if encoding not in available:
+            continue
+        quality = accept_encodings[encoding]
+        # 同等 q 值时按服务端优先顺序
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def init_compression(app):
+    """注册响应压缩中间件：超过阈值的 JSON/HTML 响应按客户端支持的编码压缩"""
+
+    @app.after_request
+    def compress_response(response):
+        from flask import request
+
+        if (response.status_code != 200
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        body = response.get_data()
+        if len(body) < Config.COMPRESSION_MIN_SIZE:
+            return response
+
+        encoding = choose_encoding(request.accept_encodings, available_encodings())
+        if encoding == 'identity':
+            return response
+        response.set_data(compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    return compress_response
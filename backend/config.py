@@ -19,20 +19,77 @@ else:
     load_dotenv()
 
 
+def _model_list(name, default):
+    """读取逗号分隔的模型列表（去重并保持顺序）"""
+    models = [m.strip() for m in (os.environ.get(name) or default).split(',') if m.strip()]
+    return list(dict.fromkeys(models))
+
+
+def _audio_profiles(name, default):
+    """读取音频配置列表："名称=编码:采样率:码率"，逗号分隔"""
+    profiles = {}
+    for item in (os.environ.get(name) or default).split(','):
+        key, _, spec = item.partition('=')
+        parts = [p.strip() for p in spec.split(':')]
+        if key.strip() and len(parts) == 3 and parts[1].isdigit() and parts[2].isdigit():
+            profiles[key.strip()] = (parts[0].lower(), int(parts[1]), int(parts[2]))
+    return profiles
+
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key'
 
     # 阿里云配置
     DASHSCOPE_API_KEY = os.environ.get('DASHSCOPE_API_KEY') or ''
+    # 多个 API Key（逗号分隔），请求在各 Key 之间按负载分配
+    DASHSCOPE_API_KEYS = os.environ.get('DASHSCOPE_API_KEYS') or ''
+
+    # API Key 隔离时间（秒）：鉴权失败 / 限流（连续限流时翻倍，最长 KEY_QUARANTINE_MAX）
+    KEY_QUARANTINE_AUTH = float(os.environ.get('KEY_QUARANTINE_AUTH') or 3600)
+    KEY_QUARANTINE_THROTTLE = float(os.environ.get('KEY_QUARANTINE_THROTTLE') or 15)
+    KEY_QUARANTINE_MAX = float(os.environ.get('KEY_QUARANTINE_MAX') or 600)
 
     # TTS 模型配置 (CosyVoice)
     # 可选模型: cosyvoice-v2, cosyvoice-v3-flash, cosyvoice-v3-plus
     TTS_MODEL = os.environ.get('TTS_MODEL') or 'cosyvoice-v2'
 
+    # TTS 音频格式：编码（mp3/opus/wav）、采样率（Hz）、码率（kbps），须为 CosyVoice 支持的组合
+    # 默认与此前的输出相同（mp3 22050Hz 256kbps）；opus 24000Hz 32kbps 的语音体积约为其 1/8
+    TTS_FORMAT = (os.environ.get('TTS_FORMAT') or 'mp3').lower()
+    TTS_SAMPLE_RATE = int(os.environ.get('TTS_SAMPLE_RATE') or 22050)
+    TTS_BITRATE = int(os.environ.get('TTS_BITRATE') or 256)
+    # 客户端可选的音频配置（名称=编码:采样率:码率，逗号分隔），按需合成，与默认格式的音频分别缓存
+    AUDIO_PROFILES = _audio_profiles('AUDIO_PROFILES', 'mobile=mp3:16000:128,opus=opus:24000:32')
+
     # LLM 模型配置
     # 可选模型: deepseek-v3.2, qwen-max, qwen-plus, qwen-turbo
     LLM_MODEL = os.environ.get('LLM_MODEL') or 'deepseek-v3.2'
 
+    # 按任务类型路由模型：逗号分隔的候选模型，第一个为首选，其余为备用
+    # 调用超过截止时间（秒）仍未返回时并行请求下一个模型，先返回者胜出
+    LLM_ROUTES = {
+        'dialogue': _model_list('LLM_DIALOGUE_MODELS', f'{LLM_MODEL},qwen-turbo'),
+        'translate': _model_list('LLM_TRANSLATE_MODELS', f'qwen-turbo,{LLM_MODEL}'),
+        'keywords': _model_list('LLM_KEYWORDS_MODELS', f'qwen-turbo,{LLM_MODEL}'),
+    }
+    LLM_DEADLINES = {
+        'dialogue': float(os.environ.get('LLM_DIALOGUE_DEADLINE') or 30),
+        'translate': float(os.environ.get('LLM_TRANSLATE_DEADLINE') or 5),
+        'keywords': float(os.environ.get('LLM_KEYWORDS_DEADLINE') or 10),
+    }
+    # 每个模型保留的最近延迟样本数（用于路由选择）
+    LLM_LATENCY_WINDOW = int(os.environ.get('LLM_LATENCY_WINDOW') or 20)
+    # 延迟样本有效期（秒），过期后被降级的模型会重新尝试
+    LLM_LATENCY_TTL = float(os.environ.get('LLM_LATENCY_TTL') or 300)
+
+    # 支持结构化输出（JSON 模式）的模型名前缀，逗号分隔
+    LLM_JSON_MODE_MODELS = tuple(
+        p.strip() for p in (os.environ.get('LLM_JSON_MODE_MODELS') or 'qwen').split(',') if p.strip()
+    )
+
+    # 长对话分段生成：轮数超过该值时分段并发生成（0 表示不分段）
+    LLM_SEGMENT_EXCHANGES = int(os.environ.get('LLM_SEGMENT_EXCHANGES') or 8)
+
     # Speaker Voice 配置 (CosyVoice 音色)
     # 为不同 speaker 配置不同的 voice
     SPEAKER_VOICES = {
@@ -40,6 +97,76 @@ class Config:
         'B': os.environ.get('SPEAKER_B_VOICE') or 'loongandy_v2',
         'default': os.environ.get('SPEAKER_B_VOICE') or 'loongandy_v2'
     }
+    # 关键词发音的音色（所有课程共享词汇发音库，每个词汇与音色只合成一次）
+    VOCAB_VOICE = os.environ.get('VOCAB_VOICE') or SPEAKER_VOICES['A']
+
+    # LLM HTTP 连接池（keep-alive 复用连接，省去每次调用的 TCP + TLS 握手）
+    HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE') or 32)
+    HTTP_POOL_PER_HOST = int(os.environ.get('HTTP_POOL_PER_HOST') or 16)
+    # 空闲连接保持时间（秒）
+    HTTP_KEEPALIVE = float(os.environ.get('HTTP_KEEPALIVE') or 60)
+    # 单次 LLM 请求超时（秒）
+    LLM_TIMEOUT = int(os.environ.get('LLM_TIMEOUT') or 120)
+
+    # TTS 并发合成的最大线程数（对话批量合成时使用）
+    TTS_MAX_CONCURRENCY = int(os.environ.get('TTS_MAX_CONCURRENCY') or 4)
+
+    # 句子慢速音频可选的语速倍率（逗号分隔，0.5-2.0），首次请求时合成并缓存
+    AUDIO_VARIANT_RATES = tuple(
+        float(r) for r in (os.environ.get('AUDIO_VARIANT_RATES') or '0.75,0.5').split(',') if r.strip()
+    )
+
+    # 瞬时故障重试（LLM 与 TTS 共用）：指数退避 + 随机抖动
+    # 单次调用最多尝试次数（含首次）
+    RETRY_ATTEMPTS = int(os.environ.get('RETRY_ATTEMPTS') or 3)
+    # 首次重试的退避上限与最大退避时间（秒）
+    RETRY_BASE_DELAY = float(os.environ.get('RETRY_BASE_DELAY') or 0.5)
+    RETRY_MAX_DELAY = float(os.environ.get('RETRY_MAX_DELAY') or 8)
+    # 每节课（对话 + 全部语音）共享的重试次数与重试截止时间（秒），避免重试风暴拖慢生成
+    RETRY_BUDGET = int(os.environ.get('RETRY_BUDGET') or 10)
+    RETRY_DEADLINE = float(os.environ.get('RETRY_DEADLINE') or 90)
+
+    # 后台补齐合成失败的句子音频：工作线程数、每句最多尝试次数、首次等待秒数（之后每次翻倍）
+    AUDIO_REPAIR_WORKERS = int(os.environ.get('AUDIO_REPAIR_WORKERS') or 2)
+    AUDIO_REPAIR_ATTEMPTS = int(os.environ.get('AUDIO_REPAIR_ATTEMPTS') or 5)
+    AUDIO_REPAIR_DELAY = float(os.environ.get('AUDIO_REPAIR_DELAY') or 30)
+
+    # 批量生成配置（/api/batch）
+    # 所有批次共享的 LLM 工作线程数（TTS 工作线程数使用 TTS_MAX_CONCURRENCY）
+    BATCH_LLM_WORKERS = int(os.environ.get('BATCH_LLM_WORKERS') or 4)
+    # 单个批次最多包含的话题数
+    BATCH_MAX_TOPICS = int(os.environ.get('BATCH_MAX_TOPICS') or 1000)
+    # 已结束批次的状态保留秒数（之后 /api/batch/<id> 返回 404）
+    BATCH_RETENTION = float(os.environ.get('BATCH_RETENTION') or 3600)
+
+    # 热门话题预生成：空闲时为最热门的话题提前生成课程，请求时直接返回（0 表示关闭）
+    PREFETCH_TOP_TOPICS = int(os.environ.get('PREFETCH_TOP_TOPICS') or 10)
+    # 每个话题保留的预生成课程数、预生成课程的有效期（秒）
+    PREFETCH_PER_TOPIC = int(os.environ.get('PREFETCH_PER_TOPIC') or 1)
+    PREFETCH_MAX_AGE = float(os.environ.get('PREFETCH_MAX_AGE') or 86400)
+    # 热度半衰期（秒）与触发预生成的最低热度（约等于半衰期内的请求次数）
+    PREFETCH_HALF_LIFE = float(os.environ.get('PREFETCH_HALF_LIFE') or 21600)
+    PREFETCH_MIN_SCORE = float(os.environ.get('PREFETCH_MIN_SCORE') or 3)
+    # 空闲检查间隔（秒）与最多统计的话题数
+    PREFETCH_INTERVAL = float(os.environ.get('PREFETCH_INTERVAL') or 30)
+    PREFETCH_MAX_TRACKED = int(os.environ.get('PREFETCH_MAX_TRACKED') or 1000)
+
+    # 相似话题复用：新话题与已有课程的话题相似度（字符 n-gram 余弦，0-1）达到阈值时的处理方式
+    # reuse: 直接返回已有课程；suggest: 照常生成并提示已有的相似课程；off: 不匹配
+    TOPIC_REUSE_POLICY = (os.environ.get('TOPIC_REUSE_POLICY') or 'suggest').lower()
+    TOPIC_MATCH_THRESHOLD = float(os.environ.get('TOPIC_MATCH_THRESHOLD') or 0.8)
+
+    # 优雅停机配置
+    # 停机时等待运行中任务完成的最长时间（秒），超时后未完成任务会被保存并在重启后恢复
+    SHUTDOWN_TIMEOUT = float(os.environ.get('SHUTDOWN_TIMEOUT') or 30)
+    # 截止时间到达后等待任务在检查点退出的时间（秒）
+    SHUTDOWN_GRACE = float(os.environ.get('SHUTDOWN_GRACE') or 5)
+
+    # 学习页面渲染缓存（按学习记录缓存渲染后的页面数量）
+    LESSON_CACHE_SIZE = int(os.environ.get('LESSON_CACHE_SIZE') or 128)
+
+    # 响应压缩：超过该大小（字节）的 JSON/HTML 响应才压缩
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE') or 1024)
 
     # 文件路径
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -49,9 +176,27 @@ class Config:
     # 在 init_app 中会重新计算正确的 PROJECT_DIR
     PROJECT_DIR = os.path.dirname(BASE_DIR)
     
+    # 离线音标词典（由 build_phonetics.py 生成，随 backend 目录一起打包）
+    PHONETIC_DICT = os.environ.get('PHONETIC_DICT') or os.path.join(BASE_DIR, 'data', 'phonetics.bin')
+    
     AUDIO_DIR = os.path.join(PROJECT_DIR, 'static', 'audio')
     GENERATED_DIR = os.path.join(PROJECT_DIR, 'generated')
 
+    @staticmethod
+    def api_keys():
+        """所有配置的 API Key（DASHSCOPE_API_KEYS 与 DASHSCOPE_API_KEY 合并去重）"""
+        keys = [k.strip() for k in Config.DASHSCOPE_API_KEYS.split(',')] + [Config.DASHSCOPE_API_KEY]
+        return list(dict.fromkeys(k for k in keys if k))
+
+    @staticmethod
+    def reload_api_keys():
+        """重新读取 .env 中的 API Key（更换 Key 无需重启）"""
+        if os.path.exists(env_path):
+            load_dotenv(env_path, override=True)
+        Config.DASHSCOPE_API_KEY = os.environ.get('DASHSCOPE_API_KEY') or ''
+        Config.DASHSCOPE_API_KEYS = os.environ.get('DASHSCOPE_API_KEYS') or ''
+        return Config.api_keys()
+
     @staticmethod
     def init_app(app):
         """初始化应用配置"""
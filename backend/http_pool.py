@@ -0,0 +1,86 @@
+import asyncio
+import threading
+from backend.config import Config
+from backend.aio import add_shutdown_hook
+
+# LLM 调用共享的 HTTP 连接池（aiohttp 会话绑定事件循环，只在 backend.aio 的共享循环上使用）
+_session = None
+_stats = {'requests': 0, 'connections_created': 0, 'connections_reused': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def _trace_config():
+    """统计请求数、新建连接数与复用连接数"""
+    import aiohttp
+
+    async def on_request_start(session, ctx, params):
+        _count('requests')
+
+    async def on_connection_create_end(session, ctx, params):
+        _count('connections_created')
+
+    async def on_connection_reuseconn(session, ctx, params):
+        _count('connections_reused')
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_connection_create_end.append(on_connection_create_end)
+    trace.on_connection_reuseconn.append(on_connection_reuseconn)
+    return trace
+
+
+async def get_session():
+    """
+    获取共享的 HTTP 会话（首次调用时创建）
+
+    连接保持 keep-alive 并在请求之间复用，省去每次调用的 TCP + TLS 握手
+    """
+    global _session
+    if _session is None or _session.closed:
+        import aiohttp
+        from dashscope.api_entities.aio_session import get_ssl_context
+        connector = aiohttp.TCPConnector(
+            limit=Config.HTTP_POOL_SIZE,
+            limit_per_host=Config.HTTP_POOL_PER_HOST,
+            keepalive_timeout=Config.HTTP_KEEPALIVE,
+            ttl_dns_cache=300,
+            ssl=get_ssl_context()
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            trust_env=True,
+            trace_configs=[_trace_config()]
+        )
+        add_shutdown_hook(close_session)
+    return _session
+
+
+async def close_session():
+    """关闭共享会话（停机时调用）"""
+    global _session
+    session, _session = _session, None
+    if session is not None and not session.closed:
+        await session.close()
+        # 等待底层 SSL 连接关闭
+        await asyncio.sleep(0)
+
+
+def stats():
+    """
+    连接池统计
+
+    Returns:
+        dict: 请求数、新建/复用连接数及连接复用率
+    """
+    with _stats_lock:
+        result = dict(_stats)
+    acquired = result['connections_created'] + result['connections_reused']
+    result['reuse_rate'] = round(result['connections_reused'] / acquired, 3) if acquired else 0.0
+    result['pool_size'] = Config.HTTP_POOL_SIZE
+    result['pool_per_host'] = Config.HTTP_POOL_PER_HOST
+    return result
@@ -0,0 +1,134 @@
+import re
+import json
+
+# 模型常把 JSON 包在 ```json ... ``` 代码块中（截断时可能缺少结尾的 ```）
+FENCE_RE = re.compile(r'```(?:json|JSON)?\s*(.*?)(?:```|$)', re.S)
+
+# 截断修复时最多尝试的截断位置数
+MAX_CUT_ATTEMPTS = 64
+
+
+class RepairResult:
+    """解析结果：data 为解析出的对象，repaired/truncated 标记是否经过修复"""
+
+    __slots__ = ('data', 'repaired', 'truncated')
+
+    def __init__(self, data, repaired=False, truncated=False):
+        self.data = data
+        self.repaired = repaired
+        self.truncated = truncated
+
+
+def strip_fences(text):
+    """去掉 Markdown 代码块标记"""
+    match = FENCE_RE.search(text)
+    return match.group(1) if match else text
+
+
+def remove_trailing_commas(text):
+    """删除 } 或 ] 前多余的逗号（忽略字符串内部）"""
+    out = []
+    in_string = escaped = False
+    length = len(text)
+    for i, ch in enumerate(text):
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch == ',':
+            j = i + 1
+            while j < length and text[j] in ' \t\r\n':
+                j += 1
+            if j == length or text[j] in '}]':
+                continue
+        out.append(ch)
+    return ''.join(out)
+
+
+def _cut_points(text):
+    """
+    扫描 JSON 文本，返回可安全截断的位置及该处尚未闭合的括号
+
+    安全位置为一个完整的对象/数组刚结束处，在此截断并补齐括号后
+    得到的是去掉末尾残缺元素的合法 JSON
+    """
+    points = []
+    stack = []
+    in_string = escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+        elif ch in '}]':
+            if not stack:
+                break
+            stack.pop()
+            if not stack:
+                break
+            points.append((i + 1, ''.join(reversed(stack))))
+    return points
+
+
+def _loads(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def parse_json(text):
+    """
+    宽松解析模型输出的 JSON
+
+    依次尝试：直接解析 → 去掉代码块与首尾多余文字 → 删除多余逗号 →
+    截断修复（丢弃末尾残缺的元素并补齐括号）
+
+    Args:
+        text: 模型返回的文本
+
+    Returns:
+        RepairResult
+
+    Raises:
+        ValueError: 无法修复时
+    """
+    data = _loads(text)
+    if data is not None:
+        return RepairResult(data)
+
+    body = strip_fences(text)
+    start = body.find('{')
+    if start == -1:
+        raise ValueError('No JSON object found')
+    body = body[start:]
+
+    end = body.rfind('}')
+    if end != -1:
+        for candidate in (body[:end + 1], remove_trailing_commas(body[:end + 1])):
+            data = _loads(candidate)
+            if data is not None:
+                return RepairResult(data, repaired=True)
+
+    # 输出被截断（如达到 max_tokens）：从最后一个完整元素处截断并补齐括号
+    for cut, closers in reversed(_cut_points(body)[-MAX_CUT_ATTEMPTS:]):
+        data = _loads(remove_trailing_commas(body[:cut].rstrip().rstrip(',') + closers))
+        if data is not None:
+            return RepairResult(data, repaired=True, truncated=True)
+
+    raise ValueError('Unable to repair JSON output')
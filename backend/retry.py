@@ -0,0 +1,123 @@
+import time
+import random
+import threading
+import contextvars
+from backend.config import Config
+
+# 可重试的 HTTP 状态码（超时、限流、服务端错误）
+RETRYABLE_STATUS = (408, 429, 500, 502, 503, 504)
+
+# 重试也不会成功的错误（Key 无效、参数错误、内容审核、欠费、未配置 Key）
+FATAL_MARKERS = ('InvalidApiKey', 'AccessDenied', 'InvalidParameter', 'DataInspectionFailed',
+                 'Arrearage', 'ModelNotFound', '未配置')
+
+# 当前协程链路使用的重试预算（一节课的 LLM 调用共享）
+_budget = contextvars.ContextVar('retry_budget', default=None)
+
+
+def is_retryable(status_code=None, message=''):
+    """
+    判断失败是否值得重试
+
+    明确的致命错误和 4xx（408/429 除外）不重试；
+    5xx、限流、超时以及网络异常等瞬时故障重试
+    """
+    text = str(message or '')
+    if any(marker in text for marker in FATAL_MARKERS):
+        return False
+    if status_code is None or status_code in RETRYABLE_STATUS:
+        return True
+    return not 400 <= status_code < 500
+
+
+class RetryBudget:
+    """
+    一节课的重试预算：最多重试次数与截止时间
+
+    同一节课的对话生成与所有语音合成共享预算，大面积故障时不会
+    每个请求都重试满次数，超过截止时间后不再发起重试
+    """
+
+    def __init__(self, retries=None, deadline=None):
+        self.retries = Config.RETRY_BUDGET if retries is None else retries
+        self.deadline_at = time.monotonic() + (Config.RETRY_DEADLINE if deadline is None else deadline)
+        self._lock = threading.Lock()
+
+    def take(self, delay):
+        """占用一次重试（等待 delay 秒后仍在截止时间内才可用）"""
+        with self._lock:
+            if self.retries <= 0 or time.monotonic() + delay >= self.deadline_at:
+                return False
+            self.retries -= 1
+            return True
+
+
+def use_budget(budget):
+    """设置当前协程链路的重试预算（asyncio.gather 创建的子任务继承）"""
+    _budget.set(budget)
+
+
+def current_budget():
+    return _budget.get()
+
+
+class RetryPolicy:
+    """重试策略 - 指数退避 + 随机抖动，统计重试次数"""
+
+    def __init__(self, attempts=None, base_delay=None, max_delay=None):
+        """
+        Args:
+            attempts: 单次调用的最多尝试次数（含首次，默认 Config.RETRY_ATTEMPTS）
+            base_delay: 首次重试的退避上限（秒，默认 Config.RETRY_BASE_DELAY）
+            max_delay: 退避上限（秒，默认 Config.RETRY_MAX_DELAY）
+        """
+        self.attempts = attempts or Config.RETRY_ATTEMPTS
+        self.base_delay = Config.RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = Config.RETRY_MAX_DELAY if max_delay is None else max_delay
+        self._lock = threading.Lock()
+        self._counts = {'retries': 0, 'recovered': 0, 'fatal': 0, 'exhausted': 0, 'budget_exhausted': 0}
+
+    def backoff(self, attempt):
+        """第 attempt 次重试前的等待时间（full jitter：0 到指数上限之间均匀随机）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def next_delay(self, attempt, status_code=None, message='', budget=None):
+        """
+        第 attempt 次尝试失败后决定是否重试
+
+        Args:
+            attempt: 已失败的尝试序号（从 0 开始）
+            status_code: HTTP 状态码（异常时为 None）
+            message: 错误信息
+            budget: 重试预算（默认使用当前协程链路的预算，没有时只受尝试次数限制）
+
+        Returns:
+            float: 重试前等待的秒数；不重试时返回 None
+        """
+        if not is_retryable(status_code, message):
+            self._count('fatal')
+            return None
+        if attempt + 1 >= self.attempts:
+            self._count('exhausted')
+            return None
+        delay = self.backoff(attempt)
+        budget = budget or current_budget()
+        if budget is not None and not budget.take(delay):
+            self._count('budget_exhausted')
+            return None
+        self._count('retries')
+        return delay
+
+    def succeeded(self, attempt):
+        """记录成功（attempt > 0 表示经重试后成功）"""
+        if attempt:
+            self._count('recovered')
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self):
+        """重试次数、重试后成功次数，以及不再重试的原因分布"""
+        with self._lock:
+            return dict(self._counts)
@@ -0,0 +1,251 @@
+import os
+import json
+import time
+import heapq
+import itertools
+import threading
+from backend.config import Config
+from backend.utils import atomic_write
+
+
+class AudioRepairQueue:
+    """
+    失败句子的后台补合成
+
+    学习记录先保存（缺少音频的句子标记为待补齐），后台按退避间隔重新合成，
+    每成功一句就更新一次学习记录，页面随记录更新重新渲染
+    """
+
+    def __init__(self, synthesize, patch, workers=None, attempts=None, delay=None, state_file=None):
+        """
+        Args:
+            synthesize: 合成语音，调用方式为 synthesize(text, voice) -> dict
+            patch: 更新学习记录，调用方式为 patch(name, index, text, audio_url) -> 剩余待补齐句数，
+                   记录已删除时返回 None；audio_url 为 None 表示放弃该句
+            workers: 工作线程数 (默认: Config.AUDIO_REPAIR_WORKERS)
+            attempts: 每句最多补合成次数 (默认: Config.AUDIO_REPAIR_ATTEMPTS)
+            delay: 首次补合成前的等待秒数，之后每次翻倍 (默认: Config.AUDIO_REPAIR_DELAY)
+            state_file: 未完成任务的持久化文件
+        """
+        self._synthesize = synthesize
+        self._patch = patch
+        self._workers = workers or Config.AUDIO_REPAIR_WORKERS
+        self.attempts = attempts or Config.AUDIO_REPAIR_ATTEMPTS
+        self.delay = Config.AUDIO_REPAIR_DELAY if delay is None else delay
+        self._state_file = state_file
+
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._queue = []  # (到期时间, seq, job)
+        self._pending = {}  # name -> {(index, text)}
+        self._threads = []
+        self._stopping = False
+        self._stats = {'repaired': 0, 'failed_attempts': 0, 'abandoned': 0}
+
+    @property
+    def state_file(self):
+        """未完成任务的持久化文件（默认位于项目根目录）"""
+        return self._state_file or os.path.join(Config.PROJECT_DIR, 'pending_audio_repairs.json')
+
+    def submit(self, name, lines):
+        """
+        登记学习记录中需要补合成的句子
+
+        Args:
+            name: 学习记录名称
+            lines: 每项包含 index、text、voice（恢复任务时还包含已尝试次数 attempt）
+
+        Returns:
+            int: 新登记的句数（已在队列中的句子不会重复登记）
+        """
+        added = 0
+        with self._cond:
+            if self._stopping:
+                return 0
+            queued = self._pending.setdefault(name, set())
+            for line in lines:
+                if (line['index'], line['text']) in queued:
+                    continue
+                queued.add((line['index'], line['text']))
+                job = {'name': name, 'index': line['index'], 'text': line['text'],
+                       'voice': line['voice'], 'attempt': line.get('attempt', 0)}
+                heapq.heappush(self._queue, (self._due(job['attempt']), next(self._seq), job))
+                added += 1
+            if not queued:
+                del self._pending[name]
+            self._ensure_workers()
+            self._cond.notify_all()
+        if added:
+            print(f"🩹 {name}: {added} 句音频将在后台补齐")
+        return added
+
+    def pending(self, name):
+        """学习记录中仍在等待补合成的句数"""
+        with self._cond:
+            return len(self._pending.get(name, ()))
+
+    def cancel(self, name):
+        """
+        取消学习记录尚未开始的补合成（如记录被编辑后重新登记）
+
+        正在合成的句子完成后只在文本未变时才会更新记录
+        """
+        with self._cond:
+            self._pending.pop(name, None)
+            self._queue = [entry for entry in self._queue if entry[2]['name'] != name]
+            heapq.heapify(self._queue)
+
+    def _due(self, attempt):
+        return time.monotonic() + self.delay * 2 ** attempt
+
+    def _ensure_workers(self):
+        self._threads = [t for t in self._threads if t.is_alive()]
+        for _ in range(self._workers - len(self._threads)):
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_job(self):
+        """取出下一个到期的任务，停机时返回 None"""
+        with self._cond:
+            while not self._stopping:
+                if self._queue:
+                    wait = self._queue[0][0] - time.monotonic()
+                    if wait <= 0:
+                        return heapq.heappop(self._queue)[2]
+                else:
+                    wait = None
+                self._cond.wait(wait)
+            return None
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                result = self._synthesize(job['text'], job['voice'])
+            except Exception as e:
+                result = {'success': False, 'error': str(e)}
+
+            if result.get('success'):
+                self._finish(job, result['url'])
+                continue
+
+            job['attempt'] += 1
+            with self._cond:
+                self._stats['failed_attempts'] += 1
+                if job['attempt'] < self.attempts and not self._stopping:
+                    heapq.heappush(self._queue, (self._due(job['attempt']), next(self._seq), job))
+                    self._cond.notify_all()
+                    continue
+            print(f"⚠️ {job['name']} 第 {job['index'] + 1} 句音频补合成失败，已放弃: {result.get('error')}")
+            self._finish(job, None)
+
+    def _finish(self, job, audio_url):
+        """更新学习记录并移出待补齐列表；记录已删除时丢弃该记录的其余任务"""
+        try:
+            remaining = self._patch(job['name'], job['index'], job['text'], audio_url)
+        except Exception as e:
+            print(f"❌ 更新学习记录 {job['name']} 失败: {e}")
+            remaining = 0
+        with self._cond:
+            self._stats['repaired' if audio_url else 'abandoned'] += 1
+            queued = self._pending.get(job['name'])
+            if queued is not None:
+                queued.discard((job['index'], job['text']))
+                if remaining is None:
+                    queued.clear()
+                if not queued:
+                    del self._pending[job['name']]
+            if remaining is None:
+                self._queue = [entry for entry in self._queue if entry[2]['name'] != job['name']]
+                heapq.heapify(self._queue)
+        if audio_url and remaining == 0:
+            print(f"✅ {job['name']} 的音频已全部补齐")
+
+    def stats(self):
+        """待补合成句数、学习记录数与补合成结果统计"""
+        with self._cond:
+            return dict(self._stats, queued=len(self._queue), lessons=len(self._pending))
+
+    def shutdown(self):
+        """
+        停止补合成，未完成的任务持久化以便重启后继续
+
+        Returns:
+            int: 持久化的句数
+        """
+        with self._cond:
+            if self._stopping:
+                return 0
+            self._stopping = True
+            jobs = [entry[2] for entry in sorted(self._queue)]
+            self._queue = []
+            self._cond.notify_all()
+        if not jobs:
+            return 0
+        try:
+            atomic_write(self.state_file, json.dumps(jobs, ensure_ascii=False, indent=2))
+        except OSError as e:
+            print(f"❌ 保存待补合成音频失败: {e}")
+            return 0
+        print(f"💾 {len(jobs)} 句音频未补齐，将在下次启动时继续")
+        return len(jobs)
+
+    def load_pending(self):
+        """读取上次停机时保存的任务，按学习记录分组（恢复后再调用 clear_pending）"""
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                jobs = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 读取待补合成音频失败: {e}")
+            return {}
+        lessons = {}
+        for job in jobs:
+            job = dict(job)
+            lessons.setdefault(job.pop('name'), []).append(job)
+        return lessons
+
+    def clear_pending(self):
+        """删除已恢复的任务记录"""
+        if os.path.exists(self.state_file):
+            os.remove(self.state_file)
+
+    def resume(self, records, voice_for):
+        """
+        按学习记录中的 pending_audio 重建补合成队列（启动时调用）
+
+        待补齐的句子以学习记录为准：停机时正在合成的句子、进程被强制结束时的任务同样会恢复；
+        停机时保存的任务只用于沿用已尝试次数
+
+        Args:
+            records: 含 pending_audio 的学习记录
+            voice_for: 说话人 -> 音色
+
+        Returns:
+            int: 登记的句数
+        """
+        attempts = {
+            (name, job['index'], job['text']): job.get('attempt', 0)
+            for name, jobs in self.load_pending().items() for job in jobs
+        }
+        resumed = 0
+        for record in records:
+            dialogue = record.get('dialogue') or []
+            lines = [
+                {
+                    'index': i,
+                    'text': dialogue[i].get('english'),
+                    'voice': voice_for(dialogue[i].get('speaker')),
+                    'attempt': attempts.get((record['name'], i, dialogue[i].get('english')), 0)
+                }
+                for i in record.get('pending_audio') or []
+                if 0 <= i < len(dialogue) and dialogue[i].get('english')
+            ]
+            if lines:
+                resumed += self.submit(record['name'], lines)
+        self.clear_pending()
+        return resumed
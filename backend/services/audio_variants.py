@@ -0,0 +1,86 @@
+import os
+import asyncio
+import threading
+from backend.config import Config
+from backend.aio import run_sync
+
+
+class AudioVariants:
+    """
+    句子的变体音频（慢速、其他音频格式）- 首次请求时才合成
+
+    变体音频与原音频保存在同一目录，按（模型 + 音色 + 文本 + 语速 + 格式）内容寻址，
+    合成后直接复用；同时请求同一个变体的用户等待同一次合成
+    """
+
+    def __init__(self, get_tts, rates=None, prefix='dialogue'):
+        """
+        Args:
+            get_tts: 获取 TTS 服务，调用方式为 get_tts() -> TTSService（服务未就绪时为 None）
+            rates: 可选的语速倍率 (默认: Config.AUDIO_VARIANT_RATES)
+            prefix: 音频文件名前缀（与原音频相同）
+        """
+        self._get_tts = get_tts
+        self.rates = tuple(rates or Config.AUDIO_VARIANT_RATES)
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._inflight = {}  # 文件名 -> asyncio.Task（只在事件循环线程中访问）
+        self._stats = {'hits': 0, 'synthesized': 0, 'joined': 0, 'failed': 0}
+
+    def get(self, text, voice, rate, budget=None, profile=None):
+        """获取变体音频（同步包装，见 aget）"""
+        return run_sync(self.aget(text, voice, rate, budget, profile))
+
+    async def aget(self, text, voice, rate, budget=None, profile=None):
+        """
+        获取变体音频（已合成过时直接返回，同一变体的并发请求只合成一次）
+
+        Args:
+            text: 句子英文
+            voice: 音色
+            rate: 语速倍率（1 或 rates 之一）
+            budget: 重试预算（可选）
+            profile: 音频配置名称（默认: TTS 服务的默认格式）
+
+        Returns:
+            dict: 同 TTSService.asynthesize_cached
+        """
+        if rate != 1 and rate not in self.rates:
+            return {'success': False, 'error': f'Unsupported rate: {rate}'}
+        tts = self._get_tts()
+        if tts is None:
+            return {'success': False, 'error': 'TTS service not initialized'}
+        options = {'speech_rate': rate} if rate != 1 else {}
+        if profile is not None:
+            options['profile'] = profile
+        try:
+            filename = tts.audio_filename(text, voice, prefix=self.prefix, **options)
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
+        task = self._inflight.get(filename)
+        if task is not None:
+            with self._lock:
+                self._stats['joined'] += 1
+            return await asyncio.shield(task)
+        if os.path.exists(os.path.join(tts.audio_dir, filename)):
+            with self._lock:
+                self._stats['hits'] += 1
+            return await tts.asynthesize_cached(text, voice, self.prefix, budget, **options)
+
+        task = asyncio.ensure_future(tts.asynthesize_cached(text, voice, self.prefix, budget, **options))
+        self._inflight[filename] = task
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._inflight.pop(filename, None)
+            else:
+                task.add_done_callback(lambda _: self._inflight.pop(filename, None))
+        with self._lock:
+            self._stats['synthesized' if result.get('success') else 'failed'] += 1
+        return result
+
+    def stats(self):
+        """复用/合成统计"""
+        with self._lock:
+            return dict(self._stats, rates=list(self.rates))
@@ -0,0 +1,371 @@
+import os
+import json
+import time
+import uuid
+import heapq
+import itertools
+import threading
+from datetime import datetime
+from backend.config import Config
+from backend.utils import atomic_write
+
+
+class BatchScheduler:
+    """
+    批量生成调度 - 所有批次共享 LLM / TTS 工作线程
+
+    话题按优先级排队生成对话；对话生成后逐句进入 TTS 队列，
+    整个调度器范围内相同的句子（文本 + 音色）只合成一次
+    """
+
+    def __init__(self, generate, synthesize, save, llm_workers=None, tts_workers=None, state_file=None,
+                 retention=None):
+        """
+        Args:
+            generate: 生成对话，调用方式为 generate(topic, num_exchanges) -> dict
+            synthesize: 合成语音，调用方式为 synthesize(text, voice) -> dict
+            save: 保存学习记录，调用方式为 save(topic, dialogue, keywords, **meta) -> 文件名
+            llm_workers: LLM 工作线程数 (默认: Config.BATCH_LLM_WORKERS)
+            tts_workers: TTS 工作线程数 (默认: Config.TTS_MAX_CONCURRENCY)
+            state_file: 未完成话题的持久化文件
+            retention: 已结束批次的状态保留秒数 (默认: Config.BATCH_RETENTION)
+        """
+        self._generate = generate
+        self._synthesize = synthesize
+        self._save = save
+        self._llm_workers = llm_workers or Config.BATCH_LLM_WORKERS
+        self._tts_workers = tts_workers or Config.TTS_MAX_CONCURRENCY
+        self._state_file = state_file
+        self._retention = Config.BATCH_RETENTION if retention is None else retention
+
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._llm_queue = []  # (-priority, seq, lesson)
+        self._tts_queue = []  # (-priority, seq, line_index, key)
+        self._inflight = {}  # (text, voice) -> [(lesson, line_index)]
+        self._batches = {}  # batch_id -> 批次（结束超过 retention 秒后移除）
+        self._threads = []
+        self._busy = 0
+        self._accepting = True
+        self._stopping = False
+        self._shutdown_done = False
+        self._stats = {'lines_synthesized': 0, 'lines_deduplicated': 0}
+
+    @property
+    def state_file(self):
+        """未完成话题的持久化文件（默认位于项目根目录）"""
+        return self._state_file or os.path.join(Config.PROJECT_DIR, 'pending_batches.json')
+
+    @property
+    def accepting(self):
+        return self._accepting
+
+    def submit(self, topics, num_exchanges=5, priority=0, batch_id=None):
+        """
+        提交一批话题
+
+        Args:
+            topics: 话题列表，每项为字符串或 {'topic', 'num_exchanges', 'priority'}
+            num_exchanges: 默认对话轮数
+            priority: 默认优先级（数值越大越先处理）
+            batch_id: 批次ID（恢复任务时沿用原ID）
+
+        Returns:
+            str: 批次ID，停机中返回 None
+        """
+        lessons = []
+        for item in topics:
+            if isinstance(item, str):
+                item = {'topic': item}
+            topic = (item.get('topic') or '').strip()
+            if not topic:
+                continue
+            lessons.append({
+                'topic': topic,
+                'num_exchanges': int(item.get('num_exchanges') or num_exchanges),
+                'priority': int(item.get('priority', priority)),
+                'status': 'queued',
+            })
+        if not lessons:
+            raise ValueError('No valid topics')
+
+        with self._cond:
+            if not self._accepting:
+                return None
+            self._expire_batches()
+            batch_id = batch_id or str(uuid.uuid4())
+            batch = {
+                'batch_id': batch_id,
+                'lessons': lessons,
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'started': time.monotonic(),
+                'finished': None,
+                'lines_total': 0,
+                'lines_done': 0,
+                'lines_deduplicated': 0,
+            }
+            self._batches[batch_id] = batch
+            for lesson in lessons:
+                lesson['batch'] = batch
+                lesson['seq'] = next(self._seq)
+                heapq.heappush(self._llm_queue, (-lesson['priority'], lesson['seq'], lesson))
+            self._start_workers()
+            self._cond.notify_all()
+        return batch_id
+
+    def _expire_batches(self):
+        """移除结束已超过保留时间的批次（调用方持有 self._cond）"""
+        cutoff = time.monotonic() - self._retention
+        expired = [batch_id for batch_id, batch in self._batches.items()
+                   if batch['finished'] is not None and batch['finished'] <= cutoff]
+        for batch_id in expired:
+            del self._batches[batch_id]
+
+    def _start_workers(self):
+        if self._threads:
+            return
+        for i in range(self._llm_workers):
+            self._threads.append(threading.Thread(target=self._llm_loop, name=f'batch-llm-{i}', daemon=True))
+        for i in range(self._tts_workers):
+            self._threads.append(threading.Thread(target=self._tts_loop, name=f'batch-tts-{i}', daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def _next_job(self, queue):
+        """取出队列中优先级最高的任务，停机时返回 None"""
+        with self._cond:
+            while not queue and not self._stopping:
+                self._cond.wait()
+            if self._stopping:
+                return None
+            self._busy += 1
+            return heapq.heappop(queue)[-1]
+
+    def _job_done(self):
+        with self._cond:
+            self._busy -= 1
+            self._cond.notify_all()
+
+    def _llm_loop(self):
+        while True:
+            lesson = self._next_job(self._llm_queue)
+            if lesson is None:
+                return
+            try:
+                self._run_llm(lesson)
+            finally:
+                self._job_done()
+
+    def _run_llm(self, lesson):
+        lesson['status'] = 'generating'
+        started_at = time.perf_counter()
+        try:
+            result = self._generate(lesson['topic'], lesson['num_exchanges'])
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        lesson['llm_ms'] = round((time.perf_counter() - started_at) * 1000)
+        if not result.get('success'):
+            self._finish(lesson, error=result.get('error') or 'Dialogue generation failed')
+            return
+
+        dialogue = result.get('dialogue', [])
+        lesson['dialogue'] = dialogue
+        lesson['keywords'] = result.get('keywords', [])
+        lesson['audio'] = [None] * len(dialogue)
+        lesson['tts_started'] = time.perf_counter()
+        if not dialogue:
+            self._finish(lesson)
+            return
+
+        with self._cond:
+            lesson['status'] = 'synthesizing'
+            lesson['remaining'] = len(dialogue)
+            batch = lesson['batch']
+            batch['lines_total'] += len(dialogue)
+            for i, item in enumerate(dialogue):
+                voice = Config.SPEAKER_VOICES.get(item.get('speaker', 'A'), Config.SPEAKER_VOICES['default'])
+                key = (item.get('english', ''), voice)
+                waiters = self._inflight.get(key)
+                if waiters is not None:
+                    # 其他话题已在合成相同句子，等待其结果即可
+                    waiters.append((lesson, i))
+                    batch['lines_deduplicated'] += 1
+                    self._stats['lines_deduplicated'] += 1
+                    continue
+                self._inflight[key] = [(lesson, i)]
+                heapq.heappush(self._tts_queue, (-lesson['priority'], lesson['seq'], i, key))
+            self._cond.notify_all()
+
+    def _tts_loop(self):
+        while True:
+            key = self._next_job(self._tts_queue)
+            if key is None:
+                return
+            try:
+                self._run_tts(key)
+            finally:
+                self._job_done()
+
+    def _run_tts(self, key):
+        text, voice = key
+        try:
+            result = self._synthesize(text, voice)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+
+        finished = []
+        with self._cond:
+            waiters = self._inflight.pop(key, [])
+            self._stats['lines_synthesized'] += 1
+            for lesson, i in waiters:
+                lesson['audio'][i] = result
+                lesson['remaining'] -= 1
+                lesson['batch']['lines_done'] += 1
+                if lesson['remaining'] == 0:
+                    finished.append(lesson)
+        for lesson in finished:
+            self._finish(lesson)
+
+    def _finish(self, lesson, error=None):
+        """合并语音结果并保存学习记录"""
+        if error is None:
+            try:
+                dialogue = lesson['dialogue']
+                for item, result in zip(dialogue, lesson['audio']):
+                    if result and result.get('success'):
+                        item['audio_url'] = result.get('url')
+                    item.pop('phonetic', None)
+                tts_ms = round((time.perf_counter() - lesson['tts_started']) * 1000)
+                lesson['filename'] = self._save(
+                    lesson['topic'], dialogue, lesson['keywords'],
+                    num_exchanges=lesson['num_exchanges'],
+                    timings={'llm_ms': lesson['llm_ms'], 'tts_ms': tts_ms,
+                             'total_ms': lesson['llm_ms'] + tts_ms}
+                )
+            except Exception as e:
+                error = str(e)
+
+        with self._cond:
+            lesson['status'] = 'failed' if error else 'completed'
+            lesson['error'] = error
+            for key in ('dialogue', 'keywords', 'audio'):
+                lesson.pop(key, None)
+            batch = lesson['batch']
+            if all(item['status'] in ('completed', 'failed') for item in batch['lessons']):
+                batch['finished'] = time.monotonic()
+            self._cond.notify_all()
+
+    def status(self, batch_id):
+        """
+        批次进度与吞吐量
+
+        Returns:
+            dict: 批次状态，批次不存在时返回 None
+        """
+        with self._cond:
+            self._expire_batches()
+            batch = self._batches.get(batch_id)
+            if batch is None:
+                return None
+            counts = {}
+            for lesson in batch['lessons']:
+                counts[lesson['status']] = counts.get(lesson['status'], 0) + 1
+            total = len(batch['lessons'])
+            done = counts.get('completed', 0) + counts.get('failed', 0)
+            elapsed = (batch['finished'] or time.monotonic()) - batch['started']
+            return {
+                'batch_id': batch_id,
+                'status': 'completed' if batch['finished'] else 'running',
+                'created_at': batch['created_at'],
+                'total': total,
+                'counts': counts,
+                'progress': int(done / total * 100),
+                'lines_total': batch['lines_total'],
+                'lines_done': batch['lines_done'],
+                'lines_deduplicated': batch['lines_deduplicated'],
+                'elapsed_s': round(elapsed, 1),
+                'lessons_per_minute': round(counts.get('completed', 0) / elapsed * 60, 2) if elapsed else 0,
+                'lines_per_second': round(batch['lines_done'] / elapsed, 2) if elapsed else 0,
+                'lessons': [
+                    {key: lesson.get(key) for key in ('topic', 'priority', 'status', 'filename', 'error')}
+                    for lesson in batch['lessons']
+                ],
+            }
+
+    def stats(self):
+        """调度器整体状态（队列长度、去重统计）"""
+        with self._cond:
+            self._expire_batches()
+            return dict(
+                self._stats,
+                llm_queued=len(self._llm_queue),
+                tts_queued=len(self._tts_queue),
+                busy_workers=self._busy,
+                batches=len(self._batches),
+            )
+
+    def shutdown(self, timeout=None):
+        """
+        停止接收新批次，在截止时间内等待队列清空；
+        未完成的话题持久化以便重启后恢复
+
+        Returns:
+            int: 持久化的话题数量
+        """
+        with self._cond:
+            if self._shutdown_done:
+                return 0
+            self._shutdown_done = True
+            self._accepting = False
+            if timeout is None:
+                timeout = Config.SHUTDOWN_TIMEOUT
+            deadline = time.monotonic() + timeout
+            while (self._llm_queue or self._tts_queue or self._busy) and time.monotonic() < deadline:
+                self._cond.wait(deadline - time.monotonic())
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(Config.SHUTDOWN_GRACE)
+
+        with self._cond:
+            pending = [
+                {
+                    'batch_id': batch_id,
+                    'topic': lesson['topic'],
+                    'num_exchanges': lesson['num_exchanges'],
+                    'priority': lesson['priority'],
+                }
+                for batch_id, batch in self._batches.items()
+                for lesson in batch['lessons']
+                if lesson['status'] not in ('completed', 'failed')
+            ]
+        if pending:
+            # 保留尚未恢复的上次记录（如启动时服务未就绪）
+            known = {(item['batch_id'], item['topic']) for item in pending}
+            kept = [item for item in self._read_state() if (item['batch_id'], item['topic']) not in known]
+            atomic_write(self.state_file, json.dumps(kept + pending, ensure_ascii=False, indent=2))
+            print(f"💾 {len(pending)} 个批量话题未完成，将在下次启动时恢复")
+        return len(pending)
+
+    def _read_state(self):
+        if not os.path.exists(self.state_file):
+            return []
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 读取未完成批次失败: {e}")
+            return []
+
+    def load_pending(self):
+        """读取上次停机时保存的未完成话题，按批次分组（重新提交后再调用 clear_pending）"""
+        batches = {}
+        for item in self._read_state():
+            item = dict(item)
+            batches.setdefault(item.pop('batch_id'), []).append(item)
+        return batches
+
+    def clear_pending(self):
+        """删除已恢复的未完成话题记录"""
+        if os.path.exists(self.state_file):
+            os.remove(self.state_file)
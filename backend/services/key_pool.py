@@ -0,0 +1,164 @@
+import re
+import time
+import threading
+from collections import deque
+from backend.config import Config
+
+# 统计请求速率的时间窗口（秒）
+RATE_WINDOW = 60
+
+# 鉴权失败 / 限流的 HTTP 状态码与 DashScope 错误码（错误码须完整匹配，如 Throttling.RateQuota）
+AUTH_STATUS = (401, 403)
+THROTTLE_STATUS = (429,)
+AUTH_CODE_RE = re.compile(r'(?<![\w.])(?:InvalidApiKey|AccessDenied)(?:\.\w+)*(?!\w)')
+THROTTLE_CODE_RE = re.compile(r'(?<![\w.])Throttling(?:\.\w+)*(?!\w)')
+
+
+class NoApiKeyError(RuntimeError):
+    """未配置任何 API Key"""
+
+
+def classify_error(status_code=None, message=''):
+    """
+    判断调用失败是否与 API Key 有关
+
+    先按 HTTP 状态码判断，再在错误信息中查找完整的 DashScope 错误码；
+    错误信息中的数字（请求 ID、字节数等）不参与判断，避免误隔离正常的 Key
+
+    Returns:
+        str: 'auth'（鉴权失败）、'throttle'（限流）或 None
+    """
+    if status_code in AUTH_STATUS:
+        return 'auth'
+    if status_code in THROTTLE_STATUS:
+        return 'throttle'
+    message = message or ''
+    if AUTH_CODE_RE.search(message):
+        return 'auth'
+    if THROTTLE_CODE_RE.search(message):
+        return 'throttle'
+    return None
+
+
+def mask_key(key):
+    """日志与指标中显示的 Key（只保留首尾）"""
+    return f'{key[:6]}…{key[-4:]}' if len(key) > 12 else '***'
+
+
+class ApiKeyPool:
+    """API Key 池 - 按负载选择 Key，鉴权失败或限流时自动隔离"""
+
+    def __init__(self, keys=()):
+        self._lock = threading.Lock()
+        self._states = {}  # key -> 状态
+        self.set_keys(keys)
+
+    @classmethod
+    def from_config(cls):
+        return cls(Config.api_keys())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._states)
+
+    @property
+    def primary(self):
+        """第一个 Key（兼容只使用单个 Key 的代码）"""
+        with self._lock:
+            return next(iter(self._states), None)
+
+    def set_keys(self, keys):
+        """更新 Key 列表（保留已有 Key 的统计与隔离状态，无需重启）"""
+        with self._lock:
+            states = {}
+            for key in keys:
+                if key and key not in states:
+                    states[key] = self._states.get(key) or {
+                        'in_flight': 0,
+                        'recent': deque(),
+                        'last_used': 0.0,
+                        'total': 0,
+                        'auth_errors': 0,
+                        'throttled': 0,
+                        'strikes': 0,
+                        'quarantined_until': 0.0,
+                    }
+            self._states = states
+
+    def acquire(self):
+        """
+        选择一个 Key 用于本次请求（调用结束后必须 release）
+
+        优先选择未被隔离、进行中请求最少、最近一分钟请求最少的 Key；
+        全部被隔离时选择最早解除隔离的 Key
+
+        Raises:
+            NoApiKeyError: 未配置 Key
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not self._states:
+                raise NoApiKeyError('未配置 DASHSCOPE_API_KEY')
+            for state in self._states.values():
+                self._trim(state, now)
+            available = [(key, s) for key, s in self._states.items() if s['quarantined_until'] <= now]
+            if available:
+                key, state = min(available, key=lambda item: (
+                    item[1]['in_flight'], len(item[1]['recent']), item[1]['last_used']))
+            else:
+                key, state = min(self._states.items(), key=lambda item: item[1]['quarantined_until'])
+            state['in_flight'] += 1
+            state['recent'].append(now)
+            state['last_used'] = now
+            state['total'] += 1
+            return key
+
+    def release(self, key, error=None):
+        """
+        归还 Key 并记录结果
+
+        Args:
+            key: acquire 返回的 Key
+            error: classify_error 的结果；'auth' 长时间隔离，'throttle' 按连续次数指数延长隔离
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                return
+            state['in_flight'] = max(0, state['in_flight'] - 1)
+            if error == 'auth':
+                state['auth_errors'] += 1
+                state['quarantined_until'] = now + Config.KEY_QUARANTINE_AUTH
+                print(f"🔒 API Key {mask_key(key)} 鉴权失败，已隔离 {Config.KEY_QUARANTINE_AUTH:g} 秒")
+            elif error == 'throttle':
+                state['throttled'] += 1
+                state['strikes'] += 1
+                seconds = min(Config.KEY_QUARANTINE_THROTTLE * 2 ** (state['strikes'] - 1), Config.KEY_QUARANTINE_MAX)
+                state['quarantined_until'] = now + seconds
+                print(f"🚦 API Key {mask_key(key)} 被限流，暂停使用 {seconds:g} 秒")
+            else:
+                state['strikes'] = 0
+
+    def _trim(self, state, now):
+        recent = state['recent']
+        while recent and recent[0] < now - RATE_WINDOW:
+            recent.popleft()
+
+    def stats(self):
+        """每个 Key 的负载与隔离状态（Key 已脱敏）"""
+        now = time.monotonic()
+        with self._lock:
+            result = []
+            for key, state in self._states.items():
+                self._trim(state, now)
+                result.append({
+                    'key': mask_key(key),
+                    'in_flight': state['in_flight'],
+                    'requests_per_minute': len(state['recent']),
+                    'total': state['total'],
+                    'auth_errors': state['auth_errors'],
+                    'throttled': state['throttled'],
+                    'quarantined_for_s': round(max(0.0, state['quarantined_until'] - now), 1),
+                })
+            return result
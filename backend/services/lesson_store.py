@@ -0,0 +1,270 @@
+import os
+import re
+import json
+import hashlib
+import itertools
+import threading
+from datetime import datetime
+from backend.config import Config
+from backend.utils import atomic_write
+
+RECORD_VERSION = 1
+
+# 文件名中话题部分的最大长度
+SLUG_MAX_LENGTH = 40
+
+
+def topic_slug(topic):
+    """将话题转换为可用于文件名的片段（保留中英文字符）"""
+    slug = re.sub(r'[^\w-]+', '_', topic.strip()).strip('_')
+    return slug[:SLUG_MAX_LENGTH] or 'lesson'
+
+
+def content_hash(topic, dialogue, keywords):
+    """学习内容的哈希（与元数据无关，相同内容得到相同哈希）"""
+    canonical = json.dumps(
+        {'topic': topic, 'dialogue': dialogue, 'keywords': keywords},
+        ensure_ascii=False, sort_keys=True, separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:10]
+
+
+def lesson_name(topic, dialogue, keywords):
+    """按内容寻址的学习记录名称：learn_<话题>_<内容哈希>"""
+    return f'learn_{topic_slug(topic)}_{content_hash(topic, dialogue, keywords)}'
+
+
+def reuse_audio(old_dialogue, new_dialogue, voice_for):
+    """
+    编辑对话时复用未改变句子的音频
+
+    英文文本与音色都相同的句子（位置可以改变）沿用原音频，其余句子需要重新合成
+
+    Args:
+        old_dialogue: 原对话列表（含 audio_url）
+        new_dialogue: 编辑后的对话列表
+        voice_for: 说话人 -> 音色
+
+    Returns:
+        tuple: (合并音频后的对话列表, 需要重新合成的句子序号)
+    """
+    audio = {}
+    for item in old_dialogue:
+        if item.get('audio_url'):
+            audio.setdefault((item.get('english'), voice_for(item.get('speaker'))), item['audio_url'])
+    dialogue = []
+    changed = []
+    for i, item in enumerate(new_dialogue):
+        line = {key: value for key, value in item.items() if key != 'audio_url'}
+        url = audio.get((line.get('english'), voice_for(line.get('speaker'))))
+        if url:
+            line['audio_url'] = url
+        else:
+            changed.append(i)
+        dialogue.append(line)
+    return dialogue, changed
+
+
+class LessonStore:
+    """学习记录存储 - 每个学习内容保存为结构化 JSON 记录，页面按需渲染"""
+
+    def __init__(self, lessons_dir=None):
+        self._lessons_dir = lessons_dir
+        self._lock = threading.Lock()
+        # 记录的读-改-写（如补齐音频）需串行，避免并发更新互相覆盖
+        self._write_lock = threading.Lock()
+        self._index = {}  # name -> (mtime_ns, summary)
+
+    @property
+    def lessons_dir(self):
+        return self._lessons_dir or Config.GENERATED_DIR
+
+    def record_path(self, name):
+        """
+        学习记录文件路径
+
+        Args:
+            name: 学习记录名称（不含扩展名，如 learn_餐厅点餐_3f2a9c1b0d）
+
+        Returns:
+            str: 记录文件路径，名称非法时返回 None
+        """
+        if not name or os.path.basename(name) != name or name.startswith('.'):
+            return None
+        return os.path.join(self.lessons_dir, f'{name}.json')
+
+    def exists(self, name):
+        path = self.record_path(name)
+        return path is not None and os.path.exists(path)
+
+    def save(self, topic, dialogue, keywords, **meta):
+        """
+        保存学习记录
+
+        记录名称由内容哈希决定，并发保存不同内容不会互相覆盖；
+        相同内容重复保存时直接返回已有记录。记录中保存内容哈希（content_hash），
+        编辑后（页面地址不变）哈希随之更新：该名称下的内容已不同，
+        此时保存到带序号的新名称（如 learn_机场_3f2a9c1b0d_2），不会返回编辑后的记录
+
+        Args:
+            topic: 对话话题
+            dialogue: 对话列表（含 audio_url）
+            keywords: 关键词列表
+            **meta: 其他元数据（如 timings、model）
+
+        Returns:
+            dict: 保存的记录（含 name）
+        """
+        digest = content_hash(topic, dialogue, keywords)
+        base = lesson_name(topic, dialogue, keywords)
+        name = base
+        for n in itertools.count(2):
+            existing = self.load(name)
+            if existing is None:
+                break
+            # 旧记录没有 content_hash，按名称视为同一内容
+            if existing.get('content_hash', digest) == digest:
+                return existing
+            name = f'{base}_{n}'
+
+        record = {
+            'version': RECORD_VERSION,
+            'name': name,
+            'topic': topic,
+            'dialogue': dialogue,
+            'keywords': keywords,
+            'content_hash': digest,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        record.update(meta)
+        self.write(name, record)
+        return record
+
+    def write(self, name, record):
+        """原子写入完整记录（紧凑 JSON）"""
+        path = self.record_path(name)
+        if path is None:
+            raise ValueError(f'Invalid lesson name: {name}')
+        atomic_write(path, json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+
+    def update(self, name, change):
+        """
+        读-改-写学习记录（与其他更新串行执行），记录名称不变
+
+        Args:
+            name: 学习记录名称
+            change: 就地修改记录的函数，调用方式为 change(record)
+
+        Returns:
+            dict: 更新后的记录，记录不存在时返回 None
+        """
+        with self._write_lock:
+            record = self.load(name)
+            if record is None:
+                return None
+            change(record)
+            self.write(name, record)
+            return record
+
+    def patch_audio(self, name, index, text, audio_url):
+        """
+        补齐单句音频并从待补齐列表（pending_audio）中移除
+
+        Args:
+            name: 学习记录名称
+            index: 句子序号
+            text: 合成时的英文文本（句子已被编辑时不更新）
+            audio_url: 音频地址，None 表示放弃补齐（只移出待补齐列表）
+
+        Returns:
+            int: 剩余待补齐句数，记录不存在时返回 None
+        """
+        def change(record):
+            dialogue = record.get('dialogue') or []
+            if not 0 <= index < len(dialogue) or dialogue[index].get('english') != text:
+                return
+            if audio_url:
+                dialogue[index]['audio_url'] = audio_url
+            pending = [i for i in record.get('pending_audio') or [] if i != index]
+            if pending:
+                record['pending_audio'] = pending
+            else:
+                record.pop('pending_audio', None)
+
+        record = self.update(name, change)
+        return None if record is None else len(record.get('pending_audio') or [])
+
+    def load(self, name):
+        """读取学习记录，不存在时返回 None"""
+        path = self.record_path(name)
+        if path is None:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def mtime(self, name):
+        """记录的修改时间（纳秒），用作渲染缓存的版本号"""
+        path = self.record_path(name)
+        try:
+            return os.stat(path).st_mtime_ns if path else None
+        except OSError:
+            return None
+
+    def delete(self, name):
+        """删除学习记录"""
+        path = self.record_path(name)
+        if path is None or not os.path.exists(path):
+            return False
+        os.remove(path)
+        with self._lock:
+            self._index.pop(name, None)
+        return True
+
+    def list(self):
+        """
+        列出所有学习记录摘要
+
+        摘要按文件修改时间缓存，只有新增或变更的记录才会重新解析
+
+        Returns:
+            list: 每项包含 name、topic、created_at、size、pending_audio（待补齐音频的句数）
+        """
+        if not os.path.exists(self.lessons_dir):
+            return []
+        summaries = []
+        seen = set()
+        for entry in os.scandir(self.lessons_dir):
+            if entry.name.startswith('.') or not entry.name.endswith('.json') or not entry.is_file():
+                continue
+            name = entry.name[:-5]
+            stat = entry.stat()
+            seen.add(name)
+            with self._lock:
+                cached = self._index.get(name)
+            if cached and cached[0] == stat.st_mtime_ns:
+                summaries.append(cached[1])
+                continue
+            try:
+                record = self.load(name)
+            except (OSError, ValueError):
+                continue
+            if not isinstance(record, dict) or record.get('version') is None:
+                continue
+            summary = {
+                'name': name,
+                'topic': record.get('topic', ''),
+                'created_at': record.get('created_at', ''),
+                'size': stat.st_size,
+                'pending_audio': len(record.get('pending_audio') or []),
+            }
+            with self._lock:
+                self._index[name] = (stat.st_mtime_ns, summary)
+            summaries.append(summary)
+        with self._lock:
+            for name in list(self._index):
+                if name not in seen:
+                    del self._index[name]
+        return summaries
@@ -1,25 +1,265 @@
-import json
-import dashscope
-from dashscope import Generation
+import time
+import asyncio
+import contextvars
 from backend.config import Config
+from backend.aio import run_sync
+from backend.http_pool import get_session
+from backend.json_repair import parse_json, RepairResult
+from backend.services.model_router import ModelRouter
+from backend.services.key_pool import ApiKeyPool, NoApiKeyError, classify_error
+from backend.retry import RetryPolicy, RetryBudget, use_budget
+
+DIALOGUE_SYSTEM_PROMPT = '你是一个专业的英语口语教学助手，擅长生成实用的英语对话和词汇讲解。'
+TRANSLATE_SYSTEM_PROMPT = '你是一个专业的中英翻译专家，擅长将中文翻译成地道、自然的英文。'
+
+# 当前生成请求实际用到的模型（并发的子请求共享同一个集合）
+_models_used = contextvars.ContextVar('models_used', default=None)
+
+
+def normalize_dialogue(items):
+    """
+    校验并规范化对话列表
+    
+    丢弃缺少英文的句子；说话人不是 A/B 时按顺序交替补齐
+    
+    Returns:
+        list: 合法的对话项
+    """
+    if not isinstance(items, list):
+        return []
+    dialogue = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        english = item.get('english')
+        if not isinstance(english, str) or not english.strip():
+            continue
+        chinese = item.get('chinese')
+        speaker = str(item.get('speaker', '')).strip().upper()
+        if speaker not in ('A', 'B'):
+            speaker = 'AB'[len(dialogue) % 2]
+        line = dict(item)
+        line.update({
+            'speaker': speaker,
+            'chinese': chinese.strip() if isinstance(chinese, str) else '',
+            'english': english.strip()
+        })
+        dialogue.append(line)
+    return dialogue
+
+
+def normalize_keywords(items):
+    """校验并规范化关键词列表（丢弃缺少英文单词的项）"""
+    if not isinstance(items, list):
+        return []
+    keywords = []
+    for item in items:
+        if isinstance(item, str):
+            item = {'word': item}
+        if not isinstance(item, dict):
+            continue
+        word = item.get('word')
+        if not isinstance(word, str) or not word.strip():
+            continue
+        chinese = item.get('chinese')
+        keywords.append(dict(item, word=word.strip(), chinese=chinese.strip() if isinstance(chinese, str) else ''))
+    return keywords
+
+
+def json_mode_unsupported(status_code, message):
+    """
+    是否为模型不支持 JSON 模式（response_format）的错误
+
+    只匹配明确说明不支持 response_format / json_object 的 400 错误，
+    其他提到 JSON 的参数错误（如提示词缺少 json 字样）不关闭 JSON 模式
+    """
+    if status_code != 400:
+        return False
+    message = message.lower()
+    return ('response_format' in message or 'json_object' in message) and 'support' in message
+
+
+def segment_sizes(num_exchanges, segment_size):
+    """将对话轮数尽量均匀地分成每段不超过 segment_size 轮"""
+    count = -(-num_exchanges // segment_size)
+    base, extra = divmod(num_exchanges, count)
+    return [base + 1] * extra + [base] * (count - extra)
+
 
 class LLMService:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, router=None, key_pool=None, retry=None):
         self.api_key = api_key or Config.DASHSCOPE_API_KEY
-        dashscope.api_key = self.api_key
+        # 每次请求从 Key 池中选择 Key（不修改 dashscope 全局 api_key）
+        self.key_pool = key_pool or ApiKeyPool([self.api_key])
         self.model = Config.LLM_MODEL
+        # 按任务类型选择模型，超过截止时间时启用备用模型
+        self.router = router or ModelRouter()
+        # 瞬时故障（超时、限流、5xx）按指数退避重试
+        self.retry = retry or RetryPolicy()
+        # 接口明确不支持 JSON 模式的模型（仅对这些模型关闭，其他模型不受影响）
+        self._json_mode_disabled = set()
     
-    def generate_dialogue(self, topic, num_exchanges=5):
+    def _generation(self):
+        """延迟导入 dashscope（首次调用时才加载 SDK，避免拖慢服务启动）"""
+        from dashscope import AioGeneration
+        return AioGeneration
+    
+    def _json_mode(self, model):
+        """模型是否使用 JSON 模式（结构化输出）"""
+        return model.startswith(Config.LLM_JSON_MODE_MODELS) and model not in self._json_mode_disabled
+    
+    async def _complete(self, system_prompt, prompt, task='dialogue'):
         """
-        生成中英对照对话
+        按任务类型路由调用模型
+        
+        首选模型超过截止时间仍未返回（或调用失败）时并行请求下一个备用模型，
+        先成功返回者胜出，其余请求取消
+        
+        Args:
+            system_prompt: 系统提示词
+            prompt: 用户提示词
+            task: 任务类型（dialogue / translate / keywords）
+        
+        Returns:
+            tuple: (回复文本, 错误信息)，成功时错误信息为 None
+        """
+        models = self.router.plan(task)
+        deadline = self.router.deadline(task)
+        running = {}  # asyncio.Task -> model
+        error = None
+        try:
+            for i, model in enumerate(models):
+                running[asyncio.ensure_future(self._call_model(model, system_prompt, prompt))] = model
+                # 最后一个模型不再设截止时间（由 LLM_TIMEOUT 兜底）
+                timeout = deadline if i < len(models) - 1 else None
+                while running:
+                    done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        print(f"⏱️ {model} 超过 {deadline:g} 秒未返回，同时请求 {models[i + 1]}")
+                        break
+                    for finished in done:
+                        running.pop(finished)
+                        content, error = finished.result()
+                        if error is None:
+                            return content, None
+                    if not running:
+                        break
+            return None, error
+        finally:
+            for pending in running:
+                pending.cancel()
+    
+    async def _call_model(self, model, system_prompt, prompt):
+        """
+        调用指定模型，瞬时故障按重试策略退避重试（受当前课程的重试预算限制）
+        
+        Returns:
+            tuple: (回复文本, 错误信息)
+        """
+        attempt = 0
+        while True:
+            content, error, status_code = await self._request_model(model, system_prompt, prompt)
+            if error is None:
+                self.retry.succeeded(attempt)
+                return content, None
+            delay = self.retry.next_delay(attempt, status_code, error)
+            if delay is None:
+                return None, error
+            print(f"🔁 {model} 调用失败，{delay:.1f} 秒后重试: {error}")
+            await asyncio.sleep(delay)
+            attempt += 1
+    
+    async def _request_model(self, model, system_prompt, prompt):
+        """
+        单次调用指定模型并记录延迟
+        
+        Returns:
+            tuple: (回复文本, 错误信息, HTTP 状态码)，请求异常时状态码为 None
+        """
+        AioGeneration = self._generation()
+        options = {'response_format': {'type': 'json_object'}} if self._json_mode(model) else {}
+        try:
+            api_key = self.key_pool.acquire()
+        except NoApiKeyError as e:
+            return None, str(e), None
+        started_at = time.perf_counter()
+        try:
+            response = await AioGeneration.call(
+                model=model,
+                messages=[
+                    {'role': 'system', 'content': system_prompt},
+                    {'role': 'user', 'content': prompt}
+                ],
+                result_format='message',
+                api_key=api_key,
+                # 复用共享连接池，避免每次调用重新握手
+                session=await get_session(),
+                request_timeout=Config.LLM_TIMEOUT,
+                **options
+            )
+        except asyncio.CancelledError:
+            # 被备用模型抢先或停机取消：耗时作为该模型延迟的下限
+            self.router.record(model, time.perf_counter() - started_at, timeout=True)
+            self.key_pool.release(api_key)
+            raise
+        except Exception as e:
+            self.router.record(model, time.perf_counter() - started_at, error=True)
+            self.key_pool.release(api_key, classify_error(message=str(e)))
+            return None, str(e) or type(e).__name__, None
+        
+        elapsed = time.perf_counter() - started_at
+        if response.status_code == 200:
+            self.router.record(model, elapsed)
+            self.key_pool.release(api_key)
+            used = _models_used.get()
+            if used is not None:
+                used.add(model)
+            return response.output.choices[0].message.content, None, 200
+        
+        self.router.record(model, elapsed, error=True)
+        message = str(response.message or '')
+        key_error = classify_error(response.status_code, f'{getattr(response, "code", "")} {message}')
+        self.key_pool.release(api_key, key_error)
+        if options and json_mode_unsupported(response.status_code, message):
+            # 该模型不支持 JSON 模式：只对该模型关闭后重试
+            print(f"⚠️ 模型 {model} 不支持 JSON 模式，已关闭")
+            self._json_mode_disabled.add(model)
+            return await self._request_model(model, system_prompt, prompt)
+        return None, f'API调用失败: {message}', response.status_code
+    
+    def generate_dialogue(self, topic, num_exchanges=5, budget=None):
+        """生成中英对照对话（同步包装，见 agenerate_dialogue）"""
+        return run_sync(self.agenerate_dialogue(topic, num_exchanges, budget=budget))
+    
+    def translate_to_english(self, chinese_text):
+        """将中文翻译成地道英文（同步包装，见 atranslate_to_english）"""
+        return run_sync(self.atranslate_to_english(chinese_text))
+    
+    async def agenerate_dialogue(self, topic, num_exchanges=5, budget=None):
+        """
+        生成中英对照对话（异步，在共享事件循环上与其他请求复用）
+        
+        模型输出先在本地修复（代码块、多余逗号、截断）并按结构校验；
+        只有缺失的部分（被截断的对话、关键词）才会再次请求模型。
+        轮数超过 Config.LLM_SEGMENT_EXCHANGES 时分段并发生成
         
         Args:
             topic: 对话话题
             num_exchanges: 对话轮数
-            
+            budget: 重试预算（与同一节课的语音合成共享，默认新建）
+        
         Returns:
             dict: 包含对话列表和关键词
         """
+        models = set()
+        _models_used.set(models)
+        use_budget(budget or RetryBudget())
+        if Config.LLM_SEGMENT_EXCHANGES and num_exchanges > Config.LLM_SEGMENT_EXCHANGES:
+            result = await self._agenerate_segmented(topic, num_exchanges)
+            if result['success']:
+                result['models'] = sorted(models)
+            return result
+        
         prompt = f"""请生成一个关于"{topic}"的英语对话，包含{num_exchanges}轮对话。
 
 要求：
@@ -46,47 +286,244 @@ class LLMService:
 }}
 
 请确保返回的是有效的JSON格式。"""
-
+        
         try:
-            response = Generation.call(
-                model=self.model,
-                messages=[
-                    {'role': 'system', 'content': '你是一个专业的英语口语教学助手，擅长生成实用的英语对话和词汇讲解。'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                result_format='message'
-            )
-            
-            if response.status_code == 200:
-                content = response.output.choices[0].message.content
-                # 提取JSON内容
-                json_str = self._extract_json(content)
-                data = json.loads(json_str)
+            content, error = await self._complete(DIALOGUE_SYSTEM_PROMPT, prompt)
+            if error:
                 return {
-                    'success': True,
-                    'topic': topic,
-                    'dialogue': data.get('dialogue', []),
-                    'keywords': data.get('keywords', [])
+                    'success': False,
+                    'error': error
                 }
-            else:
+            
+            parsed = self._parse(content)
+            dialogue = normalize_dialogue(parsed.data.get('dialogue'))
+            keywords = normalize_keywords(parsed.data.get('keywords'))
+            reasks = []
+            
+            if not dialogue:
+                reasks.append('dialogue')
+                dialogue = await self._reask_dialogue(topic, num_exchanges, [])
+                if not dialogue:
+                    return {
+                        'success': False,
+                        'error': '模型返回的对话格式无效'
+                    }
+            elif parsed.truncated:
+                # 对话被截断：只补全后续句子，关键词同时补充
+                reasks.append('dialogue')
+                continuation = self._reask_dialogue(topic, num_exchanges, dialogue)
+                if not keywords:
+                    reasks.append('keywords')
+                    more, keywords = await asyncio.gather(continuation, self._reask_keywords(topic, dialogue))
+                else:
+                    more = await continuation
+                dialogue = dialogue + more
+            
+            if not keywords and 'keywords' not in reasks:
+                reasks.append('keywords')
+                keywords = await self._reask_keywords(topic, dialogue)
+            
+            return {
+                'success': True,
+                'topic': topic,
+                'dialogue': dialogue,
+                'keywords': keywords,
+                'repair': {'repaired': parsed.repaired, 'truncated': parsed.truncated, 'reasks': reasks},
+                'models': sorted(models)
+            }
+        
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    def _parse(self, content):
+        """宽松解析模型输出，无法解析或不是对象时返回空对象（视为全部缺失）"""
+        try:
+            parsed = parse_json(content or '')
+        except ValueError:
+            return RepairResult({}, repaired=True, truncated=True)
+        if not isinstance(parsed.data, dict):
+            parsed.data = {}
+        return parsed
+    
+    async def _reask_dialogue(self, topic, num_exchanges, existing):
+        """
+        补充请求对话（已有部分句子时只请求后续句子）
+        
+        Returns:
+            list: 新增的对话项，失败时为空列表
+        """
+        if existing:
+            lines = '\n'.join(f"{item['speaker']}: {item['english']}" for item in existing)
+            task = f"""下面是一个关于"{topic}"的英语对话（共{num_exchanges}轮）的前{len(existing)}句，输出在此处被截断：
+
+{lines}
+
+请只续写剩余的对话，不要重复已有句子。"""
+        else:
+            task = f'请生成一个关于"{topic}"的英语对话，包含{num_exchanges}轮对话，两个角色为A和B。'
+        prompt = f"""{task}
+
+每句对话提供中文、英文，以JSON格式返回：
+{{"dialogue": [{{"speaker": "A", "chinese": "中文内容", "english": "English content"}}]}}"""
+        
+        content, error = await self._complete(DIALOGUE_SYSTEM_PROMPT, prompt)
+        if error:
+            print(f"⚠️ 补充对话失败: {error}")
+            return []
+        return normalize_dialogue(self._parse(content).data.get('dialogue'))
+    
+    async def _reask_keywords(self, topic, dialogue):
+        """根据已有对话补充请求关键词，失败时返回空列表"""
+        lines = '\n'.join(item['english'] for item in dialogue)
+        prompt = f"""下面是一个关于"{topic}"的英语对话：
+
+{lines}
+
+请列出其中5-8个重要词汇和短语，包含英文、中文释义，以JSON格式返回：
+{{"keywords": [{{"word": "english word", "chinese": "中文释义"}}]}}"""
+        
+        content, error = await self._complete(DIALOGUE_SYSTEM_PROMPT, prompt, task='keywords')
+        if error:
+            print(f"⚠️ 补充关键词失败: {error}")
+            return []
+        return normalize_keywords(self._parse(content).data.get('keywords'))
+    
+    async def _agenerate_segmented(self, topic, num_exchanges):
+        """
+        分段并发生成长对话
+        
+        先用一次简短请求确定场景、角色和各段情节，再并发生成各段并按顺序拼接；
+        关键词与各段同时生成，总耗时接近最慢的一段而不是各段之和。
+        任一段重试后仍失败时整体失败，避免返回中间缺段的对话
+        """
+        try:
+            sizes = segment_sizes(num_exchanges, Config.LLM_SEGMENT_EXCHANGES)
+            plan = await self._plan_segments(topic, len(sizes))
+            *segments, keywords = await asyncio.gather(
+                *(self._generate_segment(topic, plan, i, size) for i, size in enumerate(sizes)),
+                self._plan_keywords(topic, plan)
+            )
+            missing = [str(i + 1) for i, segment in enumerate(segments) if not segment]
+            if missing:
                 return {
                     'success': False,
-                    'error': f'API调用失败: {response.message}'
+                    'error': f"第{'、'.join(missing)}段对话生成失败"
                 }
-                
+            dialogue = [line for segment in segments for line in segment]
+            
+            return {
+                'success': True,
+                'topic': topic,
+                'dialogue': dialogue,
+                'keywords': keywords,
+                'segments': [len(segment) for segment in segments]
+            }
+        
         except Exception as e:
             return {
                 'success': False,
                 'error': str(e)
             }
     
-    def translate_to_english(self, chinese_text):
+    async def _plan_segments(self, topic, count):
+        """
+        生成各段共享的上下文（场景、角色、各段情节），失败时使用通用大纲
+        
+        Returns:
+            dict: 包含 setting、characters、scenes
+        """
+        prompt = f"""请为一个关于"{topic}"的英语口语对话设计大纲，对话分为{count}段，按顺序衔接。
+
+请以JSON格式返回：
+{{
+    "setting": "场景描述",
+    "characters": {{"A": "角色A的身份", "B": "角色B的身份"}},
+    "scenes": ["第1段的情节", "第2段的情节"]
+}}
+
+scenes 必须恰好包含{count}项，每项一句话。"""
+        
+        # 大纲与关键词一样是短输出，使用同一路由
+        content, error = await self._complete(DIALOGUE_SYSTEM_PROMPT, prompt, task='keywords')
+        data = {} if error else self._parse(content).data
+        if error:
+            print(f"⚠️ 生成对话大纲失败，使用通用大纲: {error}")
+        
+        characters = data.get('characters') if isinstance(data.get('characters'), dict) else {}
+        scenes = [s for s in data.get('scenes') or [] if isinstance(s, str) and s.strip()][:count]
+        scenes += [f'围绕"{topic}"的第{i + 1}部分' for i in range(len(scenes), count)]
+        setting = data.get('setting')
+        return {
+            'setting': setting if isinstance(setting, str) and setting.strip() else topic,
+            'characters': {role: str(characters.get(role) or f'角色{role}') for role in ('A', 'B')},
+            'scenes': scenes
+        }
+    
+    async def _generate_segment(self, topic, plan, index, size):
+        """
+        生成一段对话（失败时重试一次）
+        
+        Returns:
+            list: 该段的对话项，失败时为空列表
+        """
+        count = len(plan['scenes'])
+        outline = '\n'.join(f'{i + 1}. {scene}' for i, scene in enumerate(plan['scenes']))
+        if index == 0:
+            position = '这是对话的开头，需要自然地开场'
+        else:
+            position = '紧接上一段的情节继续，不要重新打招呼，也不要重复之前的内容'
+        if index == count - 1:
+            position += '；这是对话的最后一段，需要自然地结束对话'
+        
+        prompt = f"""你正在编写一个关于"{topic}"的英语对话，全文分为{count}段，现在只写第{index + 1}段。
+
+场景：{plan['setting']}
+角色：A - {plan['characters']['A']}；B - {plan['characters']['B']}
+各段情节：
+{outline}
+
+要求：
+1. 本段包含{size}轮对话，只写第{index + 1}段的情节
+2. {position}
+3. 每句对话提供：中文、英文，内容实用、自然，适合口语练习
+
+请以JSON格式返回：
+{{"dialogue": [{{"speaker": "A", "chinese": "中文内容", "english": "English content"}}]}}"""
+        
+        for attempt in range(2):
+            content, error = await self._complete(DIALOGUE_SYSTEM_PROMPT, prompt)
+            if error:
+                print(f"⚠️ 第{index + 1}段对话生成失败: {error}")
+                continue
+            dialogue = normalize_dialogue(self._parse(content).data.get('dialogue'))
+            if dialogue:
+                return dialogue
+        return []
+    
+    async def _plan_keywords(self, topic, plan):
+        """根据大纲生成关键词（与各段对话并发进行），失败时返回空列表"""
+        outline = '；'.join(plan['scenes'])
+        prompt = f"""一个关于"{topic}"的英语口语对话，场景：{plan['setting']}，情节：{outline}。
+
+请列出其中8-12个重要词汇和短语，包含英文、中文释义，以JSON格式返回：
+{{"keywords": [{{"word": "english word", "chinese": "中文释义"}}]}}"""
+        
+        content, error = await self._complete(DIALOGUE_SYSTEM_PROMPT, prompt, task='keywords')
+        if error:
+            print(f"⚠️ 生成关键词失败: {error}")
+            return []
+        return normalize_keywords(self._parse(content).data.get('keywords'))
+    
+    async def atranslate_to_english(self, chinese_text):
         """
-        将中文翻译成地道英文
+        将中文翻译成地道英文（异步）
         
         Args:
             chinese_text: 中文文本
-            
+        
         Returns:
             dict: 包含英文翻译
         """
@@ -105,45 +542,38 @@ class LLMService:
     "colloquial": "Colloquial English translation",
     "alternatives": ["Alternative 1", "Alternative 2"]
 }}"""
-
+        
+        models = set()
+        _models_used.set(models)
+        use_budget(RetryBudget())
         try:
-            response = Generation.call(
-                model=self.model,
-                messages=[
-                    {'role': 'system', 'content': '你是一个专业的中英翻译专家，擅长将中文翻译成地道、自然的英文。'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                result_format='message'
-            )
-            
-            if response.status_code == 200:
-                content = response.output.choices[0].message.content
-                json_str = self._extract_json(content)
-                data = json.loads(json_str)
+            content, error = await self._complete(TRANSLATE_SYSTEM_PROMPT, prompt, task='translate')
+            if error:
                 return {
-                    'success': True,
-                    'chinese': chinese_text,
-                    'translations': data
+                    'success': False,
+                    'error': error
                 }
-            else:
+            
+            data = self._parse(content).data
+            standard = data.get('standard') or data.get('colloquial')
+            if not isinstance(standard, str) or not standard.strip():
                 return {
                     'success': False,
-                    'error': f'API调用失败: {response.message}'
+                    'error': '模型返回的翻译格式无效'
                 }
-                
+            alternatives = data.get('alternatives')
+            data['standard'] = standard
+            data.setdefault('colloquial', standard)
+            data['alternatives'] = [a for a in alternatives if isinstance(a, str)] if isinstance(alternatives, list) else []
+            return {
+                'success': True,
+                'chinese': chinese_text,
+                'translations': data,
+                'models': sorted(models)
+            }
+        
         except Exception as e:
             return {
                 'success': False,
                 'error': str(e)
             }
-    
-    def _extract_json(self, text):
-        """从文本中提取JSON内容"""
-        # 尝试找到JSON块
-        start_idx = text.find('{')
-        end_idx = text.rfind('}')
-        
-        if start_idx != -1 and end_idx != -1:
-            return text[start_idx:end_idx + 1]
-        
-        return text
\ No newline at end of file
@@ -0,0 +1,88 @@
+import time
+import threading
+from collections import deque
+from backend.config import Config
+
+
+class ModelRouter:
+    """模型路由 - 按任务类型选择模型，跟踪各模型的滚动延迟"""
+
+    def __init__(self, routes=None, deadlines=None, window=None, ttl=None):
+        """
+        Args:
+            routes: 任务类型 -> 候选模型列表（按优先顺序，默认 Config.LLM_ROUTES）
+            deadlines: 任务类型 -> 截止时间（秒，默认 Config.LLM_DEADLINES）
+            window: 每个模型保留的最近延迟样本数（默认 Config.LLM_LATENCY_WINDOW）
+            ttl: 延迟样本有效期（秒，默认 Config.LLM_LATENCY_TTL）；
+                 被降级的模型样本过期后会重新作为首选尝试
+        """
+        self.routes = routes or Config.LLM_ROUTES
+        self.deadlines = deadlines or Config.LLM_DEADLINES
+        self.window = window or Config.LLM_LATENCY_WINDOW
+        self.ttl = ttl or Config.LLM_LATENCY_TTL
+        self._lock = threading.Lock()
+        self._samples = {}  # model -> deque[(时间戳, 秒)]
+        self._counts = {}  # model -> {'calls', 'errors', 'timeouts'}
+
+    def deadline(self, task):
+        """任务的截止时间（秒），超过后启用备用模型"""
+        return self.deadlines.get(task) or self.deadlines['dialogue']
+
+    def plan(self, task):
+        """
+        任务的模型调用顺序
+
+        首选第一个滚动延迟（中位数）不超过截止时间的模型；
+        全部超时时按延迟从低到高排列，其余模型保持配置顺序作为备用
+
+        Returns:
+            list: 模型名称列表
+        """
+        models = list(self.routes.get(task) or self.routes['dialogue'])
+        deadline = self.deadline(task)
+        latencies = {model: self.latency(model) for model in models}
+        for model in models:
+            if latencies[model] is None or latencies[model] <= deadline:
+                models.remove(model)
+                return [model] + models
+        return sorted(models, key=lambda m: latencies[m])
+
+    def record(self, model, seconds, error=False, timeout=False):
+        """
+        记录一次调用
+
+        Args:
+            model: 模型名称
+            seconds: 耗时（超时被取消的调用记录取消时的耗时，作为延迟下限）
+            error: 调用是否失败
+            timeout: 是否因超过截止时间被取消
+        """
+        with self._lock:
+            samples = self._samples.setdefault(model, deque(maxlen=self.window))
+            samples.append((time.monotonic(), seconds))
+            counts = self._counts.setdefault(model, {'calls': 0, 'errors': 0, 'timeouts': 0})
+            counts['calls'] += 1
+            counts['errors'] += int(error)
+            counts['timeouts'] += int(timeout)
+
+    def latency(self, model, quantile=0.5):
+        """模型的滚动延迟（秒），没有样本时返回 None"""
+        cutoff = time.monotonic() - self.ttl
+        with self._lock:
+            samples = sorted(seconds for at, seconds in self._samples.get(model, ()) if at >= cutoff)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * quantile))]
+
+    def stats(self):
+        """各模型的调用次数、失败/超时次数与滚动延迟（毫秒）"""
+        with self._lock:
+            models = {model: dict(counts) for model, counts in self._counts.items()}
+        for model, item in models.items():
+            for name, quantile in (('p50_ms', 0.5), ('p90_ms', 0.9)):
+                value = self.latency(model, quantile)
+                item[name] = round(value * 1000) if value is not None else None
+        return {
+            'routes': {task: list(models) for task, models in self.routes.items()},
+            'models': models
+        }
@@ -0,0 +1,276 @@
+import os
+import re
+import sys
+import mmap
+import struct
+import threading
+import unicodedata
+from backend.config import Config
+
+# 词典文件格式（小端）：
+#   8 字节标识 | uint32 词条数 n | (n + 1) 个 uint32 词条偏移（相对数据区）| 数据区
+#   每个词条为 "键\0音标"（UTF-8），按键的 UTF-8 字节排序，查找时二分
+MAGIC = b'PHONDICT'
+HEADER = struct.Struct('<8sI')
+OFFSET = struct.Struct('<I')
+
+WORD_RE = re.compile(r"[a-z]+(?:'[a-z]+)*")
+
+# 查询结果缓存的最大条数（常用词反复出现，缓存后无需二分）
+CACHE_SIZE = 4096
+
+_MISSING = object()
+
+# CMUdict 音素（ARPAbet）-> IPA（美式发音）
+ARPABET_IPA = {
+    'AA': 'ɑ', 'AE': 'æ', 'AH': 'ʌ', 'AO': 'ɔ', 'AW': 'aʊ', 'AY': 'aɪ', 'EH': 'ɛ', 'ER': 'ɝ',
+    'EY': 'eɪ', 'IH': 'ɪ', 'IY': 'i', 'OW': 'oʊ', 'OY': 'ɔɪ', 'UH': 'ʊ', 'UW': 'u',
+    'B': 'b', 'CH': 'tʃ', 'D': 'd', 'DH': 'ð', 'F': 'f', 'G': 'ɡ', 'HH': 'h', 'JH': 'dʒ',
+    'K': 'k', 'L': 'l', 'M': 'm', 'N': 'n', 'NG': 'ŋ', 'P': 'p', 'R': 'r', 'S': 's',
+    'SH': 'ʃ', 'T': 't', 'TH': 'θ', 'V': 'v', 'W': 'w', 'Y': 'j', 'Z': 'z', 'ZH': 'ʒ',
+}
+# 非重读时的弱读元音
+UNSTRESSED_IPA = {'AH': 'ə', 'ER': 'ɚ'}
+# 英语合法的音节首辅音丛（重音符号放在音节开头，辅音按最大首音原则归入后一音节）
+ONSETS = {tuple(onset.split()) for onset in (
+    'P R', 'P L', 'B R', 'B L', 'T R', 'D R', 'K R', 'K L', 'G R', 'G L', 'F R', 'F L', 'TH R', 'SH R',
+    'T W', 'D W', 'K W', 'G W', 'TH W', 'S W', 'P Y', 'B Y', 'F Y', 'M Y', 'K Y', 'V Y', 'HH Y',
+    'S P', 'S T', 'S K', 'S M', 'S N', 'S L', 'S P R', 'S P L', 'S T R', 'S K R', 'S K W', 'S K Y', 'S P Y',
+)}
+
+
+def phonetic_key(word):
+    """词典键：全角转半角、小写、统一撇号并合并空白"""
+    word = unicodedata.normalize('NFKC', word or '').replace('’', "'").lower()
+    return ' '.join(word.split())
+
+
+def arpabet_to_ipa(phones):
+    """
+    将 CMUdict 音素序列转换为 IPA
+
+    Args:
+        phones: 音素列表，元音带重音数字（如 ['B', 'AO1', 'R', 'D', 'IH0', 'NG']）
+
+    Returns:
+        str: IPA 音标（如 'ˈbɔrdɪŋ'，单音节词不标重音）
+    """
+    vowels = [i for i, phone in enumerate(phones) if phone[-1:].isdigit()]
+    marks = {}
+    if len(vowels) > 1:
+        previous = -1
+        for i in vowels:
+            stress = phones[i][-1]
+            if stress in '12':
+                consonants = tuple(phones[previous + 1:i])
+                start = previous + 1
+                if previous >= 0:
+                    # 最长的合法首辅音丛归入重读音节
+                    start = i
+                    for j in range(previous + 1, i):
+                        onset = consonants[j - previous - 1:]
+                        if (len(onset) == 1 and onset[0] != 'NG') or onset in ONSETS:
+                            start = j
+                            break
+                marks[start] = 'ˈ' if stress == '1' else 'ˌ'
+            previous = i
+    ipa = []
+    for i, phone in enumerate(phones):
+        if i in marks:
+            ipa.append(marks[i])
+        base, stress = (phone[:-1], phone[-1]) if phone[-1:].isdigit() else (phone, '')
+        ipa.append(UNSTRESSED_IPA.get(base, ARPABET_IPA[base]) if stress == '0' else ARPABET_IPA[base])
+    return ''.join(ipa)
+
+
+def write_dict(entries, path):
+    """
+    写入词典文件（同一个键只保留第一个音标）
+
+    Args:
+        entries: (词汇, IPA 音标) 的可迭代对象
+        path: 输出文件路径
+
+    Returns:
+        int: 词条数
+    """
+    items = {}
+    for word, ipa in entries:
+        key = phonetic_key(word).encode('utf-8')
+        if key and ipa and b'\0' not in key:
+            items.setdefault(key, ipa.encode('utf-8'))
+    data = bytearray()
+    offsets = []
+    for key in sorted(items):
+        offsets.append(len(data))
+        data += key + b'\0' + items[key]
+    offsets.append(len(data))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(items)))
+        f.write(b''.join(OFFSET.pack(offset) for offset in offsets))
+        f.write(data)
+    os.replace(temp_path, path)
+    return len(items)
+
+
+class PhoneticDict:
+    """
+    离线音标词典 - 内存映射的有序词条 + 二分查找
+
+    首次查询时才打开词典文件（不影响启动时间），文件内容由操作系统按页加载，
+    只有查询用到的页面计入进程内存；词典文件不存在时所有查询返回 None
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: 词典文件路径 (默认: Config.PHONETIC_DICT)
+        """
+        self.path = path or Config.PHONETIC_DICT
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._mm = None
+        self._offsets = None
+        self._base = 0
+        self._count = 0
+        self._cache = {}
+
+    def _open(self):
+        """打开并校验词典文件（只执行一次）"""
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                with open(self.path, 'rb') as f:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, count = HEADER.unpack_from(mm, 0)
+                if magic != MAGIC:
+                    raise ValueError('文件格式不正确')
+                base = HEADER.size + OFFSET.size * (count + 1)
+                if sys.byteorder == 'little':
+                    offsets = memoryview(mm)[HEADER.size:base].cast('I')
+                else:
+                    offsets = struct.unpack_from(f'<{count + 1}I', mm, HEADER.size)
+                self._offsets = offsets
+                self._base = base
+                self._count = count
+                self._mm = mm
+            except FileNotFoundError:
+                print(f"⚠️ 音标词典不存在: {self.path}（运行 python build_phonetics.py 生成，生成前不显示音标）")
+            except (OSError, ValueError, struct.error) as e:
+                print(f"⚠️ 音标词典无法读取: {self.path} ({e})")
+            self._loaded = True
+
+    def _get(self, key):
+        """二分查找单个键，找不到时返回 None"""
+        cache = self._cache
+        # 单次查找：其他线程可能同时清空缓存，先判断再取值会出现 KeyError
+        result = cache.get(key, _MISSING)
+        if result is not _MISSING:
+            return result
+        target = key.encode('utf-8')
+        mm, offsets, base = self._mm, self._offsets, self._base
+        lo, hi = 0, self._count
+        result = None
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = base + offsets[mid]
+            current = mm[start:mm.find(b'\0', start)]
+            if current < target:
+                lo = mid + 1
+            elif current > target:
+                hi = mid
+            else:
+                result = mm[start + len(current) + 1:base + offsets[mid + 1]].decode('utf-8')
+                break
+        if len(cache) >= CACHE_SIZE:
+            cache.clear()
+        cache[key] = result
+        return result
+
+    @property
+    def available(self):
+        """词典是否可用（首次访问时打开词典）"""
+        if not self._loaded:
+            self._open()
+        return self._mm is not None
+
+    def lookup(self, word):
+        """
+        查询词汇或短语的音标
+
+        短语先整体查询，查不到时逐词查询（"boarding pass"、"check-in"），
+        任一单词查不到时返回 None
+
+        Returns:
+            str: IPA 音标（不含斜线），查不到时返回 None
+        """
+        if not self.available:
+            return None
+        key = phonetic_key(word).strip(' .,!?;:"\'()')
+        if not key:
+            return None
+        ipa = self._get(key)
+        if ipa is not None:
+            return ipa
+        words = WORD_RE.findall(key)
+        if words == [key]:
+            return None
+        parts = [self._get(w) for w in words]
+        return ' '.join(parts) if parts and None not in parts else None
+
+    def transcribe(self, text):
+        """
+        句子的音标（逐词查询，查不到的单词保留原拼写）
+
+        Returns:
+            str: 以空格分隔的音标，没有任何单词查到时返回空字符串
+        """
+        if not self.available:
+            return ''
+        parts = []
+        found = False
+        for word in WORD_RE.findall(phonetic_key(text)):
+            ipa = self._get(word)
+            found = found or ipa is not None
+            parts.append(word if ipa is None else ipa)
+        return ' '.join(parts) if found else ''
+
+    def fill(self, dialogue, keywords):
+        """
+        补齐音标（就地设置 phonetic，格式为 /IPA/）
+
+        句子的音标由英文生成（英文可能被编辑，总是重新生成）；
+        关键词已有音标时保留；词典不可用时不做修改
+
+        Returns:
+            int: 设置了音标的关键词与句子数
+        """
+        if not self.available:
+            return 0
+        count = 0
+        for kw in keywords:
+            if kw.get('word') and not kw.get('phonetic'):
+                ipa = self.lookup(kw['word'])
+                if ipa:
+                    kw['phonetic'] = f'/{ipa}/'
+                    count += 1
+        for item in dialogue:
+            ipa = self.transcribe(item.get('english') or '')
+            if ipa:
+                item['phonetic'] = f'/{ipa}/'
+                count += 1
+            else:
+                item.pop('phonetic', None)
+        return count
+
+    def stats(self):
+        """词典状态（未查询过时不打开词典）"""
+        return {
+            'path': self.path,
+            'loaded': self._loaded,
+            'entries': self._count,
+            'size': self._mm.size() if self._mm is not None else 0,
+        }
@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import threading
+from backend.config import Config
+from backend.utils import atomic_write
+
+
+def topic_key(topic, num_exchanges):
+    """热度统计与预生成课程的键（话题忽略大小写与多余空白）"""
+    return f"{num_exchanges}|{' '.join(topic.lower().split())}"
+
+
+class Prefetcher:
+    """
+    热门话题预生成 - 统计话题热度，在工作线程空闲时为最热门的话题提前生成课程
+
+    每个预生成的课程只提供给一次请求，取走后在下次空闲时重新生成，
+    用户拿到的仍是新生成的内容
+    """
+
+    def __init__(self, submit, status, is_idle, exists, state_file=None):
+        """
+        Args:
+            submit: 提交生成任务，调用方式为 submit(topic, num_exchanges) -> 任务ID（无法提交时为 None）
+            status: 查询任务，调用方式为 status(任务ID) -> {'status', 'filename'}，任务不存在时为 None
+            is_idle: 是否空闲（没有用户任务与排队中的批量任务），调用方式为 is_idle() -> bool
+            exists: 课程文件是否仍存在，调用方式为 exists(filename) -> bool
+            state_file: 热度统计与预生成课程的持久化文件
+        """
+        self._submit = submit
+        self._status = status
+        self._is_idle = is_idle
+        self._exists = exists
+        self._state_file = state_file
+
+        self._lock = threading.Lock()
+        self._topics = {}  # key -> {'topic', 'num_exchanges', 'score', 'updated', 'ready': [{'filename', 'created'}]}
+        self._inflight = None  # (key, 任务ID)
+        self._thread = None
+        self._stop = threading.Event()
+        self._stats = {'requests': 0, 'hits': 0, 'generated': 0, 'expired': 0}
+
+    @property
+    def state_file(self):
+        """持久化文件（默认位于项目根目录，不放在课程目录中）"""
+        return self._state_file or os.path.join(Config.PROJECT_DIR, 'prefetch_state.json')
+
+    def _score(self, entry, now):
+        """按半衰期衰减后的热度"""
+        return entry['score'] * 0.5 ** ((now - entry['updated']) / Config.PREFETCH_HALF_LIFE)
+
+    def take(self, topic, num_exchanges):
+        """
+        记录一次请求，并取走一个预生成的课程
+
+        Returns:
+            str: 课程文件名，没有可用的预生成课程时返回 None
+        """
+        key = topic_key(topic, num_exchanges)
+        now = time.time()
+        with self._lock:
+            self._stats['requests'] += 1
+            entry = self._topics.get(key)
+            if entry is None:
+                entry = self._topics[key] = {
+                    'topic': topic.strip(), 'num_exchanges': num_exchanges,
+                    'score': 0.0, 'updated': now, 'ready': []
+                }
+            entry['score'] = self._score(entry, now) + 1
+            entry['updated'] = now
+            if len(self._topics) > Config.PREFETCH_MAX_TRACKED:
+                self._prune(now, keep=key)
+            while entry['ready']:
+                item = entry['ready'].pop(0)
+                if now - item['created'] > Config.PREFETCH_MAX_AGE or not self._exists(item['filename']):
+                    self._stats['expired'] += 1
+                    continue
+                self._stats['hits'] += 1
+                return item['filename']
+        return None
+
+    def _prune(self, now, keep):
+        """只保留热度最高的话题（当前请求的话题与有预生成课程的话题不删除）"""
+        ranked = sorted(self._topics, key=lambda k: self._score(self._topics[k], now), reverse=True)
+        for key in ranked[int(Config.PREFETCH_MAX_TRACKED * 0.9):]:
+            if key != keep and not self._topics[key]['ready']:
+                del self._topics[key]
+
+    def hottest(self, limit=None):
+        """
+        热度最高的话题
+
+        Returns:
+            list: (热度, 键) 按热度从高到低
+        """
+        now = time.time()
+        with self._lock:
+            ranked = sorted(((self._score(entry, now), key) for key, entry in self._topics.items()), reverse=True)
+        return ranked[:limit or Config.PREFETCH_TOP_TOPICS]
+
+    def tick(self):
+        """
+        调度一步：登记已完成的预生成任务；空闲时为缺少预生成课程的最热门话题提交一个任务
+
+        Returns:
+            str: 本次提交的话题键，未提交时返回 None
+        """
+        if self._inflight is not None:
+            key, job_id = self._inflight
+            state = self._status(job_id)
+            if state is not None and state['status'] not in ('completed', 'failed'):
+                return None
+            self._inflight = None
+            if state is not None and state['status'] == 'completed' and state.get('filename'):
+                with self._lock:
+                    entry = self._topics.get(key)
+                    if entry is not None:
+                        entry['ready'].append({'filename': state['filename'], 'created': time.time()})
+                        self._stats['generated'] += 1
+
+        if not self._is_idle():
+            return None
+        now = time.time()
+        for score, key in self.hottest():
+            if score < Config.PREFETCH_MIN_SCORE:
+                break
+            with self._lock:
+                entry = self._topics.get(key)
+                if entry is None:
+                    continue
+                entry['ready'] = [item for item in entry['ready'] if now - item['created'] <= Config.PREFETCH_MAX_AGE]
+                if len(entry['ready']) >= Config.PREFETCH_PER_TOPIC:
+                    continue
+                topic, num_exchanges = entry['topic'], entry['num_exchanges']
+            job_id = self._submit(topic, num_exchanges)
+            if job_id is None:
+                return None
+            self._inflight = (key, job_id)
+            print(f"🔮 空闲预生成热门话题: {topic}（热度 {score:.1f}）")
+            return key
+        return None
+
+    def start(self):
+        """启动后台调度线程（PREFETCH_TOP_TOPICS 为 0 时不启动）"""
+        if self._thread is not None or not Config.PREFETCH_TOP_TOPICS:
+            return
+        self._thread = threading.Thread(target=self._loop, name='prefetch', daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(Config.PREFETCH_INTERVAL):
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"⚠️ 预生成调度失败: {e}")
+
+    def stats(self):
+        """请求数、命中数与预生成课程数"""
+        with self._lock:
+            ready = sum(len(entry['ready']) for entry in self._topics.values())
+            return dict(self._stats, topics=len(self._topics), ready=ready,
+                        generating=self._inflight is not None)
+
+    def shutdown(self):
+        """停止调度并保存热度统计与预生成课程"""
+        self._stop.set()
+        with self._lock:
+            if not self._topics:
+                return
+            data = json.dumps({'topics': self._topics}, ensure_ascii=False)
+        try:
+            atomic_write(self.state_file, data)
+        except OSError as e:
+            print(f"❌ 保存话题热度失败: {e}")
+
+    def load(self):
+        """读取上次保存的热度统计与预生成课程"""
+        if not os.path.exists(self.state_file):
+            return 0
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 读取话题热度失败: {e}")
+            return 0
+        with self._lock:
+            self._topics.update(state.get('topics') or {})
+            return len(self._topics)
@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from backend.config import Config
+from backend.utils import atomic_write
+
+
+class TaskInterrupted(Exception):
+    """任务因停机被中断（将在下次启动时恢复）"""
+
+
+class TaskManager:
+    """后台任务管理 - 跟踪生成任务线程，支持优雅停机与任务恢复"""
+
+    def __init__(self, state_file=None):
+        self._state_file = state_file
+        self._lock = threading.Lock()
+        self._tasks = {}  # task_id -> {'thread', 'spec', 'files'}
+        self._accepting = True
+        self._shutdown_done = False
+        self.stop_event = threading.Event()
+
+    @property
+    def state_file(self):
+        """未完成任务的持久化文件（默认位于项目根目录）"""
+        return self._state_file or os.path.join(Config.PROJECT_DIR, 'pending_tasks.json')
+
+    @property
+    def accepting(self):
+        return self._accepting
+
+    def submit(self, task_id, target, spec):
+        """
+        启动后台任务
+
+        Args:
+            task_id: 任务ID
+            target: 任务函数，调用方式为 target(task_id, **spec)
+            spec: 任务参数（需可 JSON 序列化，用于停机后恢复）
+
+        Returns:
+            bool: 是否已接受任务（停机中返回 False）
+        """
+        with self._lock:
+            if not self._accepting:
+                return False
+            thread = threading.Thread(
+                target=self._run,
+                args=(task_id, target, spec),
+                name=f'task-{task_id[:8]}'
+            )
+            thread.daemon = True
+            self._tasks[task_id] = {'thread': thread, 'spec': dict(spec), 'files': set()}
+        thread.start()
+        return True
+
+    def _run(self, task_id, target, spec):
+        try:
+            target(task_id, **spec)
+        except TaskInterrupted:
+            # 被中断的任务保留记录，等待 shutdown 持久化
+            print(f"[Task {task_id}] 已中断，等待停机持久化")
+            return
+        with self._lock:
+            self._tasks.pop(task_id, None)
+
+    def track_file(self, task_id, path):
+        """登记任务生成的中间文件，任务未完成时停机会清理"""
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is not None:
+                task['files'].add(path)
+
+    def check_stop(self):
+        """任务检查点：停机截止时间已到则抛出 TaskInterrupted"""
+        if self.stop_event.is_set():
+            raise TaskInterrupted('服务正在停止，任务将在重启后恢复')
+
+    def active_count(self):
+        with self._lock:
+            return sum(1 for t in self._tasks.values() if t['thread'].is_alive())
+
+    def shutdown(self, timeout=None):
+        """
+        优雅停机：停止接收新任务，在截止时间内等待运行中的任务完成，
+        无法完成的任务持久化以便重启后恢复，并清理其中间文件
+
+        Args:
+            timeout: 等待任务完成的最长时间（秒，默认 Config.SHUTDOWN_TIMEOUT）
+
+        Returns:
+            dict: 完成/持久化的任务数量
+        """
+        with self._lock:
+            if self._shutdown_done:
+                return {'drained': 0, 'persisted': 0}
+            self._shutdown_done = True
+            self._accepting = False
+            threads = [t['thread'] for t in self._tasks.values()]
+
+        if timeout is None:
+            timeout = Config.SHUTDOWN_TIMEOUT
+        deadline = time.monotonic() + timeout
+        running = len([t for t in threads if t.is_alive()])
+        if running:
+            print(f"⏳ 等待 {running} 个任务完成 (最多 {timeout:.0f} 秒)...")
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+        # 截止时间已到：通知剩余任务在下一个检查点退出
+        self.stop_event.set()
+        for thread in threads:
+            thread.join(Config.SHUTDOWN_GRACE)
+
+        with self._lock:
+            unfinished = dict(self._tasks)
+            self._tasks.clear()
+
+        for task in unfinished.values():
+            for path in task['files']:
+                try:
+                    if os.path.exists(path):
+                        os.remove(path)
+                except OSError as e:
+                    print(f"⚠️ 清理中间文件失败 {path}: {e}")
+
+        pending = [
+            {'task_id': task_id, 'spec': task['spec'], 'saved_at': datetime.now().isoformat()}
+            for task_id, task in unfinished.items()
+        ]
+        if pending:
+            self._persist(pending)
+            print(f"💾 {len(pending)} 个未完成任务已保存，将在下次启动时恢复")
+        return {'drained': len(threads) - len(pending), 'persisted': len(pending)}
+
+    def _persist(self, pending):
+        existing = self._read_state()
+        known = {item['task_id'] for item in pending}
+        pending = [item for item in existing if item['task_id'] not in known] + pending
+        atomic_write(self.state_file, json.dumps(pending, ensure_ascii=False, indent=2))
+
+    def _read_state(self):
+        if not os.path.exists(self.state_file):
+            return []
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 读取未完成任务失败: {e}")
+            return []
+
+    def load_pending(self):
+        """读取上次停机时保存的未完成任务（任务重新提交后再调用 clear_pending）"""
+        return self._read_state()
+
+    def clear_pending(self):
+        """删除已恢复的未完成任务记录"""
+        if os.path.exists(self.state_file):
+            os.remove(self.state_file)
@@ -0,0 +1,200 @@
+import re
+import math
+import time
+import threading
+import unicodedata
+from array import array
+from collections import Counter
+
+# 不影响话题含义的英文虚词
+STOPWORDS = frozenset(('a', 'an', 'the', 'at', 'in', 'on', 'to', 'of', 'for', 'with', 'and', 'my', 'your'))
+# 中文常见的无意义后缀
+SUFFIX_RE = re.compile(r'(的对话|对话|场景|英语|口语)+$')
+PUNCT_RE = re.compile(r'[^\w\s]+')
+
+# 使用的字符 n-gram 长度
+NGRAM_SIZES = (2, 3)
+
+_UNLOADED = object()
+_numpy_module = _UNLOADED
+
+
+def _numpy():
+    """
+    首次计分时才导入 NumPy（索引在后台建立，不拖慢启动）
+
+    NumPy 见 requirements.txt（随程序打包）；缺少时返回 None，退回纯 Python 计算相似度，结果相同
+    """
+    global _numpy_module
+    if _numpy_module is _UNLOADED:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy_module = numpy
+    return _numpy_module
+
+
+def normalize_topic(topic):
+    """
+    规范化话题：全角转半角、小写、去标点与英文虚词、去掉“对话/场景”等后缀
+
+    例如 "At the Airport!" 与 "airport" 规范化后相同
+    """
+    text = unicodedata.normalize('NFKC', topic or '').lower()
+    text = PUNCT_RE.sub(' ', text)
+    words = [w for w in text.split() if w not in STOPWORDS] or text.split()
+    return SUFFIX_RE.sub('', ' '.join(words)) or ' '.join(words)
+
+
+def topic_ngrams(normalized):
+    """规范化话题的字符 n-gram 计数（首尾补空格，使词首词尾的 n-gram 单独计数）"""
+    padded = f' {normalized} '
+    grams = Counter()
+    for n in NGRAM_SIZES:
+        grams.update(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+class TopicIndex:
+    """
+    话题相似度索引 - 字符 n-gram 向量的余弦相似度
+
+    倒排表用紧凑数组保存（话题 id 与单位向量中的权重），只对与查询共享 n-gram 的话题计分：
+    安装 NumPy 时对倒排数组向量化累加，否则使用纯 Python 字典累加，结果相同
+    """
+
+    def __init__(self, use_numpy=True):
+        self._use_numpy = use_numpy
+        self._lock = threading.Lock()
+        self._entries = []  # id -> (话题, 值, 规范化话题)，删除后为 None
+        self._ids = {}  # (规范化话题, 值) -> id
+        self._by_value = {}  # 值 -> {id}
+        self._postings = {}  # n-gram -> (array('i') 话题 id, array('f') 权重)
+        self._stats = {'lookups': 0, 'lookup_ms': 0.0, 'max_lookup_ms': 0.0}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ids)
+
+    @property
+    def use_numpy(self):
+        """是否使用 NumPy 计分（首次访问时导入）"""
+        return self._use_numpy and _numpy() is not None
+
+    def add(self, topic, value):
+        """
+        添加话题（同一话题与值重复添加时忽略）
+
+        Args:
+            topic: 话题
+            value: 关联的值（如学习记录名称），需可哈希
+        """
+        normalized = normalize_topic(topic)
+        if not normalized:
+            return
+        grams = topic_ngrams(normalized)
+        norm = math.sqrt(sum(c * c for c in grams.values()))
+        with self._lock:
+            if (normalized, value) in self._ids:
+                return
+            doc_id = len(self._entries)
+            self._entries.append((topic, value, normalized))
+            self._ids[(normalized, value)] = doc_id
+            self._by_value.setdefault(value, set()).add(doc_id)
+            for gram, count in grams.items():
+                posting = self._postings.get(gram)
+                if posting is None:
+                    posting = self._postings[gram] = (array('i'), array('f'))
+                posting[0].append(doc_id)
+                posting[1].append(count / norm)
+
+    def remove(self, value):
+        """删除关联该值的所有话题（倒排表中的条目在查询时跳过）"""
+        with self._lock:
+            for doc_id in self._by_value.pop(value, ()):
+                self._ids.pop((self._entries[doc_id][2], value), None)
+                self._entries[doc_id] = None
+
+    def search(self, topic, limit=1, threshold=0.0, accept=None):
+        """
+        查找最相似的话题
+
+        Args:
+            topic: 查询话题
+            limit: 最多返回条数
+            threshold: 最低相似度（0-1）
+            accept: 过滤候选的函数，调用方式为 accept(值) -> bool，只对达到阈值的候选调用
+
+        Returns:
+            list: (相似度, 话题, 值)，按相似度从高到低
+        """
+        normalized = normalize_topic(topic)
+        if not normalized:
+            return []
+        started_at = time.perf_counter()
+        grams = topic_ngrams(normalized)
+        norm = math.sqrt(sum(c * c for c in grams.values()))
+        query = {gram: count / norm for gram, count in grams.items()}
+        # 浮点误差（权重以单精度保存）可能使完全相同的话题略低于 1，阈值留出余量
+        threshold = max(threshold - 1e-5, 1e-9)
+        with self._lock:
+            if self.use_numpy:
+                ranked = self._score_numpy(query, threshold)
+            else:
+                ranked = self._score_python(query, threshold)
+            candidates = [(min(score, 1.0),) + self._entries[doc_id][:2]
+                          for score, doc_id in ranked if self._entries[doc_id] is not None]
+            elapsed_ms = (time.perf_counter() - started_at) * 1000
+            self._stats['lookups'] += 1
+            self._stats['lookup_ms'] += elapsed_ms
+            self._stats['max_lookup_ms'] = max(self._stats['max_lookup_ms'], elapsed_ms)
+        results = []
+        for candidate in candidates:
+            if accept is None or accept(candidate[2]):
+                results.append(candidate)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def _score_python(self, query, threshold):
+        scores = {}
+        for gram, weight in query.items():
+            posting = self._postings.get(gram)
+            if posting is None:
+                continue
+            for doc_id, doc_weight in zip(*posting):
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * doc_weight
+        ranked = [(score, doc_id) for doc_id, score in scores.items() if score >= threshold]
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        return ranked
+
+    def _score_numpy(self, query, threshold):
+        numpy = _numpy()
+        ids, weights = [], []
+        for gram, weight in query.items():
+            posting = self._postings.get(gram)
+            if posting is None:
+                continue
+            ids.append(numpy.frombuffer(posting[0], dtype=numpy.int32))
+            weights.append(numpy.frombuffer(posting[1], dtype=numpy.float32) * weight)
+        if not ids:
+            return []
+        scores = numpy.bincount(numpy.concatenate(ids), weights=numpy.concatenate(weights),
+                                minlength=len(self._entries))
+        top = numpy.flatnonzero(scores >= threshold)
+        top = top[numpy.argsort(-scores[top], kind='stable')]
+        return [(float(scores[i]), int(i)) for i in top]
+
+    def stats(self):
+        """话题数与查询耗时统计（毫秒）"""
+        with self._lock:
+            lookups = self._stats['lookups']
+            return {
+                'topics': len(self._ids),
+                'ngrams': len(self._postings),
+                'numpy': self.use_numpy,
+                'lookups': lookups,
+                'avg_lookup_ms': round(self._stats['lookup_ms'] / lookups, 3) if lookups else 0.0,
+                'max_lookup_ms': round(self._stats['max_lookup_ms'], 3)
+            }
@@ -0,0 +1,177 @@
+import re
+import heapq
+import operator
+import bisect
+import threading
+import unicodedata
+
+CJK_RE = re.compile(r'[㐀-鿿]')
+
+# 查询结果缓存的最大条数（话题增删时清空）
+CACHE_SIZE = 4096
+# 待合并前缀键不超过该数量时逐个插入，否则整体排序
+INSERT_LIMIT = 64
+
+_rank = operator.itemgetter('rank')
+
+_UNLOADED = object()
+_pinyin_module = _UNLOADED
+
+
+def _pinyin():
+    """
+    首次登记中文话题时才导入 pypinyin（其词典加载较慢，不拖慢启动）
+
+    pypinyin 见 requirements.txt（随程序打包）；缺少时返回 None，中文话题只能按汉字前缀匹配
+    """
+    global _pinyin_module
+    if _pinyin_module is _UNLOADED:
+        try:
+            import pypinyin
+        except ImportError:
+            pypinyin = None
+        _pinyin_module = pypinyin
+    return _pinyin_module
+
+
+def normalize_prefix(text):
+    """全角转半角、小写并合并空白"""
+    return ' '.join(unicodedata.normalize('NFKC', text or '').lower().split())
+
+
+def prefix_keys(normalized):
+    """
+    话题的所有可匹配前缀键
+
+    包括完整话题、每个单词开头的后缀（"check" 可匹配 "airport check-in"），
+    中文话题安装 pypinyin 时还包括全拼与首字母（"jichang"、"jczj"）
+    """
+    keys = {normalized}
+    for i, char in enumerate(normalized):
+        if char == ' ':
+            keys.add(normalized[i + 1:])
+    pypinyin = _pinyin() if CJK_RE.search(normalized) else None
+    if pypinyin is not None:
+        keys.add(''.join(pypinyin.lazy_pinyin(normalized)).replace(' ', ''))
+        keys.add(''.join(pypinyin.lazy_pinyin(normalized, style=pypinyin.Style.FIRST_LETTER)).replace(' ', ''))
+    return keys
+
+
+class TopicSuggester:
+    """
+    话题输入提示 - 有序前缀键数组 + 二分查找
+
+    话题来自学习记录，按课程数与请求次数排序；保存与删除课程时增量更新。
+    新增的前缀键先追加到待合并列表，下次查询时一次排序合并（启动时批量登记无需逐个插入）；
+    查询时对前缀范围内的全部话题排序后再截取（很短的前缀范围较大，结果按前缀缓存），
+    缓存在话题增删时清空（请求热度的变化在下次增删后生效）
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._topics = {}  # 规范化话题 -> {'topic', 'lessons': {课程名称}, 'hits', 'rank'}
+        self._lessons = {}  # 课程名称 -> 规范化话题
+        self._keys = []  # 有序的 (前缀键, 规范化话题)
+        self._pending = []  # 待合并的 (前缀键, 规范化话题)
+        self._cache = {}  # (前缀, 条数) -> 话题列表
+
+    def __len__(self):
+        with self._lock:
+            return len(self._topics)
+
+    def add(self, topic, name):
+        """
+        登记课程的话题（新话题插入前缀键，同一课程重复登记时忽略）
+
+        Args:
+            topic: 话题
+            name: 学习记录名称
+        """
+        normalized = normalize_prefix(topic)
+        if not normalized:
+            return
+        with self._lock:
+            if self._lessons.get(name) == normalized:
+                return
+            self._remove(name)
+            entry = self._topics.get(normalized)
+            if entry is None:
+                entry = self._topics[normalized] = {'topic': topic.strip(), 'lessons': set(), 'hits': 0.0}
+                self._pending.extend((key, normalized) for key in prefix_keys(normalized))
+            entry['lessons'].add(name)
+            self._lessons[name] = normalized
+            self._update_rank(entry)
+            self._cache.clear()
+
+    def remove(self, name):
+        """移除课程（话题没有其他课程时删除前缀键）"""
+        with self._lock:
+            self._remove(name)
+
+    def _remove(self, name):
+        normalized = self._lessons.pop(name, None)
+        if normalized is None:
+            return
+        entry = self._topics[normalized]
+        entry['lessons'].discard(name)
+        self._update_rank(entry)
+        self._cache.clear()
+        if not entry['lessons']:
+            del self._topics[normalized]
+            self._merge()
+            for key in prefix_keys(normalized):
+                i = bisect.bisect_left(self._keys, (key, normalized))
+                if i < len(self._keys) and self._keys[i] == (key, normalized):
+                    del self._keys[i]
+
+    def touch(self, topic, weight=1.0):
+        """记录已有话题的请求热度（没有课程的话题不记录）"""
+        with self._lock:
+            entry = self._topics.get(normalize_prefix(topic))
+            if entry is not None:
+                entry['hits'] += weight
+                self._update_rank(entry)
+
+    def suggest(self, prefix, limit=8):
+        """
+        按前缀查找话题
+
+        Args:
+            prefix: 输入的前缀（英文、汉字或拼音）
+            limit: 最多返回条数
+
+        Returns:
+            list: 话题，按课程数与请求次数从高到低
+        """
+        query = normalize_prefix(prefix)
+        if not query:
+            return []
+        with self._lock:
+            cached = self._cache.get((query, limit))
+            if cached is not None:
+                return list(cached)
+            self._merge()
+            start = bisect.bisect_left(self._keys, (query,))
+            end = bisect.bisect_left(self._keys, (query + '\U0010ffff',), start)
+            matched = {self._keys[i][1] for i in range(start, end)}
+            best = heapq.nsmallest(limit, (self._topics[normalized] for normalized in matched), key=_rank)
+            result = [entry['topic'] for entry in best]
+            if len(self._cache) >= CACHE_SIZE:
+                self._cache.clear()
+            self._cache[(query, limit)] = result
+        return list(result)
+
+    @staticmethod
+    def _update_rank(entry):
+        """排序键：课程数与请求次数之和从高到低，相同时较短的话题在前"""
+        entry['rank'] = (-(len(entry['lessons']) + entry['hits']), len(entry['topic']), entry['topic'])
+
+    def _merge(self):
+        """将待合并的前缀键并入有序数组（调用方持有锁）"""
+        if len(self._pending) <= INSERT_LIMIT:
+            for item in self._pending:
+                bisect.insort(self._keys, item)
+        else:
+            self._keys.extend(self._pending)
+            self._keys.sort()
+        self._pending = []
@@ -1,22 +1,163 @@
 import os
 import uuid
-import dashscope
-from dashscope.audio.tts_v2 import SpeechSynthesizer
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import as_completed
 from backend.config import Config
+from backend.utils import atomic_write
+from backend.aio import run_sync, submit_limited
+from backend.services.key_pool import ApiKeyPool, NoApiKeyError, classify_error
+from backend.retry import RetryPolicy, RetryBudget
+
+# 单句合成的最长等待时间（秒）
+SYNTHESIS_TIMEOUT = 120
+
+# SDK 构造合成器时读取全局 dashscope.api_key：构造期间临时换成本次请求的 Key，需串行
+_sdk_key_lock = threading.Lock()
+
+# 音频编码 -> (文件扩展名, MIME 类型)
+AUDIO_FORMATS = {
+    'mp3': ('mp3', 'audio/mpeg'),
+    'opus': ('ogg', 'audio/ogg'),
+    'wav': ('wav', 'audio/wav'),
+}
+# 此前所有音频使用的格式（SDK 默认输出）：该格式的文件名不带格式后缀，已合成的音频继续有效
+DEFAULT_PROFILE = ('mp3', 22050, 256)
+
+
+def profile_suffix(profile):
+    """
+    音频配置的文件名后缀
+
+    Returns:
+        str: 默认格式为 '.mp3'，其余例如 ('opus', 24000, 32) -> '-opus_24000_32.ogg'
+    """
+    ext = AUDIO_FORMATS[profile[0]][0]
+    if tuple(profile) == DEFAULT_PROFILE:
+        return f'.{ext}'
+    return '-{}_{}_{}.{}'.format(*profile, ext)
+
+
+def profile_kbps(profile):
+    """音频配置的实际码率（kbps，wav 配置的第三项为位深）"""
+    fmt, sample_rate, bitrate = profile
+    return sample_rate * bitrate // 1000 if fmt == 'wav' else bitrate
+
+
+def filename_profile(filename):
+    """由文件名解析音频配置（不带格式后缀的文件为默认格式），无法解析时返回 None"""
+    stem, _, ext = filename.rpartition('.')
+    if '-' not in stem:
+        return DEFAULT_PROFILE if ext == AUDIO_FORMATS[DEFAULT_PROFILE[0]][0] else None
+    parts = stem.rpartition('-')[2].split('_')
+    if len(parts) != 3 or parts[0] not in AUDIO_FORMATS or not (parts[1].isdigit() and parts[2].isdigit()):
+        return None
+    return parts[0], int(parts[1]), int(parts[2])
+
+
+def audio_alternatives(filename, profiles):
+    """
+    同一音频在其他配置下的文件名（内容寻址部分相同，只有格式后缀不同）
+
+    Returns:
+        list: [(文件名, 音频配置)]，按传入顺序，不含 filename 本身
+    """
+    stem = filename.rpartition('.')[0].partition('-')[0]
+    result = []
+    for profile in profiles:
+        if profile[0] in AUDIO_FORMATS and stem + profile_suffix(profile) != filename:
+            result.append((stem + profile_suffix(profile), tuple(profile)))
+    return result
+
+
+def sdk_audio_format(profile):
+    """
+    音频配置对应的 SDK AudioFormat
+
+    Raises:
+        ValueError: CosyVoice 不支持该组合
+    """
+    from dashscope.audio.tts_v2 import AudioFormat
+    for audio_format in AudioFormat:
+        fmt, sample_rate, _, bitrate = audio_format.value
+        if (fmt, sample_rate, bitrate) == tuple(profile):
+            return audio_format
+    # InvalidParameter 为不重试的错误
+    raise ValueError('InvalidParameter: unsupported audio format {} {}Hz {}kbps'.format(*profile))
+
+
+def stop_synthesizer(loop, synthesizer):
+    """
+    超时、出错或被取消时停止合成器：通知服务端取消任务并关闭 WebSocket，
+    SDK 的接收线程随之退出（在线程池中执行，不阻塞事件循环，也不等待结果）
+    """
+    def stop():
+        try:
+            synthesizer.streaming_cancel(complete_timeout_millis=1000)
+        except Exception:
+            pass
+        try:
+            synthesizer.close()
+        except Exception as e:
+            print(f"⚠️ 关闭语音合成连接失败: {e}")
+
+    try:
+        loop.run_in_executor(None, stop)
+    except RuntimeError:
+        # 事件循环已关闭（停机中），直接在当前线程关闭
+        stop()
 
 
 class TTSService:
     """TTS语音合成服务 - 使用 CosyVoice 模型"""
     
-    def __init__(self, api_key=None, model=None):
+    def __init__(self, api_key=None, model=None, key_pool=None, retry=None):
         self.api_key = api_key or Config.DASHSCOPE_API_KEY
-        dashscope.api_key = self.api_key
+        # 每次请求从 Key 池中选择 Key（通过请求头传递，不依赖 dashscope 全局 api_key）
+        self.key_pool = key_pool or ApiKeyPool([self.api_key])
         self.model = model or Config.TTS_MODEL
+        # 瞬时故障按指数退避重试，避免一次网络抖动让句子永久没有音频
+        self.retry = retry or RetryPolicy()
         self.audio_dir = Config.AUDIO_DIR
+        # 默认音频格式（单次请求可通过 profile 参数选择其他格式）
+        self.audio_format = Config.TTS_FORMAT
+        self.sample_rate = Config.TTS_SAMPLE_RATE
+        self.bitrate = Config.TTS_BITRATE
+    
+    def resolve_profile(self, profile=None):
+        """
+        解析音频配置
+        
+        Args:
+            profile: None（默认格式）、配置名称（见 Config.AUDIO_PROFILES）或 (编码, 采样率, 码率)
+            
+        Returns:
+            tuple: (编码, 采样率, 码率)
+            
+        Raises:
+            ValueError: 未知的配置名称或编码
+        """
+        if profile is None:
+            profile = (self.audio_format, self.sample_rate, self.bitrate)
+        elif isinstance(profile, str):
+            if profile not in Config.AUDIO_PROFILES:
+                raise ValueError(f'Unknown audio profile: {profile}')
+            profile = Config.AUDIO_PROFILES[profile]
+        fmt, sample_rate, bitrate = profile
+        if fmt not in AUDIO_FORMATS:
+            raise ValueError(f'Unsupported audio format: {fmt}')
+        return fmt, int(sample_rate), int(bitrate)
         
-    def synthesize(self, text, voice='longxiaochun_v2', output_filename=None):
+    def synthesize(self, text, voice='longxiaochun_v2', output_filename=None, budget=None, **options):
+        """将文本转换为语音（同步包装，见 asynthesize）"""
+        return run_sync(self.asynthesize(text, voice=voice, output_filename=output_filename, budget=budget, **options))
+    
+    async def asynthesize(self, text, voice='longxiaochun_v2', output_filename=None, budget=None, **options):
         """
-        将文本转换为语音
+        将文本转换为语音（异步，在共享事件循环上与其他请求复用）
+        
+        瞬时故障（连接断开、超时、限流）按重试策略退避重试
         
         Args:
             text: 要合成的文本
@@ -25,32 +166,64 @@ class TTSService:
                    - cosyvoice-v2: longxiaochun_v2, longxiaocheng_v2 等
                    - cosyvoice-v3: longanyang, longmoxin 等
             output_filename: 输出文件名（可选）
+            budget: 重试预算（同一节课的所有句子共享，可选）
+            **options: 合成参数：profile 音频配置（见 resolve_profile），
+                       其余（如 speech_rate 语速，0.5-2.0）原样传给合成器
             
         Returns:
-            dict: 包含音频文件路径和URL的信息
+            dict: 包含音频文件路径和URL的信息，经重试成功时 attempts 大于 1
         """
+        try:
+            profile = self.resolve_profile(options.get('profile'))
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
         if not output_filename:
-            output_filename = f"{uuid.uuid4().hex}.mp3"
+            output_filename = uuid.uuid4().hex + profile_suffix(profile)
         
+        attempt = 0
+        while True:
+            result = await self._synthesize_once(text, voice, output_filename, **options)
+            if result['success']:
+                self.retry.succeeded(attempt)
+                result['attempts'] = attempt + 1
+                return result
+            delay = self.retry.next_delay(attempt, message=result['error'], budget=budget)
+            if delay is None:
+                return result
+            print(f"🔁 语音合成失败，{delay:.1f} 秒后重试: {result['error']}")
+            await asyncio.sleep(delay)
+            attempt += 1
+    
+    async def _synthesize_once(self, text, voice, output_filename, **options):
+        """单次合成请求"""
         output_path = os.path.join(self.audio_dir, output_filename)
         
         # 直接使用用户提供的音色名称
         voice_code = voice
         
         try:
-            # 实例化 SpeechSynthesizer
-            synthesizer = SpeechSynthesizer(
-                model=self.model,
-                voice=voice_code
-            )
+            api_key = self.key_pool.acquire()
+        except NoApiKeyError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+        key_error = None
+        loop = asyncio.get_running_loop()
+        synthesizer = None
+        finished = False
+        
+        try:
+            synthesizer, done = self._create_synthesizer(voice_code, loop, api_key, **options)
             
-            # 发送待合成文本，获取二进制音频
-            audio = synthesizer.call(text)
+            # 建立连接需要短暂阻塞，放到线程池执行；音频数据随后通过回调送回事件循环
+            await loop.run_in_executor(None, synthesizer.call, text)
+            audio = await asyncio.wait_for(done, SYNTHESIS_TIMEOUT)
+            finished = True
             
             if audio:
-                # 将音频保存至本地
-                with open(output_path, 'wb') as f:
-                    f.write(audio)
+                # 将音频保存至本地（原子写入，避免读到写了一半的文件）
+                atomic_write(output_path, audio)
                 
                 # 获取性能指标
                 request_id = synthesizer.get_last_request_id()
@@ -65,6 +238,7 @@ class TTSService:
                     'voice': voice,
                     'voice_code': voice_code,
                     'model': self.model,
+                    **options,
                     'request_id': request_id,
                     'first_package_delay_ms': first_package_delay
                 }
@@ -74,39 +248,207 @@ class TTSService:
                     'error': 'TTS synthesis failed: no audio data returned'
                 }
                 
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
+            key_error = classify_error(message=str(e))
             return {
                 'success': False,
-                'error': str(e)
+                'error': str(e) or type(e).__name__
             }
+        finally:
+            if synthesizer is not None and not finished:
+                stop_synthesizer(loop, synthesizer)
+            self.key_pool.release(api_key, key_error)
     
-    def synthesize_dialogue(self, dialogue_list, voice_a='longxiaochun_v2', voice_b='longxiaocheng_v2'):
+    def _create_synthesizer(self, voice_code, loop, api_key, **options):
         """
-        为对话列表生成语音
+        创建回调模式的合成器
+        
+        Returns:
+            tuple: (synthesizer, future) - future 在合成完成时得到完整音频
+        """
+        # 延迟导入 dashscope，避免拖慢服务启动
+        import dashscope
+        from dashscope.audio.tts_v2 import SpeechSynthesizer, ResultCallback
+        audio_format = sdk_audio_format(self.resolve_profile(options.pop('profile', None)))
+        
+        done = loop.create_future()
+        chunks = []
+        
+        def settle(result=None, error=None):
+            if done.done():
+                return
+            if error is not None:
+                done.set_exception(error)
+            else:
+                done.set_result(result)
+        
+        class Collector(ResultCallback):
+            def on_data(self, data):
+                chunks.append(data)
+            
+            def on_complete(self):
+                loop.call_soon_threadsafe(settle, b''.join(chunks))
+            
+            def on_error(self, message):
+                loop.call_soon_threadsafe(settle, None, RuntimeError(f'TTS synthesis failed: {message}'))
+            
+            def on_close(self):
+                loop.call_soon_threadsafe(settle, None, RuntimeError('TTS connection closed before completion'))
+        
+        # SDK 要求构造时存在全局 Key 并将其记入请求：构造期间临时使用本次的 Key，随即恢复，
+        # 全局 Key 不会被设置为池中的某个 Key
+        with _sdk_key_lock:
+            default_key = dashscope.api_key
+            dashscope.api_key = api_key
+            try:
+                synthesizer = SpeechSynthesizer(
+                    model=self.model,
+                    voice=voice_code,
+                    format=audio_format,
+                    headers={'Authorization': f'Bearer {api_key}'},
+                    callback=Collector(),
+                    **options
+                )
+            finally:
+                dashscope.api_key = default_key
+        return synthesizer, done
+    
+    def audio_filename(self, text, voice, prefix='tts', profile=None, **options):
+        """
+        按内容寻址的音频文件名（模型 + 音色 + 文本 + 合成参数相同则文件名相同）
+        
+        同一句子不同音频格式的文件名只有格式后缀不同
         
         Args:
-            dialogue_list: 对话列表，每项包含text和speaker
-            voice_a: 说话人A的音色 (默认: longxiaochun_v2)
-            voice_b: 说话人B的音色 (默认: longxiaocheng_v2)
+            text: 合成文本
+            voice: 音色名称
+            prefix: 文件名前缀
+            profile: 音频配置（默认: 服务的默认格式）
+            **options: 合成参数（如 speech_rate），不同参数的音频分别缓存
             
         Returns:
-            list: 每个对话项的语音信息
+            str: 例如 dialogue_3f2a9c1b0d4e5f60.mp3、dialogue_3f2a9c1b0d4e5f60-opus_24000_32.ogg
+        
+        Raises:
+            ValueError: 未知的音频配置
+        """
+        key = f'{self.model}|{voice}|{text}'
+        # 不带合成参数时文件名不变（已合成的音频继续有效）
+        for name, value in sorted(options.items()):
+            key += f'|{name}={value}'
+        suffix = profile_suffix(self.resolve_profile(profile))
+        return f"{prefix}_{hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]}{suffix}"
+    
+    def _cached(self, text, voice, prefix, **options):
+        """已合成过的音频信息，不存在时返回 (文件名, None)"""
+        filename = self.audio_filename(text, voice, prefix=prefix, **options)
+        filepath = os.path.join(self.audio_dir, filename)
+        if not os.path.exists(filepath):
+            return filename, None
+        return filename, {
+            'success': True,
+            'filename': filename,
+            'filepath': filepath,
+            'url': self.get_audio_url(filename),
+            'text': text,
+            'voice': voice,
+            'model': self.model,
+            **options,
+            'cached': True
+        }
+    
+    def synthesize_cached(self, text, voice='longxiaochun_v2', prefix='tts', budget=None, **options):
+        """
+        合成语音，相同内容已合成过时直接复用已有文件
+        
+        Returns:
+            dict: 同 synthesize，复用时 cached 为 True
+        """
+        try:
+            filename, cached = self._cached(text, voice, prefix, **options)
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
+        if cached:
+            return cached
+        result = self.synthesize(text, voice=voice, output_filename=filename, budget=budget, **options)
+        result['cached'] = False
+        return result
+    
+    async def asynthesize_cached(self, text, voice='longxiaochun_v2', prefix='tts', budget=None, **options):
+        """synthesize_cached 的异步版本"""
+        try:
+            filename, cached = self._cached(text, voice, prefix, **options)
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
+        if cached:
+            return cached
+        result = await self.asynthesize(text, voice=voice, output_filename=filename, budget=budget, **options)
+        result['cached'] = False
+        return result
+    
+    def iter_synthesize_dialogue(self, dialogue_list, voice_a='longxiaochun_v2', voice_b='longxiaocheng_v2',
+                                 max_workers=None):
+        """
+        并发为对话列表生成语音，按完成顺序逐条返回结果
+        
+        输出文件按内容哈希命名，并发请求之间不会互相覆盖，相同句子直接复用
+        
+        Args:
+            dialogue_list: 对话列表，每项包含text和speaker
+            voice_a: 说话人A的音色
+            voice_b: 说话人B的音色
+            max_workers: 最大并发数 (默认: Config.TTS_MAX_CONCURRENCY)
+            
+        Yields:
+            dict: 单条语音信息，包含 index 和 speaker
         """
-        results = []
+        if not dialogue_list:
+            return
+        workers = max(1, min(max_workers or Config.TTS_MAX_CONCURRENCY, len(dialogue_list)))
         
+        # 同一请求中相同的句子和音色只合成一次
+        groups = {}  # (text, voice) -> [(index, speaker)]
         for i, item in enumerate(dialogue_list):
             text = item.get('text', '')
             speaker = item.get('speaker', 'A')
-            
             # 根据说话人选择音色
             voice = voice_a if speaker == 'A' else voice_b
+            groups.setdefault((text, voice), []).append((i, speaker))
+        
+        # 所有句子在共享事件循环上并发合成，最多 workers 个同时进行，共享一份重试预算
+        budget = RetryBudget()
+        futures = dict(zip(
+            submit_limited([self.asynthesize_cached(text, voice, 'dialogue', budget) for text, voice in groups], workers),
+            groups.values()
+        ))
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                for i, speaker in futures[future]:
+                    yield dict(result, index=i, speaker=speaker)
+        finally:
+            # 调用方提前结束迭代（如客户端断开）时取消未完成的合成
+            for future in futures:
+                future.cancel()
+    
+    def synthesize_dialogue(self, dialogue_list, voice_a='longxiaochun_v2', voice_b='longxiaocheng_v2',
+                            max_workers=None):
+        """
+        为对话列表生成语音
+        
+        Args:
+            dialogue_list: 对话列表，每项包含text和speaker
+            voice_a: 说话人A的音色 (默认: longxiaochun_v2)
+            voice_b: 说话人B的音色 (默认: longxiaocheng_v2)
+            max_workers: 最大并发数 (默认: Config.TTS_MAX_CONCURRENCY)
             
-            filename = f"dialogue_{i:03d}_{speaker}.mp3"
-            result = self.synthesize(text, voice=voice, output_filename=filename)
-            result['index'] = i
-            result['speaker'] = speaker
-            results.append(result)
-            
+        Returns:
+            list: 每个对话项的语音信息（按对话顺序）
+        """
+        results = list(self.iter_synthesize_dialogue(dialogue_list, voice_a, voice_b, max_workers))
+        results.sort(key=lambda r: r['index'])
         return results
     
     def get_audio_url(self, filename):
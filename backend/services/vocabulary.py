@@ -0,0 +1,141 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import wait
+from backend.config import Config
+from backend.aio import submit_limited
+
+
+def word_key(word):
+    """词汇发音的键：合并空白，非全大写的词转小写（"Check-in" 与 "check-in" 共用发音，"ATM" 保持原样）"""
+    word = ' '.join((word or '').split())
+    return word if word.isupper() else word.lower()
+
+
+class VocabularyAudio:
+    """
+    词汇发音库 - 所有课程共享的关键词音频
+
+    音频按（模型 + 音色 + 词汇）内容寻址保存，每个词汇与音色只合成一次；
+    同时请求同一个词汇的课程等待同一次合成
+    """
+
+    def __init__(self, get_tts, voice=None):
+        """
+        Args:
+            get_tts: 获取 TTS 服务，调用方式为 get_tts() -> TTSService（服务未就绪时为 None）
+            voice: 词汇发音的音色 (默认: Config.VOCAB_VOICE)
+        """
+        self._get_tts = get_tts
+        self.voice = voice or Config.VOCAB_VOICE
+        self._lock = threading.Lock()
+        self._urls = {}  # (词汇键, 音色) -> 音频地址
+        self._inflight = {}  # (词汇键, 音色) -> asyncio.Task（只在事件循环线程中访问）
+        self._stats = {'hits': 0, 'synthesized': 0, 'joined': 0, 'failed': 0}
+
+    def lookup(self, word, voice=None):
+        """
+        已合成的词汇发音地址（不合成）
+
+        Returns:
+            str: 音频地址，未合成过时返回 None
+        """
+        key = (word_key(word), voice or self.voice)
+        with self._lock:
+            url = self._urls.get(key)
+        if url is not None:
+            return url
+        tts = self._get_tts()
+        if tts is None:
+            return None
+        filename = tts.audio_filename(key[0], key[1], prefix='word')
+        if not os.path.exists(os.path.join(tts.audio_dir, filename)):
+            return None
+        url = tts.get_audio_url(filename)
+        with self._lock:
+            self._urls[key] = url
+        return url
+
+    async def asynthesize(self, word, voice=None, budget=None):
+        """
+        合成词汇发音（已合成过时直接返回，同一词汇的并发请求只合成一次）
+
+        Returns:
+            dict: 同 TTSService.asynthesize_cached
+        """
+        key = (word_key(word), voice or self.voice)
+        with self._lock:
+            url = self._urls.get(key)
+            if url is not None:
+                self._stats['hits'] += 1
+                return {'success': True, 'url': url, 'text': key[0], 'voice': key[1], 'cached': True}
+        task = self._inflight.get(key)
+        if task is not None:
+            with self._lock:
+                self._stats['joined'] += 1
+            return await asyncio.shield(task)
+
+        tts = self._get_tts()
+        if tts is None:
+            return {'success': False, 'error': 'TTS service not initialized'}
+        task = asyncio.ensure_future(tts.asynthesize_cached(key[0], key[1], 'word', budget))
+        self._inflight[key] = task
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._inflight.pop(key, None)
+            else:
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        with self._lock:
+            if result.get('success'):
+                self._urls[key] = result['url']
+                self._stats['hits' if result.get('cached') else 'synthesized'] += 1
+            else:
+                self._stats['failed'] += 1
+        return result
+
+    def fill(self, keywords, voice=None, budget=None):
+        """
+        为关键词列表补齐发音（就地设置 audio_url）
+
+        audio_url 只来自发音库：关键词中已有的地址（如客户端提交的内容）一律丢弃后重新查找。
+        已合成过的词汇直接复用，其余不同的词汇在共享事件循环上并发合成；
+        合成失败的词汇不设置 audio_url，下次出现时再合成
+
+        Args:
+            keywords: 关键词列表
+            voice: 音色 (默认: 词汇发音库的音色)
+            budget: 重试预算（可选）
+
+        Returns:
+            int: 仍缺少发音的关键词数
+        """
+        missing = {}
+        for kw in keywords:
+            kw.pop('audio_url', None)
+            if kw.get('word'):
+                url = self.lookup(kw['word'], voice)
+                if url:
+                    kw['audio_url'] = url
+                else:
+                    missing.setdefault(word_key(kw['word']), []).append(kw)
+        if not missing or self._get_tts() is None:
+            return sum(len(items) for items in missing.values())
+        futures = submit_limited([self.asynthesize(word, voice, budget) for word in missing],
+                                 Config.TTS_MAX_CONCURRENCY)
+        wait(futures)
+        remaining = 0
+        for items, future in zip(missing.values(), futures):
+            result = future.result() if not future.cancelled() and future.exception() is None else {}
+            for kw in items:
+                if result.get('success'):
+                    kw['audio_url'] = result['url']
+                else:
+                    remaining += 1
+        return remaining
+
+    def stats(self):
+        """词汇数与复用/合成统计"""
+        with self._lock:
+            return dict(self._stats, words=len(self._urls))
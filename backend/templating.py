@@ -0,0 +1,216 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from backend.compression import precompress, choose_encoding
+
+# 模板与静态资源随 backend 目录一起打包（PyInstaller datas 中包含 backend）
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+
+# 带指纹的资源内容不变，可长期缓存
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# 页面需要每次校验 ETag，内容未变时返回 304
+PAGE_CACHE_CONTROL = 'no-cache'
+
+ASSET_MIMETYPES = {
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8',
+}
+
+
+class CachedContent:
+    """预渲染内容：原始字节、预压缩的 gzip/brotli 字节与 ETag"""
+
+    def __init__(self, body, mimetype):
+        self.variants = precompress(body)
+        self.etag = hashlib.sha256(body).hexdigest()[:16]
+        self.mimetype = mimetype
+
+    @property
+    def body(self):
+        return self.variants['identity']
+
+
+def send_cached(content, cache_control=PAGE_CACHE_CONTROL):
+    """
+    发送预渲染内容，支持 ETag/304 与 Accept-Encoding 协商
+
+    Args:
+        content: CachedContent 实例
+        cache_control: Cache-Control 响应头
+
+    Returns:
+        flask.Response
+    """
+    from flask import request, Response
+
+    encoding = choose_encoding(request.accept_encodings, content.variants)
+    # 不同编码的字节不同，ETag 也需区分
+    etag = content.etag if encoding == 'identity' else f'{content.etag}-{encoding}'
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(content.variants[encoding], mimetype=content.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+class AssetRegistry:
+    """静态资源注册表 - 计算内容指纹，生成 name.<hash>.ext 形式的 URL"""
+
+    def __init__(self, assets_dir=ASSETS_DIR):
+        self.assets_dir = assets_dir
+        self._lock = threading.Lock()
+        self._assets = {}  # name -> CachedContent
+
+    def get(self, name):
+        """读取资源（首次读取后缓存）"""
+        with self._lock:
+            content = self._assets.get(name)
+            if content is None:
+                path = os.path.join(self.assets_dir, name)
+                with open(path, 'rb') as f:
+                    body = f.read()
+                mimetype = ASSET_MIMETYPES.get(os.path.splitext(name)[1], 'application/octet-stream')
+                content = CachedContent(body, mimetype)
+                self._assets[name] = content
+            return content
+
+    def url(self, name):
+        """带指纹的资源 URL，例如 /assets/index.3f2a9c1b0d.css"""
+        stem, ext = os.path.splitext(name)
+        return f'/assets/{stem}.{self.get(name).etag[:10]}{ext}'
+
+    def resolve(self, filename):
+        """
+        解析带指纹的文件名
+
+        Returns:
+            tuple: (CachedContent, 指纹是否为当前版本)，资源不存在时返回 (None, False)
+        """
+        parts = filename.split('.')
+        if len(parts) == 3:
+            name, fingerprint = f'{parts[0]}.{parts[2]}', parts[1]
+        else:
+            name, fingerprint = filename, None
+        if os.path.basename(name) != name or not os.path.isfile(os.path.join(self.assets_dir, name)):
+            return None, False
+        content = self.get(name)
+        return content, fingerprint == content.etag[:10]
+
+    def clear(self):
+        with self._lock:
+            self._assets.clear()
+
+
+assets = AssetRegistry()
+
+jinja_env = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=select_autoescape(['html']),
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+jinja_env.globals['asset_url'] = assets.url
+
+
+class PageCache:
+    """静态页面缓存 - 模板只编译渲染一次，之后直接返回字节"""
+
+    def __init__(self, env=jinja_env):
+        self.env = env
+        self._lock = threading.Lock()
+        self._pages = {}  # template name -> CachedContent
+
+    def get(self, template_name):
+        with self._lock:
+            content = self._pages.get(template_name)
+            if content is None:
+                html = self.env.get_template(template_name).render()
+                content = CachedContent(html.encode('utf-8'), 'text/html; charset=utf-8')
+                self._pages[template_name] = content
+            return content
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+
+pages = PageCache()
+
+
+class RenderCache:
+    """渲染结果 LRU 缓存 - 每项带版本号（如记录修改时间），版本变化时重新渲染"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._items = OrderedDict()  # key -> (version, CachedContent)
+
+    def get(self, key, version, build):
+        """
+        获取缓存内容，未命中或版本过期时调用 build() 渲染
+
+        Args:
+            key: 缓存键
+            version: 内容版本号
+            build: 返回 CachedContent 的渲染函数
+        """
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None and entry[0] == version:
+                self._items.move_to_end(key)
+                return entry[1]
+        content = build()
+        with self._lock:
+            self._items[key] = (version, content)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return content
+
+    def invalidate(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+def stream_lesson(topic, dialogue, keywords, pending_audio=(), rates=()):
+    """
+    逐块渲染学习页面（内容自动 HTML 转义，样式引用共享的 learn.css）
+
+    Args:
+        topic: 对话话题
+        dialogue: 对话列表
+        keywords: 关键词列表
+        pending_audio: 音频正在后台补齐的句子序号
+        rates: 有音频的句子可选的慢速倍率（为空时不显示语速按钮）
+
+    Returns:
+        generator: 依次产出 HTML 片段
+    """
+    template = jinja_env.get_template('learn.html')
+    return template.generate(topic=topic, dialogue=dialogue, keywords=keywords, pending_audio=set(pending_audio),
+                             rates=rates)
+
+
+def render_lesson(topic, dialogue, keywords, pending_audio=(), rates=()):
+    """渲染完整的学习页面 HTML"""
+    return ''.join(stream_lesson(topic, dialogue, keywords, pending_audio, rates))
+
+
+def render_lesson_content(record, rates=()):
+    """将学习记录渲染为可缓存的页面内容（同时生成预压缩版本）"""
+    html = render_lesson(record.get('topic', ''), record.get('dialogue', []), record.get('keywords', []),
+                         record.get('pending_audio') or (), rates)
+    return CachedContent(html.encode('utf-8'), 'text/html; charset=utf-8')
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+共享事件循环单元测试
+"""
+import unittest
+import os
+import sys
+import asyncio
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.aio import run_sync, submit, submit_limited
+
+
+class TestAio(unittest.TestCase):
+    """测试共享事件循环"""
+
+    def test_run_sync(self):
+        """测试同步等待协程结果与异常"""
+        async def double(x):
+            await asyncio.sleep(0)
+            return x * 2
+
+        async def fail():
+            raise ValueError('boom')
+
+        self.assertEqual(run_sync(double(21)), 42)
+        with self.assertRaises(ValueError):
+            run_sync(fail())
+
+    def test_submit_limited(self):
+        """测试并发上限与结果顺序"""
+        running = []
+        peak = []
+
+        async def work(i):
+            running.append(i)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(i)
+            return i
+
+        futures = submit_limited([work(i) for i in range(10)], 3)
+        self.assertEqual([f.result(5) for f in futures], list(range(10)))
+        self.assertLessEqual(max(peak), 3)
+
+    def test_run_sync_inside_loop(self):
+        """测试在事件循环线程中调用 run_sync 会报错而不是死锁"""
+        async def nested():
+            return 1
+
+        async def outer():
+            run_sync(nested())
+
+        with self.assertRaises(RuntimeError):
+            submit(outer()).result(5)
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestAio))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -11,7 +11,29 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 
 # 导入测试模块
 from backend.tests.test_tts_service import TestTTSService, TestTTSServiceIntegration
-from backend.tests.test_llm_service import TestLLMService, TestLLMServicePrompts, TestLLMServiceIntegration
+from backend.tests.test_llm_service import (
+    TestLLMService, TestLLMServiceStructuredOutput, TestLLMServiceSegmented,
+    TestLLMServicePrompts, TestLLMServiceIntegration
+)
+from backend.tests.test_task_manager import TestTaskManager
+from backend.tests.test_templating import TestTemplating
+from backend.tests.test_lesson_store import TestLessonStore, TestRenderCache
+from backend.tests.test_compression import TestCompression
+from backend.tests.test_batch_scheduler import TestBatchScheduler
+from backend.tests.test_aio import TestAio
+from backend.tests.test_http_pool import TestHttpPool
+from backend.tests.test_json_repair import TestJsonRepair
+from backend.tests.test_model_router import TestModelRouter
+from backend.tests.test_key_pool import TestApiKeyPool
+from backend.tests.test_retry import TestRetryPolicy, TestServiceRetry
+from backend.tests.test_audio_repair import TestAudioRepairQueue
+from backend.tests.test_prefetch import TestPrefetcher
+from backend.tests.test_topic_index import TestNormalizeTopic, TestTopicIndex, TestTopicIndexNumpy
+from backend.tests.test_topic_suggest import TestTopicSuggester
+from backend.tests.test_vocabulary import TestVocabularyAudio
+from backend.tests.test_phonetics import TestArpabetToIpa, TestPhoneticDict
+from backend.tests.test_audio_variants import TestAudioVariants
+from backend.tests.test_app import TestAppRoutes
 
 
 def run_all_tests():
@@ -24,8 +46,34 @@ def run_all_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestTTSService))
     suite.addTests(loader.loadTestsFromTestCase(TestTTSServiceIntegration))
     suite.addTests(loader.loadTestsFromTestCase(TestLLMService))
+    suite.addTests(loader.loadTestsFromTestCase(TestLLMServiceStructuredOutput))
+    suite.addTests(loader.loadTestsFromTestCase(TestLLMServiceSegmented))
     suite.addTests(loader.loadTestsFromTestCase(TestLLMServicePrompts))
     suite.addTests(loader.loadTestsFromTestCase(TestLLMServiceIntegration))
+    suite.addTests(loader.loadTestsFromTestCase(TestTaskManager))
+    suite.addTests(loader.loadTestsFromTestCase(TestTemplating))
+    suite.addTests(loader.loadTestsFromTestCase(TestLessonStore))
+    suite.addTests(loader.loadTestsFromTestCase(TestRenderCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestCompression))
+    suite.addTests(loader.loadTestsFromTestCase(TestBatchScheduler))
+    suite.addTests(loader.loadTestsFromTestCase(TestAio))
+    suite.addTests(loader.loadTestsFromTestCase(TestHttpPool))
+    suite.addTests(loader.loadTestsFromTestCase(TestJsonRepair))
+    suite.addTests(loader.loadTestsFromTestCase(TestModelRouter))
+    suite.addTests(loader.loadTestsFromTestCase(TestApiKeyPool))
+    suite.addTests(loader.loadTestsFromTestCase(TestRetryPolicy))
+    suite.addTests(loader.loadTestsFromTestCase(TestServiceRetry))
+    suite.addTests(loader.loadTestsFromTestCase(TestAudioRepairQueue))
+    suite.addTests(loader.loadTestsFromTestCase(TestPrefetcher))
+    suite.addTests(loader.loadTestsFromTestCase(TestNormalizeTopic))
+    suite.addTests(loader.loadTestsFromTestCase(TestTopicIndex))
+    suite.addTests(loader.loadTestsFromTestCase(TestTopicIndexNumpy))
+    suite.addTests(loader.loadTestsFromTestCase(TestTopicSuggester))
+    suite.addTests(loader.loadTestsFromTestCase(TestVocabularyAudio))
+    suite.addTests(loader.loadTestsFromTestCase(TestArpabetToIpa))
+    suite.addTests(loader.loadTestsFromTestCase(TestPhoneticDict))
+    suite.addTests(loader.loadTestsFromTestCase(TestAudioVariants))
+    suite.addTests(loader.loadTestsFromTestCase(TestAppRoutes))
     
     # 运行测试
     runner = unittest.TextTestRunner(verbosity=2)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Flask 接口单元测试（使用临时目录，不调用 DashScope）
+"""
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+import subprocess
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.config import Config
+from backend import app as app_module
+from backend.services.tts_service import TTSService
+from backend.retry import RetryPolicy
+
+
+class TestAppRoutes(unittest.TestCase):
+    """测试接口参数校验"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.saved = {
+            'AUDIO_DIR': Config.AUDIO_DIR,
+            'GENERATED_DIR': Config.GENERATED_DIR,
+        }
+        Config.AUDIO_DIR = os.path.join(self.test_dir, 'audio')
+        Config.GENERATED_DIR = os.path.join(self.test_dir, 'generated')
+        os.makedirs(Config.AUDIO_DIR)
+        os.makedirs(Config.GENERATED_DIR)
+        self.saved_tts = app_module.tts_service
+        self.tts = TTSService(api_key='test_key', retry=RetryPolicy(attempts=1))
+        app_module.tts_service = self.tts
+        self.client = app_module.app.test_client()
+
+    def tearDown(self):
+        app_module.tts_service = self.saved_tts
+        for key, value in self.saved.items():
+            setattr(Config, key, value)
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_dialogue_concurrency_validation(self):
+        """并发数不是正整数时返回 400"""
+        dialogue = [{'speaker': 'A', 'english': 'Hello'}]
+        for concurrency in ('x', -1, [2]):
+            response = self.client.post('/api/tts/dialogue', json={'dialogue': dialogue, 'concurrency': concurrency})
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(response.get_json()['success'])
+
+    def test_generated_lesson_audio_negotiation(self):
+        """异步生成的课程使用内容寻址的句子音频，/audio 按 Accept 头选择已合成的格式"""
+        dialogue = [
+            {'speaker': 'A', 'english': 'Where is the station?', 'chinese': '车站在哪里？'},
+            {'speaker': 'B', 'english': 'Turn left at the bank.', 'chinese': '在银行左转。'}
+        ]
+
+        class FakeLLM:
+            model = 'fake-llm'
+
+            def generate_dialogue(self, topic, num_exchanges, budget=None):
+                return {'success': True, 'dialogue': [dict(item) for item in dialogue], 'keywords': []}
+
+        async def fake_synthesize_once(text, voice, output_filename, **options):
+            filepath = os.path.join(Config.AUDIO_DIR, output_filename)
+            with open(filepath, 'wb') as f:
+                f.write(b'mp3')
+            return {'success': True, 'filename': output_filename, 'filepath': filepath,
+                    'url': f'/audio/{output_filename}'}
+
+        self.tts._synthesize_once = fake_synthesize_once
+        saved_llm = app_module.llm_service
+        app_module.llm_service = FakeLLM()
+        try:
+            app_module.generate_content_async('task-negotiation', 'Asking for directions', 2)
+        finally:
+            app_module.llm_service = saved_llm
+        status = app_module.task_status.pop('task-negotiation')
+        self.assertEqual(status['status'], 'completed')
+        name = status['result']['filename'][:-5]
+        self.addCleanup(app_module.lesson_pages.invalidate, name)
+        self.addCleanup(app_module.topic_suggester.remove, name)
+        self.addCleanup(app_module.topic_index.remove, name)
+
+        line = status['result']['dialogue'][0]
+        voice = app_module.speaker_voice('A')
+        self.assertEqual(line['audio_url'], '/audio/' + self.tts.audio_filename(line['english'], voice, prefix='dialogue'))
+        opus = self.tts.audio_filename(line['english'], voice, prefix='dialogue', profile=('opus', 24000, 32))
+        with open(os.path.join(Config.AUDIO_DIR, opus), 'wb') as f:
+            f.write(b'ogg')
+
+        response = self.client.get(line['audio_url'], headers={'Accept': 'audio/ogg, audio/mpeg'})
+        self.assertEqual(response.data, b'ogg')
+        self.assertIn('Accept', response.headers.get('Vary', ''))
+        response.close()
+        response = self.client.get(line['audio_url'], headers={'Accept': '*/*'})
+        self.assertEqual(response.data, b'mp3')
+        response.close()
+        # 另一句尚未合成其他格式，返回原文件
+        response = self.client.get(status['result']['dialogue'][1]['audio_url'], headers={'Accept': 'audio/ogg'})
+        self.assertEqual(response.data, b'mp3')
+        response.close()
+
+    def test_key_reload_rejects_remote_and_cross_origin(self):
+        """重新读取 API Key 只接受本机的同源请求"""
+        keys = app_module.key_pool.stats()
+        response = self.client.post('/api/keys/reload', environ_base={'REMOTE_ADDR': '192.168.1.20'})
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post('/api/keys/reload', headers={'Origin': 'http://evil.example'})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(app_module.key_pool.stats(), keys)
+
+    def test_cors_preflight_allows_edit_and_delete(self):
+        """跨域编辑、删除学习记录的预检请求通过"""
+        for method in ('PATCH', 'DELETE'):
+            response = self.client.options('/api/history/learn_x.html', headers={
+                'Origin': 'http://example.com',
+                'Access-Control-Request-Method': method
+            })
+            self.assertIn(method, response.headers.get('Access-Control-Allow-Methods', ''))
+
+
+class TestAppImport(unittest.TestCase):
+    """测试导入应用时不加载较慢的可选依赖（端口绑定前只做必要的初始化）"""
+
+    def test_import_defers_slow_dependencies(self):
+        project_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        # 已加载的模块名写到 stderr 并以非零状态退出
+        code = 'import sys, backend.app; sys.exit([m for m in ("pypinyin", "numpy") if m in sys.modules] or 0)'
+        result = subprocess.run([sys.executable, '-c', code], cwd=project_dir, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestAppRoutes))
+    suite.addTests(loader.loadTestsFromTestCase(TestAppImport))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
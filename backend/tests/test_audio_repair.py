@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+音频后台补齐单元测试
+"""
+import unittest
+import os
+import sys
+import time
+import json
+import tempfile
+import shutil
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.services.audio_repair import AudioRepairQueue
+from backend.services.lesson_store import LessonStore
+from backend.templating import render_lesson_content
+
+
+class TestAudioRepairQueue(unittest.TestCase):
+    """测试失败句子的后台补合成"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.store = LessonStore(lessons_dir=self.test_dir)
+        self.dialogue = [
+            {'speaker': 'A', 'chinese': '你好', 'english': 'Hello', 'audio_url': '/audio/a.mp3'},
+            {'speaker': 'B', 'chinese': '你好吗', 'english': 'How are you?'},
+        ]
+        self.record = self.store.save('greeting', self.dialogue, [], pending_audio=[1])
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def synthesize(self, text, voice):
+        self.calls.append(text)
+        if len(self.calls) == 1:
+            return {'success': False, 'error': 'TTS connection closed before completion'}
+        return {'success': True, 'url': '/audio/b.mp3'}
+
+    def wait_until(self, predicate, timeout=2):
+        deadline = time.monotonic() + timeout
+        while not predicate() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_patches_record_after_retry(self):
+        """测试失败后按退避重试，成功后就地更新学习记录"""
+        name = self.record['name']
+        page = render_lesson_content(self.store.load(name)).body.decode('utf-8')
+        self.assertIn('音频生成中', page)
+
+        queue = AudioRepairQueue(self.synthesize, self.store.patch_audio, workers=1, delay=0.01,
+                                 state_file=os.path.join(self.test_dir, 'pending.json'))
+        self.assertEqual(queue.submit(name, [{'index': 1, 'text': 'How are you?', 'voice': 'vb'}]), 1)
+        # 已在队列中的句子不会重复登记
+        self.assertEqual(queue.submit(name, [{'index': 1, 'text': 'How are you?', 'voice': 'vb'}]), 0)
+        self.wait_until(lambda: queue.pending(name) == 0)
+
+        record = self.store.load(name)
+        self.assertEqual(record['name'], name)
+        self.assertEqual(record['dialogue'][1]['audio_url'], '/audio/b.mp3')
+        self.assertNotIn('pending_audio', record)
+        self.assertEqual(self.calls, ['How are you?', 'How are you?'])
+        stats = queue.stats()
+        self.assertEqual((stats['repaired'], stats['failed_attempts']), (1, 1))
+
+    def test_abandon_after_attempts(self):
+        """测试超过尝试次数后放弃并移出待补齐列表"""
+        name = self.record['name']
+        queue = AudioRepairQueue(lambda text, voice: {'success': False, 'error': 'down'},
+                                 self.store.patch_audio, workers=1, attempts=2, delay=0.01)
+        queue.submit(name, [{'index': 1, 'text': 'How are you?', 'voice': 'vb'}])
+        self.wait_until(lambda: queue.pending(name) == 0)
+
+        record = self.store.load(name)
+        self.assertNotIn('audio_url', record['dialogue'][1])
+        self.assertNotIn('pending_audio', record)
+        self.assertEqual(queue.stats()['abandoned'], 1)
+
+    def test_shutdown_persists(self):
+        """测试停机时保存未完成任务，重启后恢复"""
+        state_file = os.path.join(self.test_dir, 'pending.json')
+        queue = AudioRepairQueue(self.synthesize, self.store.patch_audio, delay=60, state_file=state_file)
+        queue.submit(self.record['name'], [{'index': 1, 'text': 'How are you?', 'voice': 'vb'}])
+        self.assertEqual(queue.shutdown(), 1)
+        self.assertEqual(self.calls, [])
+
+        restored = AudioRepairQueue(self.synthesize, self.store.patch_audio, state_file=state_file)
+        pending = restored.load_pending()
+        self.assertEqual(list(pending), [self.record['name']])
+        self.assertEqual(pending[self.record['name']][0]['index'], 1)
+        self.assertTrue(os.path.exists(state_file))
+        restored.clear_pending()
+        self.assertFalse(os.path.exists(state_file))
+
+    def test_resume_from_records(self):
+        """测试启动时按学习记录重建队列（没有状态文件，如进程被强制结束），沿用保存的尝试次数"""
+        state_file = os.path.join(self.test_dir, 'pending.json')
+        queue = AudioRepairQueue(self.synthesize, self.store.patch_audio, delay=60, state_file=state_file)
+        self.assertEqual(queue.resume([self.store.load(self.record['name'])], lambda speaker: 'v'), 1)
+        self.assertEqual(queue.pending(self.record['name']), 1)
+        self.assertEqual(queue._queue[0][2]['attempt'], 0)
+        queue.shutdown()
+
+        with open(state_file, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        saved[0]['attempt'] = 3
+        with open(state_file, 'w', encoding='utf-8') as f:
+            json.dump(saved, f)
+        restored = AudioRepairQueue(self.synthesize, self.store.patch_audio, delay=60, state_file=state_file)
+        self.assertEqual(restored.resume([self.store.load(self.record['name'])], lambda speaker: 'v'), 1)
+        self.assertEqual(restored._queue[0][2]['attempt'], 3)
+        self.assertFalse(os.path.exists(state_file))
+        restored.shutdown()
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestAudioRepairQueue))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+慢速音频单元测试
+"""
+import unittest
+import os
+import sys
+import asyncio
+import tempfile
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.services.tts_service import TTSService
+from backend.services.audio_variants import AudioVariants
+from backend.retry import RetryPolicy
+
+
+class TestAudioVariants(unittest.TestCase):
+    """测试变体音频的按需合成、缓存与并发去重"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.tts = TTSService(api_key='test_key', retry=RetryPolicy(attempts=1))
+        self.tts.audio_dir = self.test_dir
+        self.calls = []
+        self.fail = False
+        lock = threading.Lock()
+
+        async def fake_synthesize_once(text, voice, output_filename, **options):
+            with lock:
+                self.calls.append((text, voice, options))
+            await asyncio.sleep(0.05)
+            if self.fail:
+                return {'success': False, 'error': 'TTS synthesis failed: boom'}
+            filepath = os.path.join(self.test_dir, output_filename)
+            with open(filepath, 'wb') as f:
+                f.write(b'mp3')
+            return {'success': True, 'filename': output_filename, 'filepath': filepath,
+                    'url': f'/audio/{output_filename}', **options}
+
+        self.tts._synthesize_once = fake_synthesize_once
+        self.variants = AudioVariants(get_tts=lambda: self.tts, rates=(0.75, 0.5))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_variant_cached_alongside_original(self):
+        original = self.tts.audio_filename('Hello', 'va', prefix='dialogue')
+        result = self.variants.get('Hello', 'va', 0.75)
+        self.assertTrue(result['success'])
+        self.assertFalse(result['cached'])
+        self.assertEqual(self.calls, [('Hello', 'va', {'speech_rate': 0.75})])
+        self.assertTrue(result['filename'].startswith('dialogue_'))
+        self.assertNotEqual(result['filename'], original)
+        self.assertTrue(os.path.exists(os.path.join(self.test_dir, result['filename'])))
+
+        again = self.variants.get('Hello', 'va', 0.75)
+        self.assertTrue(again['cached'])
+        self.assertEqual(again['url'], result['url'])
+        self.assertEqual(len(self.calls), 1)
+
+        # 不同语速、音色分别缓存
+        self.assertNotEqual(self.variants.get('Hello', 'va', 0.5)['url'], result['url'])
+        self.assertNotEqual(self.variants.get('Hello', 'vb', 0.75)['url'], result['url'])
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(self.variants.stats()['hits'], 1)
+
+    def test_concurrent_requests_synthesize_once(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: self.variants.get('Slow down', 'va', 0.5), range(8)))
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(len({r['url'] for r in results}), 1)
+        stats = self.variants.stats()
+        self.assertEqual(stats['synthesized'], 1)
+        self.assertEqual(stats['joined'], 7)
+
+    def test_unsupported_rate(self):
+        result = self.variants.get('Hello', 'va', 1.5)
+        self.assertFalse(result['success'])
+        self.assertEqual(self.calls, [])
+
+    def test_failure_not_cached(self):
+        self.fail = True
+        self.assertFalse(self.variants.get('Hello', 'va', 0.75)['success'])
+        self.fail = False
+        self.assertTrue(self.variants.get('Hello', 'va', 0.75)['success'])
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.variants.stats()['failed'], 1)
+
+    def test_profile_variant(self):
+        """其他音频格式与语速组合，按格式分别缓存"""
+        result = self.variants.get('Hello', 'va', 1, profile=('opus', 24000, 32))
+        self.assertTrue(result['success'])
+        self.assertTrue(result['filename'].endswith('-opus_24000_32.ogg'))
+        self.assertEqual(self.calls, [('Hello', 'va', {'profile': ('opus', 24000, 32)})])
+        slow = self.variants.get('Hello', 'va', 0.5, profile=('opus', 24000, 32))
+        self.assertNotEqual(slow['url'], result['url'])
+        self.assertTrue(self.variants.get('Hello', 'va', 1, profile=('opus', 24000, 32))['cached'])
+        self.assertEqual(len(self.calls), 2)
+
+        self.assertFalse(self.variants.get('Hello', 'va', 1, profile='no-such-profile')['success'])
+        self.assertEqual(len(self.calls), 2)
+
+    def test_tts_not_ready(self):
+        variants = AudioVariants(get_tts=lambda: None, rates=(0.75,))
+        self.assertFalse(variants.get('Hello', 'va', 0.75)['success'])
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestAudioVariants))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
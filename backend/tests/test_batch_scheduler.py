@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+批量生成调度单元测试
+"""
+import unittest
+import os
+import sys
+import time
+import json
+import tempfile
+import shutil
+import threading
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.services.batch_scheduler import BatchScheduler
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestBatchScheduler(unittest.TestCase):
+    """测试批量生成调度"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.state_file = os.path.join(self.test_dir, 'pending_batches.json')
+        self.generated = []
+        self.synthesized = []
+        self.saved = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def generate(self, topic, num_exchanges):
+        with self.lock:
+            self.generated.append(topic)
+        if topic == 'broken':
+            return {'success': False, 'error': 'LLM error'}
+        dialogue = [
+            {'speaker': 'A', 'chinese': '你好', 'english': 'Hello!'},
+            {'speaker': 'B', 'chinese': topic, 'english': f'About {topic}.'},
+        ]
+        return {'success': True, 'dialogue': dialogue, 'keywords': []}
+
+    def synthesize(self, text, voice):
+        time.sleep(0.02)
+        with self.lock:
+            self.synthesized.append((text, voice))
+        return {'success': True, 'url': f'/audio/{len(self.synthesized)}.mp3'}
+
+    def save(self, topic, dialogue, keywords, **meta):
+        with self.lock:
+            self.saved.append((topic, dialogue))
+        return f'learn_{topic}.html'
+
+    def make_scheduler(self, **kwargs):
+        return BatchScheduler(self.generate, self.synthesize, self.save,
+                              state_file=self.state_file, **kwargs)
+
+    def test_batch_completes_and_deduplicates(self):
+        """测试批次完成，重复句子在整个批次中只合成一次"""
+        scheduler = self.make_scheduler(llm_workers=2, tts_workers=2)
+        batch_id = scheduler.submit(['a', 'b', 'c', 'broken'])
+
+        self.assertTrue(wait_for(lambda: scheduler.status(batch_id)['status'] == 'completed'))
+        status = scheduler.status(batch_id)
+        self.assertEqual(status['counts'], {'completed': 3, 'failed': 1})
+        self.assertEqual(status['lines_total'], 6)
+        self.assertEqual(status['lines_done'], 6)
+        self.assertEqual(len(self.synthesized), len(set(self.synthesized)))
+        self.assertEqual(len(self.synthesized) + status['lines_deduplicated'], 6)
+        for topic, dialogue in self.saved:
+            self.assertTrue(all(item.get('audio_url') for item in dialogue))
+        self.assertEqual(scheduler.shutdown(timeout=1), 0)
+
+    def test_priority_order(self):
+        """测试高优先级话题先生成"""
+        scheduler = self.make_scheduler(llm_workers=1, tts_workers=1)
+        gate = threading.Event()
+        original = self.generate
+
+        def blocking_generate(topic, num_exchanges):
+            gate.wait(5)
+            return original(topic, num_exchanges)
+
+        scheduler._generate = blocking_generate
+        scheduler.submit(['first'])
+        self.assertTrue(wait_for(lambda: scheduler.stats()['llm_queued'] == 0))
+        batch_id = scheduler.submit(['low', {'topic': 'high', 'priority': 5}])
+        gate.set()
+
+        self.assertTrue(wait_for(lambda: scheduler.status(batch_id)['status'] == 'completed'))
+        self.assertEqual(self.generated, ['first', 'high', 'low'])
+        scheduler.shutdown(timeout=1)
+
+    def test_finished_batches_expire(self):
+        """测试已结束的批次超过保留时间后被移除"""
+        scheduler = self.make_scheduler(llm_workers=1, tts_workers=1, retention=0.2)
+        batch_id = scheduler.submit(['a'])
+        self.assertTrue(wait_for(lambda: scheduler.status(batch_id)['status'] == 'completed'))
+        time.sleep(0.3)
+        other = scheduler.submit(['broken'])
+        self.assertIsNone(scheduler.status(batch_id))
+        self.assertIsNotNone(scheduler.status(other))
+        self.assertTrue(wait_for(lambda: scheduler.stats()['batches'] == 0, timeout=2))
+        scheduler.shutdown(timeout=1)
+
+    def test_shutdown_persists_pending_topics(self):
+        """测试停机时未完成的话题被保存并可恢复"""
+        scheduler = self.make_scheduler(llm_workers=1, tts_workers=1)
+        gate = threading.Event()
+        scheduler._generate = lambda topic, num_exchanges: gate.wait(5) and {'success': False}
+        batch_id = scheduler.submit(['x', 'y'], num_exchanges=3)
+
+        timer = threading.Timer(0.3, gate.set)
+        timer.start()
+        self.assertEqual(scheduler.shutdown(timeout=0.1), 1)
+        timer.cancel()
+        self.assertIsNone(scheduler.submit(['z']))
+
+        with open(self.state_file, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)[0]['topic'], 'y')
+        pending = self.make_scheduler().load_pending()
+        self.assertEqual(pending, {batch_id: [{'topic': 'y', 'num_exchanges': 3, 'priority': 0}]})
+        # 读取不删除记录，重新提交后才清除
+        self.assertTrue(os.path.exists(self.state_file))
+        self.make_scheduler().clear_pending()
+        self.assertFalse(os.path.exists(self.state_file))
+
+    def test_shutdown_keeps_unresumed_topics(self):
+        """测试停机时保留上次尚未恢复的话题"""
+        with open(self.state_file, 'w', encoding='utf-8') as f:
+            json.dump([{'batch_id': 'old', 'topic': 'x', 'num_exchanges': 5, 'priority': 0}], f)
+        scheduler = self.make_scheduler(llm_workers=1, tts_workers=1)
+        gate = threading.Event()
+        scheduler._generate = lambda topic, num_exchanges: gate.wait(5) and {'success': False}
+        batch_id = scheduler.submit(['y', 'z'])
+        timer = threading.Timer(0.3, gate.set)
+        timer.start()
+        scheduler.shutdown(timeout=0.1)
+        timer.cancel()
+        pending = self.make_scheduler().load_pending()
+        self.assertEqual([item['topic'] for item in pending['old']], ['x'])
+        self.assertEqual([item['topic'] for item in pending[batch_id]], ['z'])
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestBatchScheduler))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
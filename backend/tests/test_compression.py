@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+响应压缩单元测试
+"""
+import unittest
+import os
+import sys
+import gzip
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask, jsonify
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+from backend.compression import brotli, choose_encoding, init_compression, precompress
+from backend.config import Config
+
+
+def accept(value):
+    return parse_accept_header(value, Accept)
+
+
+class TestCompression(unittest.TestCase):
+    """测试压缩协商与中间件"""
+
+    def test_choose_encoding(self):
+        """测试按 Accept-Encoding 与可用编码选择"""
+        available = {'identity', 'gzip', 'br'}
+        self.assertEqual(choose_encoding(accept('gzip, deflate, br'), available), 'br')
+        self.assertEqual(choose_encoding(accept('br;q=0, gzip'), available), 'gzip')
+        self.assertEqual(choose_encoding(accept('gzip;q=1, br;q=0.5'), available), 'gzip')
+        self.assertEqual(choose_encoding(accept('br'), {'identity', 'gzip'}), 'identity')
+        self.assertEqual(choose_encoding(accept(''), available), 'identity')
+
+    def test_precompress(self):
+        """测试预压缩结果可正确解压"""
+        body = ('hello world ' * 200).encode('utf-8')
+        variants = precompress(body)
+        self.assertEqual(variants['identity'], body)
+        self.assertEqual(gzip.decompress(variants['gzip']), body)
+        if brotli is not None:
+            self.assertEqual(brotli.decompress(variants['br']), body)
+
+    def test_json_middleware_threshold(self):
+        """测试 JSON 响应超过阈值时才压缩"""
+        app = Flask(__name__)
+        init_compression(app)
+
+        @app.route('/small')
+        def small():
+            return jsonify({'ok': True})
+
+        @app.route('/large')
+        def large():
+            return jsonify({'items': ['x' * 10] * Config.COMPRESSION_MIN_SIZE})
+
+        client = app.test_client()
+        response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+
+        response = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn(b'"items"', gzip.decompress(response.data))
+
+        response = client.get('/large')
+        self.assertNotIn('Content-Encoding', response.headers)
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestCompression))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+HTTP 连接池单元测试
+"""
+import unittest
+import os
+import sys
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from aiohttp import web
+from backend import http_pool
+from backend.aio import run_sync
+
+
+class TestHttpPool(unittest.TestCase):
+    """测试共享 HTTP 连接池"""
+
+    def setUp(self):
+        async def start():
+            async def ping(request):
+                return web.json_response({'ok': True})
+
+            app = web.Application()
+            app.router.add_get('/ping', ping)
+            self.runner = web.AppRunner(app)
+            await self.runner.setup()
+            site = web.TCPSite(self.runner, '127.0.0.1', 0)
+            await site.start()
+            return site._server.sockets[0].getsockname()[1]
+
+        self.url = f'http://127.0.0.1:{run_sync(start())}/ping'
+
+    def tearDown(self):
+        run_sync(http_pool.close_session())
+        run_sync(self.runner.cleanup())
+
+    def test_connections_reused(self):
+        """测试连续请求复用同一连接"""
+        async def fetch():
+            session = await http_pool.get_session()
+            async with session.get(self.url) as response:
+                return await response.json()
+
+        before = http_pool.stats()
+        for _ in range(5):
+            self.assertEqual(run_sync(fetch()), {'ok': True})
+        after = http_pool.stats()
+
+        self.assertEqual(after['requests'] - before['requests'], 5)
+        self.assertEqual(after['connections_created'] - before['connections_created'], 1)
+        self.assertEqual(after['connections_reused'] - before['connections_reused'], 4)
+        self.assertGreater(after['reuse_rate'], 0)
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestHttpPool))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+JSON 修复单元测试
+"""
+import unittest
+import os
+import sys
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.json_repair import parse_json, remove_trailing_commas
+
+
+class TestJsonRepair(unittest.TestCase):
+    """测试模型输出 JSON 的本地修复"""
+
+    def test_valid_json(self):
+        """测试合法 JSON 不做修改"""
+        result = parse_json('{"a": [1, 2]}')
+        self.assertEqual(result.data, {'a': [1, 2]})
+        self.assertFalse(result.repaired)
+
+    def test_code_fence_and_trailing_commas(self):
+        """测试去掉代码块与多余逗号"""
+        result = parse_json('好的：\n```json\n{"a": [1, 2,], "b": "x,]",}\n```')
+        self.assertEqual(result.data, {'a': [1, 2], 'b': 'x,]'})
+        self.assertTrue(result.repaired)
+        self.assertFalse(result.truncated)
+        self.assertEqual(remove_trailing_commas('[1, "a,]" ,]'), '[1, "a,]" ]')
+
+    def test_truncated_output(self):
+        """测试截断输出保留完整元素并补齐括号"""
+        result = parse_json('{"items": [{"t": "a } ]"}, {"t": "b"}, {"t": "c')
+        self.assertEqual(result.data, {'items': [{'t': 'a } ]'}, {'t': 'b'}]})
+        self.assertTrue(result.truncated)
+
+    def test_unrepairable(self):
+        """测试无法修复时抛出 ValueError"""
+        with self.assertRaises(ValueError):
+            parse_json('no json here')
+        with self.assertRaises(ValueError):
+            parse_json('{"a": ')
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestJsonRepair))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+API Key 池单元测试
+"""
+import unittest
+import os
+import sys
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.config import Config
+from backend.services.key_pool import ApiKeyPool, NoApiKeyError, classify_error
+
+
+class TestApiKeyPool(unittest.TestCase):
+    """测试 API Key 池"""
+
+    def setUp(self):
+        self.pool = ApiKeyPool(['key-a', 'key-b', 'key-a', ''])
+
+    def test_dedupe(self):
+        """测试重复与空 Key 被忽略"""
+        self.assertEqual(len(self.pool), 2)
+        self.assertEqual(self.pool.primary, 'key-a')
+
+    def test_least_loaded(self):
+        """测试优先选择进行中请求最少的 Key"""
+        first = self.pool.acquire()
+        second = self.pool.acquire()
+        self.assertNotEqual(first, second)
+        self.pool.release(first)
+        self.assertEqual(self.pool.acquire(), first)
+
+    def test_auth_quarantine(self):
+        """测试鉴权失败的 Key 被隔离"""
+        self.pool.release(self.pool.acquire(), 'auth')
+        for _ in range(3):
+            key = self.pool.acquire()
+            self.assertEqual(key, 'key-b')
+            self.pool.release(key)
+        stats = self.pool.stats()
+        self.assertEqual([item['auth_errors'] for item in stats], [1, 0])
+        self.assertGreater(stats[0]['quarantined_for_s'], 0)
+
+    def test_throttle_backoff(self):
+        """测试连续限流时隔离时间指数增长，成功后重置"""
+        pool = ApiKeyPool(['only-key'])
+        pool.release(pool.acquire(), 'throttle')
+        first = pool.stats()[0]['quarantined_for_s']
+        pool.release(pool.acquire(), 'throttle')
+        second = pool.stats()[0]['quarantined_for_s']
+        self.assertAlmostEqual(first, Config.KEY_QUARANTINE_THROTTLE, delta=0.5)
+        self.assertAlmostEqual(second, Config.KEY_QUARANTINE_THROTTLE * 2, delta=0.5)
+        # 全部被隔离时仍返回最早解除隔离的 Key
+        self.assertEqual(pool.acquire(), 'only-key')
+
+    def test_set_keys_keeps_state(self):
+        """测试更新 Key 列表时保留已有 Key 的状态"""
+        self.pool.release(self.pool.acquire(), 'auth')
+        self.pool.set_keys(['key-c', 'key-a'])
+        self.assertEqual(len(self.pool), 2)
+        self.assertEqual(self.pool.acquire(), 'key-c')
+        self.assertEqual(self.pool.acquire(), 'key-c')
+
+    def test_no_keys(self):
+        """测试未配置 Key"""
+        with self.assertRaises(NoApiKeyError):
+            ApiKeyPool([]).acquire()
+
+    def test_classify_error(self):
+        """测试错误分类"""
+        self.assertEqual(classify_error(401, 'Invalid API-key provided.'), 'auth')
+        self.assertEqual(classify_error(message='InvalidApiKey'), 'auth')
+        self.assertEqual(classify_error(message='Requests rate limit exceeded: Throttling.RateQuota.'), 'throttle')
+        self.assertEqual(classify_error(429, 'Throttling.RateQuota'), 'throttle')
+        self.assertIsNone(classify_error(500, 'InternalError'))
+        self.assertEqual(classify_error(message='AccessDenied.Unpurchased: access denied'), 'auth')
+        self.assertEqual(classify_error(400, 'Throttling.AllocationQuota'), 'throttle')
+
+    def test_classify_error_ignores_digits_in_message(self):
+        """错误信息中的请求 ID、字节数等包含 401/429 时不隔离 Key"""
+        self.assertIsNone(classify_error(message='InternalError, request_id: 7c401e2a-4290-9429-a403-f6d2e1b0c429'))
+        self.assertIsNone(classify_error(message='websocket closed after 40132 bytes'))
+        self.assertIsNone(classify_error(500, 'task 401 failed'))
+        self.assertIsNone(classify_error(message='NoThrottlingConfigured'))
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestApiKeyPool))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
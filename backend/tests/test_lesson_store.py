@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+学习记录存储单元测试
+"""
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.services.lesson_store import LessonStore, reuse_audio, content_hash
+from backend.templating import RenderCache
+
+
+class TestLessonStore(unittest.TestCase):
+    """测试学习记录存储"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.store = LessonStore(lessons_dir=self.test_dir)
+        self.dialogue = [{'speaker': 'A', 'chinese': '你好', 'english': 'Hello', 'audio_url': '/audio/a.mp3'}]
+        self.keywords = [{'word': 'hello', 'chinese': '你好'}]
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_save_and_load(self):
+        """测试保存与读取记录"""
+        saved = self.store.save('greeting', self.dialogue, self.keywords,
+                                model={'llm': 'qwen-plus'}, timings={'total_ms': 1200})
+        record = self.store.load(saved['name'])
+
+        self.assertEqual(record['topic'], 'greeting')
+        self.assertEqual(record['dialogue'], self.dialogue)
+        self.assertEqual(record['keywords'], self.keywords)
+        self.assertEqual(record['model'], {'llm': 'qwen-plus'})
+        self.assertEqual(record['timings'], {'total_ms': 1200})
+        self.assertIsNone(self.store.load('learn_missing'))
+
+    def test_list_and_delete(self):
+        """测试列出与删除记录"""
+        a = self.store.save('a', self.dialogue, self.keywords)
+        self.store.save('b', self.dialogue, self.keywords)
+
+        topics = sorted(item['topic'] for item in self.store.list())
+        self.assertEqual(topics, ['a', 'b'])
+
+        self.assertTrue(self.store.delete(a['name']))
+        self.assertFalse(self.store.delete(a['name']))
+        self.assertEqual([item['topic'] for item in self.store.list()], ['b'])
+
+    def test_save_after_edit(self):
+        """测试编辑后的记录不会被当作原内容返回"""
+        saved = self.store.save('greeting', self.dialogue, self.keywords)
+        self.assertEqual(self.store.save('greeting', self.dialogue, self.keywords)['name'], saved['name'])
+
+        edited = [dict(self.dialogue[0], english='Hi')]
+
+        def change(record):
+            record['dialogue'] = edited
+            record['content_hash'] = content_hash(record['topic'], edited, record['keywords'])
+
+        self.store.update(saved['name'], change)
+        again = self.store.save('greeting', self.dialogue, self.keywords)
+        self.assertEqual(again['name'], saved['name'] + '_2')
+        self.assertEqual(again['dialogue'], self.dialogue)
+        self.assertEqual(self.store.save('greeting', self.dialogue, self.keywords)['name'], again['name'])
+        self.assertEqual(self.store.load(saved['name'])['dialogue'], edited)
+
+    def test_invalid_name(self):
+        """测试非法记录名称"""
+        self.assertIsNone(self.store.record_path('../secret'))
+        self.assertIsNone(self.store.load('../secret'))
+        with self.assertRaises(ValueError):
+            self.store.write('../secret', {})
+
+    def test_content_addressed_names(self):
+        """测试相同内容去重、不同内容不冲突"""
+        first = self.store.save('机场 / 值机', self.dialogue, self.keywords, timings={'total_ms': 1})
+        again = self.store.save('机场 / 值机', self.dialogue, self.keywords, timings={'total_ms': 2})
+        other = self.store.save('机场 / 值机', self.dialogue, [], timings={'total_ms': 3})
+
+        self.assertTrue(first['name'].startswith('learn_机场_值机_'))
+        self.assertEqual(first['name'], again['name'])
+        self.assertEqual(again['timings'], {'total_ms': 1})
+        self.assertNotEqual(first['name'], other['name'])
+        self.assertEqual(len(self.store.list()), 2)
+        self.assertEqual([f for f in os.listdir(self.test_dir) if f.startswith('.')], [])
+
+    def test_reuse_audio(self):
+        """测试编辑时只有英文或音色改变的句子需要重新合成"""
+        old = [
+            {'speaker': 'A', 'chinese': '你好', 'english': 'Hello', 'audio_url': '/audio/a.mp3'},
+            {'speaker': 'B', 'chinese': '再见', 'english': 'Bye', 'audio_url': '/audio/b.mp3'},
+        ]
+        new = [
+            {'speaker': 'B', 'chinese': '再见！', 'english': 'Bye', 'audio_url': '/audio/forged.mp3'},
+            {'speaker': 'B', 'chinese': '你好', 'english': 'Hello'},
+            {'speaker': 'A', 'chinese': '谢谢', 'english': 'Thanks'},
+        ]
+        dialogue, changed = reuse_audio(old, new, lambda speaker: f'voice_{speaker}')
+        self.assertEqual(changed, [1, 2])
+        self.assertEqual(dialogue[0]['audio_url'], '/audio/b.mp3')
+        self.assertEqual(dialogue[0]['chinese'], '再见！')
+        self.assertNotIn('audio_url', dialogue[1])
+
+    def test_patch_audio_keeps_name(self):
+        """测试补齐音频就地更新记录，句子已被编辑时不更新"""
+        dialogue = self.dialogue + [{'speaker': 'B', 'chinese': '再见', 'english': 'Bye'}]
+        name = self.store.save('greeting', dialogue, self.keywords, pending_audio=[1])['name']
+
+        self.assertEqual(self.store.patch_audio(name, 1, 'Goodbye', '/audio/x.mp3'), 1)
+        self.assertNotIn('audio_url', self.store.load(name)['dialogue'][1])
+        self.assertEqual(self.store.patch_audio(name, 1, 'Bye', '/audio/b.mp3'), 0)
+        record = self.store.load(name)
+        self.assertEqual(record['dialogue'][1]['audio_url'], '/audio/b.mp3')
+        self.assertNotIn('pending_audio', record)
+        self.assertEqual(record['name'], name)
+        self.assertIsNone(self.store.patch_audio('learn_missing', 0, 'Bye', None))
+
+
+class TestRenderCache(unittest.TestCase):
+    """测试渲染缓存"""
+
+    def test_lru_and_version(self):
+        """测试版本变化时重新渲染，超出容量时淘汰最久未用的项"""
+        cache = RenderCache(maxsize=2)
+        calls = []
+
+        def build(value):
+            def _build():
+                calls.append(value)
+                return value
+            return _build
+
+        self.assertEqual(cache.get('a', 1, build('a1')), 'a1')
+        self.assertEqual(cache.get('a', 1, build('unused')), 'a1')
+        self.assertEqual(cache.get('a', 2, build('a2')), 'a2')
+        cache.get('b', 1, build('b1'))
+        cache.get('c', 1, build('c1'))
+        cache.get('a', 2, build('a2-again'))
+        self.assertEqual(calls, ['a1', 'a2', 'b1', 'c1', 'a2-again'])
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestLessonStore))
+    suite.addTests(loader.loadTestsFromTestCase(TestRenderCache))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -5,12 +5,16 @@ LLM服务单元测试
 import unittest
 import os
 import sys
+import re
 import json
+import time
+import asyncio
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from backend.services.llm_service import LLMService
+from backend.services.llm_service import LLMService, segment_sizes, json_mode_unsupported
+from backend.aio import run_sync
 from backend.config import Config
 
 
@@ -26,22 +30,59 @@ class TestLLMService(unittest.TestCase):
         self.assertEqual(self.llm_service.api_key, 'test_api_key')
         self.assertEqual(self.llm_service.model, Config.LLM_MODEL)
     
-    def test_extract_json(self):
-        """测试JSON提取功能"""
+    def test_parse_model_output(self):
+        """测试模型输出经 json_repair 宽松解析"""
         # 测试正常JSON
-        text1 = '{"key": "value"}'
-        result1 = self.llm_service._extract_json(text1)
-        self.assertEqual(result1, '{"key": "value"}')
+        result1 = self.llm_service._parse('{"key": "value"}')
+        self.assertEqual(result1.data, {'key': 'value'})
+        self.assertFalse(result1.repaired)
         
         # 测试带额外文本的JSON
         text2 = 'Some text before {\n  "dialogue": [],\n  "keywords": []\n} some text after'
-        result2 = self.llm_service._extract_json(text2)
-        self.assertEqual(result2, '{\n  "dialogue": [],\n  "keywords": []\n}')
+        result2 = self.llm_service._parse(text2)
+        self.assertEqual(result2.data, {'dialogue': [], 'keywords': []})
+        self.assertTrue(result2.repaired)
         
-        # 测试没有JSON的情况
-        text3 = 'No JSON here'
-        result3 = self.llm_service._extract_json(text3)
-        self.assertEqual(result3, 'No JSON here')
+        # 测试没有JSON或不是对象的情况（视为全部缺失）
+        self.assertEqual(self.llm_service._parse('No JSON here').data, {})
+        self.assertEqual(self.llm_service._parse('[1, 2]').data, {})
+        self.assertEqual(self.llm_service._parse(None).data, {})
+    
+    def test_json_mode_fallback_per_model(self):
+        """测试只有明确不支持 response_format 的模型关闭 JSON 模式"""
+        self.assertTrue(json_mode_unsupported(400, 'InvalidParameter: response_format is not supported by this model'))
+        self.assertFalse(json_mode_unsupported(400, "'messages' must contain the word 'json' to use 'response_format'"))
+        self.assertFalse(json_mode_unsupported(400, 'Input should be a valid JSON string'))
+        self.assertFalse(json_mode_unsupported(500, 'response_format not supported'))
+        
+        calls = []
+        
+        class Response:
+            def __init__(self, status_code, message=''):
+                self.status_code = status_code
+                self.message = message
+                self.code = 'InvalidParameter'
+        
+        class FakeGeneration:
+            @staticmethod
+            async def call(model, **kwargs):
+                calls.append((model, 'response_format' in kwargs))
+                if model == 'old-model' and 'response_format' in kwargs:
+                    return Response(400, 'response_format is not supported')
+                return Response(400, 'Input should be a valid JSON string')
+        
+        self.llm_service._generation = lambda: FakeGeneration
+        original_models = Config.LLM_JSON_MODE_MODELS
+        Config.LLM_JSON_MODE_MODELS = ('old-model', 'new-model')
+        try:
+            run_sync(self.llm_service._request_model('new-model', 's', 'p'))
+            self.assertTrue(self.llm_service._json_mode('new-model'))
+            run_sync(self.llm_service._request_model('old-model', 's', 'p'))
+            self.assertFalse(self.llm_service._json_mode('old-model'))
+            self.assertTrue(self.llm_service._json_mode('new-model'))
+        finally:
+            Config.LLM_JSON_MODE_MODELS = original_models
+        self.assertEqual(calls, [('new-model', True), ('old-model', True), ('old-model', False)])
     
     def test_generate_dialogue_structure(self):
         """测试生成对话的结构（mock测试）"""
@@ -69,6 +110,118 @@ class TestLLMService(unittest.TestCase):
         self.assertIn('success', result)
 
 
+class TestLLMServiceStructuredOutput(unittest.TestCase):
+    """测试结构化输出的本地修复与针对性补充请求"""
+    
+    def setUp(self):
+        self.llm_service = LLMService(api_key='test_key')
+        self.prompts = []
+    
+    def stub_responses(self, *responses):
+        """用预设回复替换模型调用"""
+        replies = list(responses)
+        
+        async def fake_complete(system_prompt, prompt, task='dialogue'):
+            self.prompts.append(prompt)
+            return replies.pop(0), None
+        
+        self.llm_service._complete = fake_complete
+    
+    def test_repairs_without_reask(self):
+        """测试代码块与多余逗号在本地修复，不再请求模型"""
+        self.stub_responses('```json\n{"dialogue": [{"speaker": "A", "chinese": "你好", "english": "Hi",},],'
+                            ' "keywords": [{"word": "hi", "chinese": "你好"}]}\n```')
+        result = self.llm_service.generate_dialogue('问候', 1)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['dialogue'][0]['english'], 'Hi')
+        self.assertEqual(result['repair'], {'repaired': True, 'truncated': False, 'reasks': []})
+        self.assertEqual(len(self.prompts), 1)
+    
+    def test_truncated_output_reasks_missing_parts(self):
+        """测试截断输出只补充缺失的对话与关键词"""
+        self.stub_responses(
+            '{"dialogue": [{"speaker": "A", "chinese": "你好", "english": "Hi"}, {"speaker": "B", "chin',
+            '{"dialogue": [{"speaker": "B", "chinese": "你好", "english": "Hello"}]}',
+            '{"keywords": [{"word": "hello", "chinese": "你好"}]}'
+        )
+        result = self.llm_service.generate_dialogue('问候', 1)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual([d['english'] for d in result['dialogue']], ['Hi', 'Hello'])
+        self.assertEqual(result['keywords'], [{'word': 'hello', 'chinese': '你好'}])
+        self.assertEqual(result['repair']['reasks'], ['dialogue', 'keywords'])
+        self.assertIn('A: Hi', self.prompts[1])
+    
+    def test_invalid_dialogue_fails_after_one_reask(self):
+        """测试对话无法解析时只补充请求一次"""
+        self.stub_responses('not json', '{"dialogue": [{"speaker": "A"}]}')
+        result = self.llm_service.generate_dialogue('问候', 1)
+        
+        self.assertFalse(result['success'])
+        self.assertEqual(len(self.prompts), 2)
+
+
+class TestLLMServiceSegmented(unittest.TestCase):
+    """测试长对话分段并发生成"""
+    
+    def test_segments_run_concurrently_in_order(self):
+        """测试各段与关键词并发生成并按顺序拼接"""
+        llm_service = LLMService(api_key='test_key')
+        
+        async def fake_complete(system_prompt, prompt, task='dialogue'):
+            await asyncio.sleep(0.2)
+            if '设计大纲' in prompt:
+                return json.dumps({'setting': '机场', 'scenes': ['值机', '安检', '登机']}), None
+            if '"dialogue"' not in prompt:
+                return '{"keywords": [{"word": "gate", "chinese": "登机口"}]}', None
+            index = re.search(r'现在只写第(\d+)段', prompt).group(1)
+            size = int(re.search(r'本段包含(\d+)轮', prompt).group(1))
+            lines = [{'speaker': 'AB'[i % 2], 'chinese': '中文', 'english': f'{index}-{i}'} for i in range(size)]
+            return json.dumps({'dialogue': lines}), None
+        
+        llm_service._complete = fake_complete
+        started = time.perf_counter()
+        result = llm_service.generate_dialogue('机场', Config.LLM_SEGMENT_EXCHANGES * 2 + 1)
+        elapsed = time.perf_counter() - started
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(len(result['segments']), 3)
+        self.assertEqual(result['dialogue'][0]['english'], '1-0')
+        self.assertEqual(result['dialogue'][-1]['english'].split('-')[0], '3')
+        self.assertEqual(result['keywords'][0]['word'], 'gate')
+        # 大纲 + 一轮并发请求，而不是逐段串行
+        self.assertLess(elapsed, 0.8)
+    
+    def test_failed_segment_fails_generation(self):
+        """测试中间一段重试后仍失败时整体失败，不返回缺段的对话"""
+        llm_service = LLMService(api_key='test_key')
+        attempts = []
+        
+        async def fake_complete(system_prompt, prompt, task='dialogue'):
+            if '设计大纲' in prompt:
+                return json.dumps({'setting': '机场', 'scenes': ['值机', '安检', '登机']}), None
+            if '"dialogue"' not in prompt:
+                return '{"keywords": []}', None
+            index = re.search(r'现在只写第(\d+)段', prompt).group(1)
+            if index == '2':
+                attempts.append(index)
+                return '{"dialogue": []}', None
+            return json.dumps({'dialogue': [{'speaker': 'A', 'chinese': '中文', 'english': index}]}), None
+        
+        llm_service._complete = fake_complete
+        result = llm_service.generate_dialogue('机场', Config.LLM_SEGMENT_EXCHANGES * 2 + 1)
+        
+        self.assertFalse(result['success'])
+        self.assertIn('第2段', result['error'])
+        self.assertEqual(len(attempts), 2)
+    
+    def test_segment_sizes(self):
+        """测试轮数均匀分段"""
+        self.assertEqual(segment_sizes(40, 8), [8, 8, 8, 8, 8])
+        self.assertEqual(segment_sizes(17, 8), [6, 6, 5])
+
+
 class TestLLMServicePrompts(unittest.TestCase):
     """测试LLM服务提示词生成"""
     
@@ -162,6 +315,8 @@ def run_tests():
     
     # 添加测试类
     suite.addTests(loader.loadTestsFromTestCase(TestLLMService))
+    suite.addTests(loader.loadTestsFromTestCase(TestLLMServiceStructuredOutput))
+    suite.addTests(loader.loadTestsFromTestCase(TestLLMServiceSegmented))
     suite.addTests(loader.loadTestsFromTestCase(TestLLMServicePrompts))
     suite.addTests(loader.loadTestsFromTestCase(TestLLMServiceIntegration))
     
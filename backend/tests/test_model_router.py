@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+模型路由单元测试
+"""
+import unittest
+import os
+import sys
+import time
+import asyncio
+from types import SimpleNamespace
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.services import llm_service as llm_module
+from backend.services.llm_service import LLMService
+from backend.services.model_router import ModelRouter
+
+
+class TestModelRouter(unittest.TestCase):
+    """测试模型路由"""
+
+    def setUp(self):
+        self.router = ModelRouter(
+            routes={'dialogue': ['slow', 'fast'], 'translate': ['fast', 'slow']},
+            deadlines={'dialogue': 0.2, 'translate': 0.2}
+        )
+
+    def test_plan_uses_rolling_latency(self):
+        """测试首选模型持续超时后降级，样本过期后恢复"""
+        self.assertEqual(self.router.plan('dialogue'), ['slow', 'fast'])
+        self.router.record('slow', 0.5, timeout=True)
+        self.router.record('fast', 0.1)
+        self.assertEqual(self.router.plan('dialogue'), ['fast', 'slow'])
+        self.assertEqual(self.router.plan('translate'), ['fast', 'slow'])
+
+        self.router.ttl = 0.01
+        time.sleep(0.02)
+        self.assertEqual(self.router.plan('dialogue'), ['slow', 'fast'])
+
+    def test_stats(self):
+        """测试调用统计"""
+        self.router.record('fast', 0.1)
+        self.router.record('fast', 0.3, error=True)
+        stats = self.router.stats()['models']['fast']
+        self.assertEqual((stats['calls'], stats['errors'], stats['timeouts']), (2, 1, 0))
+        self.assertEqual(stats['p90_ms'], 300)
+
+    def test_fallback_after_deadline(self):
+        """测试首选模型超过截止时间时备用模型先返回"""
+        delays = {'slow': 1.0, 'fast': 0.05}
+
+        class FakeGeneration:
+            @staticmethod
+            async def call(model, **kwargs):
+                await asyncio.sleep(delays[model])
+                message = SimpleNamespace(content='{"standard": "%s"}' % model)
+                return SimpleNamespace(status_code=200, output=SimpleNamespace(choices=[SimpleNamespace(message=message)]))
+
+        async def no_session():
+            return None
+
+        service = LLMService(api_key='test_key', router=self.router)
+        service._generation = lambda: FakeGeneration
+        original_get_session = llm_module.get_session
+        llm_module.get_session = no_session
+        try:
+            self.router.routes['translate'] = ['slow', 'fast']
+            started = time.perf_counter()
+            result = service.translate_to_english('你好')
+            elapsed = time.perf_counter() - started
+        finally:
+            llm_module.get_session = original_get_session
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['models'], ['fast'])
+        self.assertEqual(result['translations']['standard'], 'fast')
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual(self.router.stats()['models']['slow']['timeouts'], 1)
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestModelRouter))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
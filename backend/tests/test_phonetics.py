@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+离线音标词典单元测试
+"""
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.services.phonetics import PhoneticDict, arpabet_to_ipa, write_dict
+
+
+class TestArpabetToIpa(unittest.TestCase):
+    """测试 CMUdict 音素转换"""
+
+    def test_monosyllable_without_stress(self):
+        self.assertEqual(arpabet_to_ipa(['P', 'AE1', 'S']), 'pæs')
+        self.assertEqual(arpabet_to_ipa(['DH', 'AH0']), 'ðə')
+
+    def test_stress_at_syllable_onset(self):
+        self.assertEqual(arpabet_to_ipa(['B', 'AO1', 'R', 'D', 'IH0', 'NG']), 'ˈbɔrdɪŋ')
+        self.assertEqual(arpabet_to_ipa(['HH', 'AH0', 'L', 'OW1']), 'həˈloʊ')
+        self.assertEqual(arpabet_to_ipa(['D', 'IH0', 'S', 'T', 'R', 'OY1']), 'dɪˈstrɔɪ')
+        self.assertEqual(arpabet_to_ipa(['EH1', 'R', 'P', 'AO2', 'R', 'T']), 'ˈɛrˌpɔrt')
+
+    def test_unstressed_vowels(self):
+        self.assertEqual(arpabet_to_ipa(['W', 'AO1', 'T', 'ER0']), 'ˈwɔtɚ')
+        self.assertEqual(arpabet_to_ipa(['B', 'ER1', 'D']), 'bɝd')
+
+
+class TestPhoneticDict(unittest.TestCase):
+    """测试词典文件的写入与查询"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'data', 'phonetics.bin')
+        entries = [
+            ('boarding', 'ˈbɔrdɪŋ'), ('pass', 'pæs'), ('Hello', 'həˈloʊ'), ('hello', 'hɛˈloʊ'),
+            ('hi', 'haɪ'), ('there', 'ðɛr'), ("don't", 'doʊnt'), ('check', 'tʃɛk'), ('in', 'ɪn'),
+            ('café', 'kæˈfeɪ'), ('new york', 'nu ˈjɔrk'),
+        ]
+        self.count = write_dict(entries, self.path)
+        self.phonetics = PhoneticDict(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_lookup(self):
+        self.assertEqual(self.count, 10)
+        self.assertEqual(self.phonetics.lookup('Hello'), 'həˈloʊ')
+        self.assertEqual(self.phonetics.lookup('  PASS! '), 'pæs')
+        self.assertEqual(self.phonetics.lookup('don’t'), 'doʊnt')
+        self.assertEqual(self.phonetics.lookup('café'), 'kæˈfeɪ')
+        self.assertIsNone(self.phonetics.lookup('gate'))
+        self.assertIsNone(self.phonetics.lookup(''))
+
+    def test_lookup_phrase(self):
+        """短语先整体查询，否则逐词查询，任一单词缺失时返回 None"""
+        self.assertEqual(self.phonetics.lookup('New York'), 'nu ˈjɔrk')
+        self.assertEqual(self.phonetics.lookup('Boarding pass'), 'ˈbɔrdɪŋ pæs')
+        self.assertEqual(self.phonetics.lookup('check-in'), 'tʃɛk ɪn')
+        self.assertIsNone(self.phonetics.lookup('boarding gate'))
+
+    def test_cache_cleared_by_other_thread(self):
+        """查询过程中缓存被其他线程清空（判断存在后、取值前），查询结果不受影响"""
+        class ClearedCache(dict):
+            def __contains__(self, key):
+                found = dict.__contains__(self, key)
+                self.clear()
+                return found
+
+            def get(self, key, default=None):
+                value = dict.get(self, key, default)
+                self.clear()
+                return value
+
+        self.assertEqual(self.phonetics.lookup('pass'), 'pæs')
+        self.phonetics._cache = ClearedCache(self.phonetics._cache)
+        self.assertEqual(self.phonetics.lookup('pass'), 'pæs')
+        self.assertEqual(self.phonetics.transcribe('hi there'), 'haɪ ðɛr')
+
+    def test_transcribe(self):
+        self.assertEqual(self.phonetics.transcribe("Hi there, don't check in!"), 'haɪ ðɛr doʊnt tʃɛk ɪn')
+        self.assertEqual(self.phonetics.transcribe('Hi Tom'), 'haɪ tom')
+        self.assertEqual(self.phonetics.transcribe('Good morning'), '')
+
+    def test_fill(self):
+        """句子音标总是重新生成，已有的关键词音标保留"""
+        dialogue = [{'english': 'Hi there', 'phonetic': '/old/'}, {'english': 'Good morning', 'phonetic': '/old/'}]
+        keywords = [{'word': 'boarding pass'}, {'word': 'check', 'phonetic': '/tʃek/'}, {'word': 'gate'}]
+        self.assertEqual(self.phonetics.fill(dialogue, keywords), 2)
+        self.assertEqual(dialogue, [{'english': 'Hi there', 'phonetic': '/haɪ ðɛr/'}, {'english': 'Good morning'}])
+        self.assertEqual(keywords[0]['phonetic'], '/ˈbɔrdɪŋ pæs/')
+        self.assertEqual(keywords[1]['phonetic'], '/tʃek/')
+        self.assertNotIn('phonetic', keywords[2])
+
+    def test_lazy_open(self):
+        self.assertFalse(self.phonetics.stats()['loaded'])
+        self.phonetics.lookup('hi')
+        stats = self.phonetics.stats()
+        self.assertTrue(stats['loaded'])
+        self.assertEqual(stats['entries'], 10)
+
+    def test_many_entries(self):
+        entries = [(f'word{i:05d}', f'w{i}') for i in range(20000)]
+        write_dict(entries, self.path)
+        phonetics = PhoneticDict(self.path)
+        for i in (0, 1, 9999, 19999):
+            self.assertEqual(phonetics.lookup(f'word{i:05d}'), f'w{i}')
+        self.assertIsNone(phonetics.lookup('word20000'))
+        self.assertIsNone(phonetics.lookup('a'))
+
+    def test_missing_or_invalid_file(self):
+        """词典不存在或格式不正确时查询返回空结果，不修改内容"""
+        missing = PhoneticDict(os.path.join(self.test_dir, 'missing.bin'))
+        self.assertFalse(missing.available)
+        self.assertIsNone(missing.lookup('hi'))
+        self.assertEqual(missing.transcribe('Hi there'), '')
+        dialogue = [{'english': 'Hi', 'phonetic': '/haɪ/'}]
+        self.assertEqual(missing.fill(dialogue, []), 0)
+        self.assertEqual(dialogue[0]['phonetic'], '/haɪ/')
+
+        invalid = os.path.join(self.test_dir, 'invalid.bin')
+        with open(invalid, 'wb') as f:
+            f.write(b'not a dictionary')
+        self.assertFalse(PhoneticDict(invalid).available)
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestArpabetToIpa))
+    suite.addTests(loader.loadTestsFromTestCase(TestPhoneticDict))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+热门话题预生成单元测试
+"""
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.config import Config
+from backend.services.prefetch import Prefetcher, topic_key
+
+
+class TestPrefetcher(unittest.TestCase):
+    """测试话题热度统计与空闲预生成"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.idle = True
+        self.jobs = {}
+        self.files = set()
+        self.prefetcher = self.create()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def create(self):
+        return Prefetcher(
+            submit=self.submit,
+            status=lambda job_id: self.jobs.get(job_id),
+            is_idle=lambda: self.idle,
+            exists=lambda filename: filename in self.files,
+            state_file=os.path.join(self.test_dir, 'prefetch_state.json')
+        )
+
+    def submit(self, topic, num_exchanges):
+        job_id = f'job{len(self.jobs)}'
+        self.jobs[job_id] = {'status': 'queued', 'topic': topic}
+        return job_id
+
+    def complete(self, job_id, filename):
+        self.jobs[job_id].update(status='completed', filename=filename)
+        self.files.add(filename)
+
+    def request(self, topic, times, num_exchanges=5):
+        return [self.prefetcher.take(topic, num_exchanges) for _ in range(int(times))]
+
+    def test_topic_key(self):
+        """测试话题键忽略大小写与空白"""
+        self.assertEqual(topic_key('  Airport  Check-in ', 5), topic_key('airport check-in', 5))
+        self.assertNotEqual(topic_key('airport', 5), topic_key('airport', 8))
+
+    def test_prefetch_hottest_when_idle(self):
+        """测试空闲时只为热度达到阈值的最热门话题预生成，请求时直接取走"""
+        self.request('餐厅点餐', Config.PREFETCH_MIN_SCORE + 2)
+        self.request('机场值机', Config.PREFETCH_MIN_SCORE + 1)
+        self.request('冷门话题', 1)
+
+        self.idle = False
+        self.assertIsNone(self.prefetcher.tick())
+        self.idle = True
+        self.assertEqual(self.prefetcher.tick(), topic_key('餐厅点餐', 5))
+        # 上一个预生成任务完成前不提交新任务
+        self.assertIsNone(self.prefetcher.tick())
+
+        self.complete('job0', 'learn_a.html')
+        self.assertEqual(self.prefetcher.tick(), topic_key('机场值机', 5))
+        self.complete('job1', 'learn_b.html')
+        self.assertIsNone(self.prefetcher.tick())
+        self.assertEqual(self.prefetcher.stats()['ready'], 2)
+
+        self.assertEqual(self.prefetcher.take('餐厅点餐 ', 5), 'learn_a.html')
+        self.assertIsNone(self.prefetcher.take('餐厅点餐', 5))
+        stats = self.prefetcher.stats()
+        self.assertEqual((stats['hits'], stats['generated'], stats['ready']), (1, 2, 1))
+
+    def test_deleted_lesson_not_served(self):
+        """测试已删除的预生成课程不会返回"""
+        self.request('餐厅点餐', Config.PREFETCH_MIN_SCORE + 1)
+        self.prefetcher.tick()
+        self.complete('job0', 'learn_a.html')
+        self.prefetcher.tick()
+        self.files.clear()
+        self.assertIsNone(self.prefetcher.take('餐厅点餐', 5))
+        self.assertEqual(self.prefetcher.stats()['expired'], 1)
+
+    def test_persistence(self):
+        """测试热度与预生成课程在重启后恢复"""
+        self.request('餐厅点餐', Config.PREFETCH_MIN_SCORE + 1)
+        self.prefetcher.tick()
+        self.complete('job0', 'learn_a.html')
+        self.prefetcher.tick()
+        self.prefetcher.shutdown()
+
+        restored = self.create()
+        self.assertEqual(restored.load(), 1)
+        self.assertEqual(restored.take('餐厅点餐', 5), 'learn_a.html')
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestPrefetcher))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
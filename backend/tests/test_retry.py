@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+重试策略单元测试
+"""
+import unittest
+import os
+import sys
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.retry import RetryPolicy, RetryBudget, is_retryable
+from backend.services.llm_service import LLMService
+from backend.services.tts_service import TTSService
+from backend.aio import run_sync
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """测试重试策略"""
+
+    def setUp(self):
+        self.policy = RetryPolicy(attempts=3, base_delay=0.01, max_delay=0.02)
+
+    def test_is_retryable(self):
+        """测试可重试与致命错误的分类"""
+        self.assertTrue(is_retryable(None, 'Connection reset by peer'))
+        self.assertTrue(is_retryable(429, 'Throttling.RateQuota'))
+        self.assertTrue(is_retryable(503, 'ServiceUnavailable'))
+        self.assertFalse(is_retryable(400, 'InvalidParameter'))
+        self.assertFalse(is_retryable(401, 'Invalid API-key provided.'))
+        self.assertFalse(is_retryable(None, 'TTS synthesis failed: InvalidApiKey'))
+
+    def test_backoff_with_jitter(self):
+        """测试退避时间不超过指数上限与最大值"""
+        for attempt in range(6):
+            delay = self.policy.backoff(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(0.02, 0.01 * 2 ** attempt))
+
+    def test_attempts_and_fatal(self):
+        """测试尝试次数用尽与致命错误不再重试"""
+        self.assertIsNotNone(self.policy.next_delay(0, 500, 'InternalError'))
+        self.assertIsNotNone(self.policy.next_delay(1, 500, 'InternalError'))
+        self.assertIsNone(self.policy.next_delay(2, 500, 'InternalError'))
+        self.assertIsNone(self.policy.next_delay(0, 400, 'InvalidParameter'))
+        stats = self.policy.stats()
+        self.assertEqual((stats['retries'], stats['exhausted'], stats['fatal']), (2, 1, 1))
+
+    def test_budget(self):
+        """测试重试预算与截止时间"""
+        budget = RetryBudget(retries=1, deadline=10)
+        self.assertIsNotNone(self.policy.next_delay(0, budget=budget))
+        self.assertIsNone(self.policy.next_delay(0, budget=budget))
+        self.assertIsNone(self.policy.next_delay(0, budget=RetryBudget(retries=5, deadline=0)))
+        self.assertEqual(self.policy.stats()['budget_exhausted'], 2)
+
+
+class TestServiceRetry(unittest.TestCase):
+    """测试 LLM 与 TTS 服务的重试"""
+
+    def setUp(self):
+        self.policy = RetryPolicy(attempts=3, base_delay=0.01, max_delay=0.02)
+
+    def test_llm_retries_transient_error(self):
+        """测试 LLM 瞬时故障重试后成功，致命错误不重试"""
+        service = LLMService(api_key='test_key', retry=self.policy)
+        responses = [(None, 'Connection reset', None), (None, 'API调用失败: busy', 503), ('{}', None, 200)]
+
+        async def fake_request(model, system_prompt, prompt):
+            return responses.pop(0)
+
+        service._request_model = fake_request
+        self.assertEqual(run_sync(service._call_model('m', 's', 'p')), ('{}', None))
+        self.assertEqual(self.policy.stats()['recovered'], 1)
+
+        calls = []
+
+        async def fatal_request(model, system_prompt, prompt):
+            calls.append(model)
+            return None, 'API调用失败: bad request', 400
+
+        service._request_model = fatal_request
+        self.assertEqual(run_sync(service._call_model('m', 's', 'p'))[1], 'API调用失败: bad request')
+        self.assertEqual(len(calls), 1)
+
+    def test_tts_retries_within_budget(self):
+        """测试 TTS 重试受课程预算限制"""
+        service = TTSService(api_key='test_key', retry=self.policy)
+        calls = []
+
+        async def flaky(text, voice, output_filename):
+            calls.append(text)
+            if len(calls) == 1:
+                return {'success': False, 'error': 'TTS connection closed before completion'}
+            return {'success': True, 'filename': output_filename}
+
+        service._synthesize_once = flaky
+        result = service.synthesize('Hello', budget=RetryBudget(retries=5))
+        self.assertTrue(result['success'])
+        self.assertEqual(result['attempts'], 2)
+
+        async def down(text, voice, output_filename):
+            calls.append(text)
+            return {'success': False, 'error': 'TTS synthesis failed: timeout'}
+
+        service._synthesize_once = down
+        calls.clear()
+        started = time.perf_counter()
+        result = service.synthesize('Hello', budget=RetryBudget(retries=0))
+        self.assertFalse(result['success'])
+        self.assertEqual(len(calls), 1)
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestRetryPolicy))
+    suite.addTests(loader.loadTestsFromTestCase(TestServiceRetry))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+任务管理（优雅停机）单元测试
+"""
+import unittest
+import os
+import sys
+import time
+import tempfile
+import shutil
+import threading
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.services.task_manager import TaskManager
+
+
+class TestTaskManager(unittest.TestCase):
+    """测试任务管理"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.state_file = os.path.join(self.test_dir, 'pending_tasks.json')
+        self.manager = TaskManager(state_file=self.state_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_shutdown_drains_running_tasks(self):
+        """测试停机时等待任务完成"""
+        done = []
+
+        def work(task_id, topic):
+            time.sleep(0.2)
+            done.append(topic)
+
+        self.assertTrue(self.manager.submit('t1', work, {'topic': 'hello'}))
+        summary = self.manager.shutdown(timeout=5)
+
+        self.assertEqual(done, ['hello'])
+        self.assertEqual(summary, {'drained': 1, 'persisted': 0})
+        self.assertFalse(os.path.exists(self.state_file))
+
+    def test_rejects_new_tasks_after_shutdown(self):
+        """测试停机后拒绝新任务"""
+        self.manager.shutdown(timeout=0)
+        self.assertFalse(self.manager.accepting)
+        self.assertFalse(self.manager.submit('t2', lambda task_id: None, {}))
+
+    def test_persists_and_cleans_unfinished_tasks(self):
+        """测试超时任务被持久化并清理中间文件"""
+        partial = os.path.join(self.test_dir, 'partial.mp3')
+        started = threading.Event()
+
+        def work(task_id, topic):
+            with open(partial, 'wb') as f:
+                f.write(b'data')
+            self.manager.track_file(task_id, partial)
+            started.set()
+            while True:
+                self.manager.check_stop()
+                time.sleep(0.01)
+
+        self.manager.submit('t3', work, {'topic': 'airport'})
+        started.wait(2)
+        summary = self.manager.shutdown(timeout=0.1)
+
+        self.assertEqual(summary['persisted'], 1)
+        self.assertFalse(os.path.exists(partial))
+
+        pending = TaskManager(state_file=self.state_file).load_pending()
+        self.assertEqual(len(pending), 1)
+        self.assertEqual(pending[0]['task_id'], 't3')
+        self.assertEqual(pending[0]['spec'], {'topic': 'airport'})
+        # 读取不删除记录，任务重新提交后才清除
+        self.assertTrue(os.path.exists(self.state_file))
+        TaskManager(state_file=self.state_file).clear_pending()
+        self.assertFalse(os.path.exists(self.state_file))
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestTaskManager))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
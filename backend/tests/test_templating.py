@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+页面模板与静态资源单元测试
+"""
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.templating import assets, render_lesson, render_lesson_content
+from backend.utils import atomic_write
+
+
+class TestTemplating(unittest.TestCase):
+    """测试模板渲染"""
+
+    def setUp(self):
+        self.topic = '<b>机场</b>'
+        self.dialogue = [
+            {'speaker': 'A', 'chinese': '你好', 'english': 'Hi & <welcome>', 'audio_url': '/audio/a.mp3'},
+            {'speaker': 'B', 'chinese': '谢谢', 'english': 'Thanks'}
+        ]
+        self.keywords = [{'word': 'boarding pass', 'chinese': '登机牌'}]
+
+    def test_render_lesson_escapes_content(self):
+        """测试学习页面内容被 HTML 转义"""
+        html = render_lesson(self.topic, self.dialogue, self.keywords)
+        self.assertIn('&lt;b&gt;机场&lt;/b&gt;', html)
+        self.assertIn('Hi &amp; &lt;welcome&gt;', html)
+        self.assertNotIn('<b>机场</b>', html)
+
+    def test_render_lesson_audio(self):
+        """测试有无音频的行"""
+        html = render_lesson(self.topic, self.dialogue, self.keywords)
+        self.assertIn('src="/audio/a.mp3"', html)
+        self.assertEqual(html.count('<audio'), 1)
+        self.assertIn('无音频', html)
+
+    def test_render_keyword_audio(self):
+        """测试有发音的关键词显示播放按钮"""
+        html = render_lesson(self.topic, self.dialogue, self.keywords)
+        self.assertNotIn('class="speak"', html)
+        keywords = [dict(self.keywords[0], audio_url='/audio/word_0123456789abcdef.mp3')]
+        html = render_lesson(self.topic, self.dialogue, keywords)
+        self.assertIn('data-src="/audio/word_0123456789abcdef.mp3"', html)
+        self.assertIn(assets.url('learn.js'), html)
+
+    def test_keyword_audio_not_executable(self):
+        """测试关键词音频地址不会进入内联事件处理器"""
+        keywords = [dict(self.keywords[0], audio_url="');alert(1);//")]
+        html = render_lesson(self.topic, self.dialogue, keywords)
+        self.assertNotIn('onclick', html)
+        self.assertIn('data-src="&#39;);alert(1);//"', html)
+
+    def test_render_phonetic(self):
+        """测试关键词与句子的音标（没有音标时不输出空元素）"""
+        html = render_lesson(self.topic, self.dialogue, self.keywords)
+        self.assertNotIn('class="phonetic"', html)
+        keywords = [dict(self.keywords[0], phonetic='/ˈbɔrdɪŋ pæs/')]
+        dialogue = [dict(self.dialogue[1], phonetic='/θæŋks/')]
+        html = render_lesson(self.topic, dialogue, keywords)
+        self.assertIn('<span class="phonetic">/ˈbɔrdɪŋ pæs/</span>', html)
+        self.assertIn('Thanks<span class="phonetic">/θæŋks/</span>', html)
+
+    def test_render_rate_buttons(self):
+        """测试有音频的句子显示语速按钮"""
+        html = render_lesson(self.topic, self.dialogue, self.keywords)
+        self.assertNotIn('class="rates"', html)
+        self.assertNotIn('learn.js', html)
+        html = render_lesson(self.topic, self.dialogue, self.keywords, rates=(0.75, 0.5))
+        self.assertEqual(html.count('class="rates"'), 1)
+        self.assertIn('data-line="0" data-rate="0.75">0.75x</button>', html)
+        self.assertIn(assets.url('learn.js'), html)
+
+    def test_render_lesson_uses_shared_stylesheet(self):
+        """测试学习页面引用共享样式表而不是内联样式"""
+        html = render_lesson(self.topic, self.dialogue, self.keywords)
+        self.assertIn(assets.url('learn.css'), html)
+        self.assertNotIn('<style>', html)
+
+    def test_write_lesson_content(self):
+        """测试学习记录渲染结果原子写入文件后与一次性渲染结果一致"""
+        test_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(test_dir, 'learn_test.html')
+            record = {'topic': self.topic, 'dialogue': self.dialogue, 'keywords': self.keywords}
+            atomic_write(path, render_lesson_content(record).body)
+            with open(path, 'r', encoding='utf-8') as f:
+                self.assertEqual(f.read(), render_lesson(self.topic, self.dialogue, self.keywords))
+            self.assertEqual(os.listdir(test_dir), ['learn_test.html'])
+        finally:
+            shutil.rmtree(test_dir, ignore_errors=True)
+
+    def test_asset_fingerprint(self):
+        """测试资源指纹解析"""
+        url = assets.url('learn.css')
+        filename = url.rsplit('/', 1)[1]
+        content, is_current = assets.resolve(filename)
+        self.assertIsNotNone(content)
+        self.assertTrue(is_current)
+
+        content, is_current = assets.resolve('learn.0000000000.css')
+        self.assertIsNotNone(content)
+        self.assertFalse(is_current)
+
+        content, _ = assets.resolve('../config.py')
+        self.assertIsNone(content)
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestTemplating))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+话题相似度索引单元测试
+"""
+import unittest
+import os
+import sys
+import importlib.util
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.services.topic_index import TopicIndex, normalize_topic
+
+
+class TestNormalizeTopic(unittest.TestCase):
+    """测试话题规范化"""
+
+    def test_case_punctuation_and_stopwords(self):
+        self.assertEqual(normalize_topic('At the Airport!'), 'airport')
+        self.assertEqual(normalize_topic('  Airport   check-in '), 'airport check')
+
+    def test_fullwidth_and_chinese_suffix(self):
+        self.assertEqual(normalize_topic('ＡＩＲＰＯＲＴ'), 'airport')
+        self.assertEqual(normalize_topic('餐厅点餐对话'), '餐厅点餐')
+        self.assertEqual(normalize_topic('机场值机场景'), '机场值机')
+
+    def test_only_stopwords_kept(self):
+        self.assertEqual(normalize_topic('The'), 'the')
+        self.assertEqual(normalize_topic('对话'), '对话')
+
+
+class TestTopicIndex(unittest.TestCase):
+    """测试相似话题查询（纯 Python 实现）"""
+
+    use_numpy = False
+
+    def setUp(self):
+        self.index = TopicIndex(use_numpy=self.use_numpy)
+        for name, topic in [('a', 'airport check-in'), ('b', 'restaurant ordering'), ('c', '机场值机'),
+                            ('d', '餐厅点餐'), ('e', 'hotel check-in')]:
+            self.index.add(topic, name)
+
+    def test_similar_phrasing(self):
+        """不同说法的相同话题匹配到已有话题"""
+        score, topic, name = self.index.search('Check in at the airport')[0]
+        self.assertEqual((topic, name), ('airport check-in', 'a'))
+        self.assertGreater(score, 0.9)
+        self.assertEqual(self.index.search('在机场值机', threshold=0.6)[0][2], 'c')
+        self.assertEqual(self.index.search('餐厅点餐场景')[0][:3], (1.0, '餐厅点餐', 'd'))
+
+    def test_threshold(self):
+        self.assertEqual(self.index.search('museum tour', threshold=0.8), [])
+        self.assertEqual(self.index.search('', threshold=0.0), [])
+
+    def test_ranking_and_limit(self):
+        results = self.index.search('hotel checkin', limit=2)
+        self.assertEqual([name for _, _, name in results], ['e', 'a'])
+        self.assertGreater(results[0][0], results[1][0])
+
+    def test_accept_filter(self):
+        """被过滤的候选跳过，返回下一个达到阈值的话题"""
+        results = self.index.search('hotel checkin', threshold=0.3, accept=lambda name: name != 'e')
+        self.assertEqual(results[0][2], 'a')
+        self.assertEqual(self.index.search('hotel checkin', threshold=0.8, accept=lambda name: False), [])
+
+    def test_add_duplicate_and_remove(self):
+        self.index.add('Airport check-in', 'a')
+        self.assertEqual(len(self.index), 5)
+        self.index.add('airport check-in', 'f')
+        self.assertEqual(len(self.index), 6)
+
+        self.index.remove('a')
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(self.index.search('airport check-in')[0][2], 'f')
+        self.index.remove('f')
+        self.assertNotIn('a', [name for _, _, name in self.index.search('airport check-in', limit=5)])
+
+        self.index.add('airport check-in', 'a')
+        self.assertEqual(self.index.search('airport check-in')[0][2], 'a')
+
+    def test_stats(self):
+        self.index.search('airport')
+        stats = self.index.stats()
+        self.assertEqual(stats['topics'], 5)
+        self.assertEqual(stats['lookups'], 1)
+        self.assertEqual(stats['numpy'], self.use_numpy)
+
+
+@unittest.skipIf(importlib.util.find_spec('numpy') is None, 'NumPy 未安装')
+class TestTopicIndexNumpy(TestTopicIndex):
+    """测试相似话题查询（NumPy 实现，结果应与纯 Python 实现相同）"""
+
+    use_numpy = True
+
+    def test_same_results_as_python(self):
+        numpy_index = TopicIndex(use_numpy=True)
+        python_index = TopicIndex(use_numpy=False)
+        topics = [f'{place} {action} {i}' for i, (place, action) in enumerate(
+            (p, a) for p in ('airport', 'hotel', '机场', '酒店') for a in ('check-in', 'booking', '值机', '预订'))]
+        for i, topic in enumerate(topics):
+            numpy_index.add(topic, i)
+            python_index.add(topic, i)
+        for query in ('airport check-in', '酒店预订', 'hotel booking 3'):
+            expected = python_index.search(query, limit=5, threshold=0.2)
+            actual = numpy_index.search(query, limit=5, threshold=0.2)
+            self.assertEqual([item[2] for item in actual], [item[2] for item in expected])
+            for (a, *_), (b, *_) in zip(actual, expected):
+                self.assertAlmostEqual(a, b, places=5)
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestNormalizeTopic))
+    suite.addTests(loader.loadTestsFromTestCase(TestTopicIndex))
+    suite.addTests(loader.loadTestsFromTestCase(TestTopicIndexNumpy))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+话题输入提示单元测试
+"""
+import unittest
+import os
+import sys
+import importlib.util
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.services.topic_suggest import TopicSuggester, prefix_keys
+
+
+class TestTopicSuggester(unittest.TestCase):
+    """测试前缀索引与排序"""
+
+    def setUp(self):
+        self.suggester = TopicSuggester()
+        self.suggester.add('Airport check-in', 'a1')
+        self.suggester.add('airport CHECK-IN', 'a2')
+        self.suggester.add('Airline tickets', 'b1')
+        self.suggester.add('机场值机', 'c1')
+        self.suggester.add('机场安检', 'd1')
+
+    def test_prefix_and_word_start(self):
+        self.assertEqual(self.suggester.suggest('air'), ['Airport check-in', 'Airline tickets'])
+        self.assertEqual(self.suggester.suggest('  AIRL'), ['Airline tickets'])
+        self.assertEqual(self.suggester.suggest('check'), ['Airport check-in'])
+        self.assertEqual(self.suggester.suggest('ticket'), ['Airline tickets'])
+        self.assertEqual(self.suggester.suggest('port'), [])
+        self.assertEqual(self.suggester.suggest(''), [])
+
+    def test_chinese_prefix(self):
+        self.assertEqual(sorted(self.suggester.suggest('机场')), ['机场值机', '机场安检'])
+        self.assertEqual(self.suggester.suggest('机场值'), ['机场值机'])
+        self.assertEqual(self.suggester.suggest('ＡＩＲＬ'), ['Airline tickets'])
+
+    @unittest.skipIf(importlib.util.find_spec('pypinyin') is None, 'pypinyin 未安装')
+    def test_pinyin_prefix(self):
+        self.assertIn('jichangzhiji', prefix_keys('机场值机'))
+        self.assertEqual(self.suggester.suggest('jichangz'), ['机场值机'])
+        self.assertEqual(self.suggester.suggest('jcaj'), ['机场安检'])
+
+    def test_ranking_by_lessons_and_hits(self):
+        """课程数多的话题在前，请求热度可以改变排序"""
+        self.assertEqual(self.suggester.suggest('air', limit=1), ['Airport check-in'])
+        self.suggester.touch('airline tickets', 0.5)
+        self.assertEqual(self.suggester.suggest('air'), ['Airport check-in', 'Airline tickets'])
+        self.suggester.add('Airline tickets', 'b2')
+        self.assertEqual(self.suggester.suggest('air'), ['Airline tickets', 'Airport check-in'])
+
+    def test_short_prefix_ranks_all_matches(self):
+        """很短的前缀匹配大量话题时，排序靠后的热门话题仍能返回"""
+        for i in range(3000):
+            self.suggester.add(f'a topic {i:04d}', f'bulk{i}')
+        self.suggester.add('azure coast', 'z1')
+        self.suggester.add('azure coast', 'z2')
+        self.suggester.add('azure coast', 'z3')
+        self.assertEqual(self.suggester.suggest('a', limit=1), ['azure coast'])
+
+    def test_touch_unknown_topic_ignored(self):
+        self.suggester.touch('museum tour', 10)
+        self.assertEqual(self.suggester.suggest('museum'), [])
+
+    def test_incremental_add_and_remove(self):
+        self.assertEqual(self.suggester.suggest('hotel'), [])
+        self.suggester.add('Hotel booking', 'e1')
+        self.assertEqual(self.suggester.suggest('hotel'), ['Hotel booking'])
+
+        # 同一课程重复登记不增加课程数
+        self.suggester.add('Hotel booking', 'e1')
+        self.suggester.remove('e1')
+        self.assertEqual(self.suggester.suggest('hotel'), [])
+        self.assertEqual(self.suggester.suggest('book'), [])
+
+        self.suggester.remove('a1')
+        self.assertEqual(self.suggester.suggest('check'), ['Airport check-in'])
+        self.suggester.remove('a2')
+        self.assertEqual(self.suggester.suggest('check'), [])
+        self.assertEqual(len(self.suggester), 3)
+
+    def test_rename_lesson(self):
+        """课程话题修改后按新话题提示"""
+        self.suggester.add('Hotel booking', 'c1')
+        self.assertEqual(self.suggester.suggest('机场值'), [])
+        self.assertEqual(self.suggester.suggest('hotel'), ['Hotel booking'])
+
+    def test_many_topics(self):
+        for i in range(500):
+            self.suggester.add(f'topic {i:03d}', f'lesson{i}')
+        self.assertEqual(len(self.suggester.suggest('topic', limit=20)), 20)
+        self.assertEqual(self.suggester.suggest('topic 49', limit=20), [f'topic {i}' for i in range(490, 500)])
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestTopicSuggester))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
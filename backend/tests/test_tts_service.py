@@ -7,11 +7,16 @@ import os
 import sys
 import tempfile
 import shutil
+import asyncio
+import threading
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from backend.services.tts_service import TTSService
+from backend.services import tts_service as tts_module
+from backend.services.tts_service import (
+    TTSService, DEFAULT_PROFILE, audio_alternatives, filename_profile, profile_kbps, sdk_audio_format
+)
 from backend.config import Config
 
 
@@ -73,6 +78,114 @@ class TestTTSService(unittest.TestCase):
             self.assertEqual(result['index'], i)
             self.assertEqual(result['speaker'], dialogue[i]['speaker'])
     
+    def test_dialogue_content_addressed(self):
+        """测试对话音频按内容命名，重复句子只合成一次"""
+        calls = []
+
+        async def fake_asynthesize(text, voice='longxiaochun_v2', output_filename=None, budget=None):
+            calls.append((text, voice))
+            return {'success': True, 'filename': output_filename, 'url': f'/audio/{output_filename}'}
+
+        self.tts_service.asynthesize = fake_asynthesize
+        dialogue = [
+            {'text': 'Hello', 'speaker': 'A'},
+            {'text': 'Hello', 'speaker': 'B'},
+            {'text': 'Hello', 'speaker': 'A'},
+        ]
+        results = self.tts_service.synthesize_dialogue(dialogue, 'va', 'vb', max_workers=2)
+
+        self.assertEqual([r['index'] for r in results], [0, 1, 2])
+        self.assertEqual(sorted(calls), [('Hello', 'va'), ('Hello', 'vb')])
+        self.assertEqual(results[0]['filename'], results[2]['filename'])
+        self.assertNotEqual(results[0]['filename'], results[1]['filename'])
+        self.assertEqual(results[0]['filename'], self.tts_service.audio_filename('Hello', 'va', prefix='dialogue'))
+    
+    def test_audio_filename_options(self):
+        """测试不同合成参数的音频分别缓存，不带参数时文件名不变"""
+        plain = self.tts_service.audio_filename('Hello', 'va', prefix='dialogue')
+        slow = self.tts_service.audio_filename('Hello', 'va', prefix='dialogue', speech_rate=0.75)
+        self.assertNotEqual(plain, slow)
+        self.assertTrue(slow.startswith('dialogue_'))
+        self.assertEqual(slow, self.tts_service.audio_filename('Hello', 'va', prefix='dialogue', speech_rate=0.75))
+        self.assertNotEqual(slow, self.tts_service.audio_filename('Hello', 'va', prefix='dialogue', speech_rate=0.5))
+    
+    def test_audio_profiles(self):
+        """测试不同音频格式分别缓存，文件名只有格式后缀不同"""
+        self.assertEqual(self.tts_service.resolve_profile(), DEFAULT_PROFILE)
+        plain = self.tts_service.audio_filename('Hello', 'va', prefix='dialogue')
+        opus = self.tts_service.audio_filename('Hello', 'va', prefix='dialogue', profile=('opus', 24000, 32))
+        self.assertTrue(plain.endswith('.mp3'))
+        self.assertEqual(opus, plain[:-4] + '-opus_24000_32.ogg')
+        self.assertEqual(filename_profile(opus), ('opus', 24000, 32))
+        self.assertEqual(filename_profile(plain), DEFAULT_PROFILE)
+        self.assertIsNone(filename_profile('notes.txt'))
+        self.assertEqual(audio_alternatives(plain, [DEFAULT_PROFILE, ('opus', 24000, 32)]),
+                         [(opus, ('opus', 24000, 32))])
+        self.assertEqual(audio_alternatives(opus, [DEFAULT_PROFILE]), [(plain, DEFAULT_PROFILE)])
+        
+        # 修改默认格式后新音频使用新格式
+        self.tts_service.audio_format, self.tts_service.sample_rate, self.tts_service.bitrate = 'opus', 24000, 32
+        self.assertEqual(self.tts_service.audio_filename('Hello', 'va', prefix='dialogue'), opus)
+        
+        with self.assertRaises(ValueError):
+            self.tts_service.resolve_profile('no-such-profile')
+        with self.assertRaises(ValueError):
+            self.tts_service.resolve_profile(('aac', 16000, 64))
+        self.assertFalse(self.tts_service.synthesize_cached('Hello', profile='no-such-profile')['success'])
+    
+    def test_profile_kbps_and_sdk_format(self):
+        self.assertEqual(profile_kbps(('opus', 24000, 32)), 32)
+        self.assertEqual(profile_kbps(('wav', 16000, 16)), 256)
+        self.assertEqual(sdk_audio_format(('opus', 24000, 32)).name, 'OGG_OPUS_24KHZ_MONO_32KBPS')
+        with self.assertRaises(ValueError):
+            sdk_audio_format(('mp3', 16000, 32))
+    
+    def test_synthesizer_stopped_on_timeout(self):
+        """测试合成超时时关闭合成器连接，不留下后台线程"""
+        closed = threading.Event()
+        
+        class FakeSynthesizer:
+            def call(self, text):
+                pass
+            
+            def streaming_cancel(self, complete_timeout_millis=None):
+                pass
+            
+            def close(self):
+                closed.set()
+        
+        def create_synthesizer(voice_code, loop, api_key, **options):
+            return FakeSynthesizer(), loop.create_future()
+        
+        self.tts_service._create_synthesizer = create_synthesizer
+        original_timeout = tts_module.SYNTHESIS_TIMEOUT
+        tts_module.SYNTHESIS_TIMEOUT = 0.05
+        try:
+            result = self.tts_service.synthesize_cached('Hello', 'va')
+        finally:
+            tts_module.SYNTHESIS_TIMEOUT = original_timeout
+        self.assertFalse(result['success'])
+        self.assertTrue(closed.wait(2))
+    
+    def test_synthesizer_uses_request_key(self):
+        """测试合成器使用本次请求的 Key，不修改全局 dashscope.api_key"""
+        import dashscope
+        original = dashscope.api_key
+        dashscope.api_key = None
+        try:
+            loop = asyncio.new_event_loop()
+            try:
+                synthesizer, _ = self.tts_service._create_synthesizer('va', loop, 'key-1')
+                other, _ = self.tts_service._create_synthesizer('va', loop, 'key-2')
+            finally:
+                loop.close()
+            self.assertIsNone(dashscope.api_key)
+        finally:
+            dashscope.api_key = original
+        self.assertEqual(synthesizer.request.apikey, 'key-1')
+        self.assertEqual(other.request.apikey, 'key-2')
+        self.assertEqual(other.headers['Authorization'], 'Bearer key-2')
+    
     def test_delete_audio(self):
         """测试删除音频文件"""
         # 创建一个测试文件
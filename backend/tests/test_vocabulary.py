@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+词汇发音库单元测试
+"""
+import unittest
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import shutil
+import threading
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.services.vocabulary import VocabularyAudio, word_key
+
+
+class FakeTTS:
+    """按内容命名音频文件的假 TTS 服务"""
+
+    def __init__(self, audio_dir, delay=0, fail=()):
+        self.audio_dir = audio_dir
+        self.delay = delay
+        self.fail = set(fail)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def audio_filename(self, text, voice, prefix='tts'):
+        return f'{prefix}_{voice}_{text.replace(" ", "-")}.mp3'
+
+    def get_audio_url(self, filename):
+        return f'/audio/{filename}'
+
+    async def asynthesize_cached(self, text, voice, prefix='tts', budget=None):
+        filename = self.audio_filename(text, voice, prefix)
+        filepath = os.path.join(self.audio_dir, filename)
+        if os.path.exists(filepath):
+            return {'success': True, 'url': self.get_audio_url(filename), 'cached': True}
+        with self._lock:
+            self.calls.append(text)
+        await asyncio.sleep(self.delay)
+        if text in self.fail:
+            return {'success': False, 'error': 'boom'}
+        with open(filepath, 'wb') as f:
+            f.write(b'mp3')
+        return {'success': True, 'url': self.get_audio_url(filename), 'filepath': filepath, 'cached': False}
+
+
+class TestVocabularyAudio(unittest.TestCase):
+    """测试词汇发音的全局去重与批量合成"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.tts = FakeTTS(self.test_dir)
+        self.vocabulary = VocabularyAudio(get_tts=lambda: self.tts, voice='v1')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_word_key(self):
+        self.assertEqual(word_key('  Check-in  counter '), 'check-in counter')
+        self.assertEqual(word_key('ATM'), 'ATM')
+
+    def test_fill_deduplicates_words(self):
+        """同一批次中大小写不同的相同词汇只合成一次"""
+        keywords = [{'word': 'Check-in'}, {'word': 'check-in'}, {'word': 'gate'}, {'chinese': '无英文'}]
+        self.assertEqual(self.vocabulary.fill(keywords), 0)
+        self.assertEqual(sorted(self.tts.calls), ['check-in', 'gate'])
+        self.assertEqual(keywords[0]['audio_url'], '/audio/word_v1_check-in.mp3')
+        self.assertEqual(keywords[1]['audio_url'], keywords[0]['audio_url'])
+        self.assertNotIn('audio_url', keywords[3])
+
+    def test_reuse_across_lessons(self):
+        """其他课程（包括重启后）出现同一词汇时不再合成"""
+        self.vocabulary.fill([{'word': 'gate'}])
+        keywords = [{'word': 'Gate'}]
+        self.vocabulary.fill(keywords)
+        self.assertEqual(self.tts.calls, ['gate'])
+
+        restarted = VocabularyAudio(get_tts=lambda: self.tts, voice='v1')
+        self.assertEqual(restarted.lookup(' Gate '), '/audio/word_v1_gate.mp3')
+        self.assertIsNone(restarted.lookup('gate', voice='v2'))
+        self.assertEqual(self.vocabulary.stats()['synthesized'], 1)
+
+    def test_concurrent_requests_share_synthesis(self):
+        """多个课程同时请求同一词汇时只合成一次"""
+        self.tts.delay = 0.2
+        results = []
+
+        def fill():
+            keywords = [{'word': 'boarding pass'}]
+            self.vocabulary.fill(keywords)
+            results.append(keywords[0].get('audio_url'))
+
+        threads = [threading.Thread(target=fill) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.tts.calls, ['boarding pass'])
+        self.assertEqual(results, ['/audio/word_v1_boarding-pass.mp3'] * 4)
+        self.assertEqual(self.vocabulary.stats()['joined'], 3)
+
+    def test_failed_words_retried_later(self):
+        self.tts.fail = {'gate'}
+        keywords = [{'word': 'gate'}, {'word': 'luggage'}]
+        self.assertEqual(self.vocabulary.fill(keywords), 1)
+        self.assertNotIn('audio_url', keywords[0])
+        self.assertIn('audio_url', keywords[1])
+
+        self.tts.fail = set()
+        self.assertEqual(self.vocabulary.fill(keywords), 0)
+        self.assertIn('audio_url', keywords[0])
+        self.assertEqual(self.tts.calls, ['gate', 'luggage', 'gate'])
+
+    def test_client_audio_url_replaced(self):
+        """关键词中已有的 audio_url（如客户端提交）被发音库地址替换"""
+        keywords = [{'word': 'gate', 'audio_url': "');alert(1);//"}, {'word': '', 'audio_url': '/x.mp3'}]
+        self.assertEqual(self.vocabulary.fill(keywords), 0)
+        self.assertEqual(keywords[0]['audio_url'], '/audio/word_v1_gate.mp3')
+        self.assertNotIn('audio_url', keywords[1])
+
+        vocabulary = VocabularyAudio(get_tts=lambda: None, voice='v1')
+        keywords = [{'word': 'luggage', 'audio_url': 'javascript:alert(1)'}]
+        vocabulary.fill(keywords)
+        self.assertNotIn('audio_url', keywords[0])
+
+    def test_service_unavailable(self):
+        vocabulary = VocabularyAudio(get_tts=lambda: None, voice='v1')
+        keywords = [{'word': 'gate'}]
+        self.assertEqual(vocabulary.fill(keywords), 1)
+        self.assertNotIn('audio_url', keywords[0])
+
+
+def run_tests():
+    """运行测试"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(TestVocabularyAudio))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return result.wasSuccessful()
+
+
+if __name__ == '__main__':
+    success = run_tests()
+    sys.exit(0 if success else 1)
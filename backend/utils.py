@@ -0,0 +1,56 @@
+import os
+import time
+import tempfile
+
+
+def atomic_write(path, data):
+    """
+    原子写入文件：先写同目录下的临时文件，再 rename 覆盖目标
+
+    读者要么看到旧文件，要么看到完整的新文件，不会读到写了一半的内容；
+    并发写同一路径时以最后一次 rename 为准
+
+    Args:
+        path: 目标文件路径
+        data: 文件内容（str 按 UTF-8 编码，或 bytes）
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def remove_temp_files(directory, min_age=0):
+    """
+    清理 atomic_write 遗留的临时文件（进程异常退出时可能残留）
+
+    Args:
+        directory: 目录
+        min_age: 只清理修改时间早于该秒数的文件，避免误删正在写入的文件
+
+    Returns:
+        int: 清理的文件数
+    """
+    if not os.path.isdir(directory):
+        return 0
+    removed = 0
+    now = time.time()
+    for entry in os.scandir(directory):
+        if entry.name.startswith('.') and entry.name.endswith('.tmp') and entry.is_file():
+            try:
+                if now - entry.stat().st_mtime >= min_age:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                pass
+    return removed
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+学习页面渲染性能测试
+对比旧版字符串拼接（内联样式）与模板渲染（共享样式表）的耗时和输出大小
+"""
+import os
+import sys
+import time
+import argparse
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.templating import ASSETS_DIR, render_lesson
+
+
+def make_lesson(num_lines):
+    """构造指定行数的测试对话"""
+    dialogue = [
+        {
+            'speaker': 'A' if i % 2 == 0 else 'B',
+            'chinese': f'这是第{i}句对话，请问附近有咖啡馆吗？',
+            'english': f'This is line {i}. Is there a coffee shop <nearby> & open?',
+            'audio_url': f'/audio/{i:032x}.mp3' if i % 5 else None
+        }
+        for i in range(num_lines)
+    ]
+    keywords = [
+        {'word': f'word {i}', 'phonetic': '', 'chinese': f'词汇 {i}'}
+        for i in range(8)
+    ]
+    return 'Benchmark topic', dialogue, keywords
+
+
+def legacy_render(topic, dialogue, keywords, css):
+    """旧版实现：f-string 逐行拼接，每个页面内联完整样式"""
+    keywords_html = ''
+    for kw in keywords:
+        keywords_html += f'''
+        <div class="keyword-item">
+            <span class="word">{kw.get('word', '')}</span>
+            <span class="phonetic">{kw.get('phonetic', '')}</span>
+            <span class="meaning">{kw.get('chinese', '')}</span>
+        </div>
+        '''
+
+    dialogue_html = ''
+    for item in dialogue:
+        dialogue_html += f'''
+        <div class="dialogue-row">
+            <div class="col chinese">{item.get('chinese', '')}</div>
+            <div class="col english">{item.get('english', '')}</div>
+            <div class="col audio">
+                {f'<audio controls src="{item.get("audio_url", "")}"></audio>' if item.get('audio_url') else '无音频'}
+            </div>
+        </div>
+        '''
+
+    return f'''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <title>{topic} - 英语口语练习</title>
+    <style>
+{css}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>📚 {topic}</h1>
+        <div class="keyword-list">{keywords_html}</div>
+        <div class="dialogue-table">{dialogue_html}</div>
+    </div>
+</body>
+</html>'''
+
+
+def bench(func, repeat):
+    """返回单次调用的最短耗时（毫秒）与输出"""
+    best = float('inf')
+    output = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description='学习页面渲染性能测试')
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=[10, 100, 1000],
+                        help='对话行数 (默认: 10 100 1000)')
+    parser.add_argument('-r', '--repeat', type=int, default=20, help='每组重复次数 (默认: 20)')
+    args = parser.parse_args()
+
+    with open(os.path.join(ASSETS_DIR, 'learn.css'), 'r', encoding='utf-8') as f:
+        css = f.read()
+
+    # 预热：编译模板
+    render_lesson(*make_lesson(1))
+
+    print(f"{'行数':>6} | {'旧版耗时':>10} | {'模板耗时':>10} | {'旧版大小':>10} | {'模板大小':>10}")
+    print('-' * 62)
+    for size in args.sizes:
+        topic, dialogue, keywords = make_lesson(size)
+        legacy_ms, legacy_html = bench(lambda: legacy_render(topic, dialogue, keywords, css), args.repeat)
+        new_ms, new_html = bench(lambda: render_lesson(topic, dialogue, keywords), args.repeat)
+        legacy_size = len(legacy_html.encode('utf-8'))
+        new_size = len(new_html.encode('utf-8'))
+        print(f"{size:>6} | {legacy_ms:>8.3f}ms | {new_ms:>8.3f}ms | {legacy_size:>9,}B | {new_size:>9,}B")
+
+
+if __name__ == '__main__':
+    main()
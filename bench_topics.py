@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+相似话题查询性能测试
+构造大量话题建立索引，测量建索引耗时与单次查询延迟（NumPy 向量化与纯 Python 两种实现）
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.services.topic_index import TopicIndex
+
+PLACES = ['airport', 'hotel', 'restaurant', 'hospital', 'bank', 'school', 'office', 'supermarket',
+          'train station', 'post office', 'pharmacy', 'gym', 'library', 'museum', 'cinema', 'park']
+ACTIONS = ['check-in', 'booking', 'complaint', 'asking directions', 'payment', 'small talk',
+           'lost item', 'appointment', 'refund', 'job interview', 'ordering', 'emergency']
+CN_PLACES = ['机场', '酒店', '餐厅', '医院', '银行', '学校', '办公室', '超市', '火车站', '邮局', '药店', '健身房']
+CN_ACTIONS = ['值机', '预订', '投诉', '问路', '付款', '闲聊', '失物招领', '预约', '退款', '面试', '点餐', '求助']
+
+
+def make_topics(count, seed=0):
+    """构造指定数量的中英文话题（带随机编号，避免规范化后重复）"""
+    rng = random.Random(seed)
+    topics = []
+    for i in range(count):
+        if i % 2:
+            topics.append(f'{rng.choice(CN_PLACES)}{rng.choice(CN_ACTIONS)} {i}')
+        else:
+            topics.append(f'{rng.choice(ACTIONS)} at the {rng.choice(PLACES)} {i}')
+    return topics
+
+
+def bench(index, queries, threshold):
+    """返回查询延迟的 p50、p99 与最大值（毫秒）"""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, threshold=threshold)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)], latencies[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='相似话题查询性能测试')
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='索引话题数 (默认: 1000 10000 100000)')
+    parser.add_argument('-q', '--queries', type=int, default=200, help='查询次数 (默认: 200)')
+    parser.add_argument('-t', '--threshold', type=float, default=0.8, help='相似度阈值 (默认: 0.8)')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    queries = [f'{rng.choice(PLACES)} {rng.choice(ACTIONS)}' for _ in range(args.queries // 2)]
+    queries += [f'在{rng.choice(CN_PLACES)}{rng.choice(CN_ACTIONS)}' for _ in range(args.queries - len(queries))]
+
+    has_numpy = TopicIndex(use_numpy=True).use_numpy
+    modes = [('python', False)] + ([('numpy', True)] if has_numpy else [])
+    if not has_numpy:
+        print('未安装 NumPy，只测试纯 Python 实现')
+
+    print(f"{'话题数':>7} | {'实现':>6} | {'建索引':>9} | {'p50':>9} | {'p99':>9} | {'最大':>9}")
+    print('-' * 66)
+    for size in args.sizes:
+        topics = make_topics(size)
+        for mode, use_numpy in modes:
+            index = TopicIndex(use_numpy=use_numpy)
+            start = time.perf_counter()
+            for i, topic in enumerate(topics):
+                index.add(topic, i)
+            build_ms = (time.perf_counter() - start) * 1000
+            # 预热：NumPy 实现首次查询时生成倒排数组
+            bench(index, queries[:20], args.threshold)
+            p50, p99, worst = bench(index, queries, args.threshold)
+            print(f"{size:>9,} | {mode:>8} | {build_ms:>8.0f}ms | {p50:>7.2f}ms | {p99:>7.2f}ms | {worst:>7.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -33,6 +33,21 @@ def build_exe():
         subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'pyinstaller'])
         print("✅ PyInstaller 安装完成")
     
+    # 离线音标词典随 backend 目录一起打包：不存在时先生成，仍然缺失则终止打包
+    phonetic_dict = os.path.join('backend', 'data', 'phonetics.bin')
+    if os.path.exists(phonetic_dict):
+        print("✅ 音标词典已生成")
+    else:
+        print("📖 音标词典不存在，正在生成...")
+        try:
+            subprocess.run([sys.executable, 'build_phonetics.py', '-o', phonetic_dict], check=True)
+        except subprocess.CalledProcessError as e:
+            print(f"❌ 生成音标词典失败: {e}")
+        if not os.path.exists(phonetic_dict):
+            print("❌ 缺少音标词典，打包后的程序无法离线显示音标")
+            print("   请确认 pip 可以访问软件包索引（或镜像）后重试，或使用本地词表运行: python build_phonetics.py <cmudict.dict>")
+            sys.exit(1)
+    
     # 清理旧构建
     clean_build()
     
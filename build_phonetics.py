@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+生成离线音标词典
+将 CMUdict（ARPAbet 音素）或 ipa-dict（"词汇<TAB>/IPA/"）词表转换为内存映射的词典文件，
+打包前运行一次，词典随 backend 目录一起打包，运行时无需联网
+"""
+import os
+import sys
+import time
+import hashlib
+import zipfile
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.config import Config
+from backend.services.phonetics import PhoneticDict, arpabet_to_ipa, write_dict
+
+# 默认词表固定为 PyPI 上 cmudict 包的指定版本（通过 pip 下载，可使用镜像或本地 wheel 目录），
+# 并校验其中 cmudict.dict 的 SHA-256，保证每次生成的词典相同
+CMUDICT_PACKAGE = 'cmudict==1.1.3'
+CMUDICT_MEMBER = 'cmudict/data/cmudict.dict'
+CMUDICT_SHA256 = '81917843c7f44ce2b094ac63873c2c7a4cf802040792c455ba3ca406891c3d22'
+
+
+def parse_lines(lines):
+    """
+    逐行解析词表（自动识别格式，多音词只取第一个读音）
+
+    CMUdict: "word  W ER1 D"、"word(2) ..."、行尾 "# 注释"；
+    ipa-dict: "word\t/wɝd/, /.../"
+    """
+    for line in lines:
+        line = line.split('#', 1)[0].strip() if not line.startswith(';;;') else ''
+        if not line:
+            continue
+        if '\t' in line and '/' in line:
+            word, ipa = line.split('\t', 1)
+            ipa = ipa.split(',')[0].strip().strip('/')
+            if ipa:
+                yield word, ipa
+            continue
+        word, *phones = line.split()
+        if not phones or word.endswith(')'):
+            continue
+        try:
+            yield word, arpabet_to_ipa(phones)
+        except KeyError:
+            continue
+
+
+def download_cmudict():
+    """下载固定版本的 CMUdict 并校验内容"""
+    print(f"⬇️  下载 {CMUDICT_PACKAGE}")
+    with tempfile.TemporaryDirectory() as download_dir:
+        subprocess.run([sys.executable, '-m', 'pip', 'download', CMUDICT_PACKAGE, '--no-deps',
+                        '--only-binary=:all:', '-d', download_dir], check=True)
+        wheel = next(name for name in os.listdir(download_dir) if name.endswith('.whl'))
+        with zipfile.ZipFile(os.path.join(download_dir, wheel)) as archive:
+            data = archive.read(CMUDICT_MEMBER)
+    digest = hashlib.sha256(data).hexdigest()
+    if digest != CMUDICT_SHA256:
+        raise ValueError(f'{CMUDICT_MEMBER} 校验失败: {digest}')
+    return data.decode('utf-8', errors='replace').splitlines()
+
+
+def read_source(source):
+    """读取本地词表文件或下载词表"""
+    if source == CMUDICT_PACKAGE:
+        return download_cmudict()
+    if source.startswith(('http://', 'https://')):
+        print(f"⬇️  下载 {source}")
+        with urllib.request.urlopen(source, timeout=60) as response:
+            return response.read().decode('utf-8', errors='replace').splitlines()
+    with open(source, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read().splitlines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成离线音标词典')
+    parser.add_argument('sources', nargs='*', default=[CMUDICT_PACKAGE],
+                        help='词表文件或下载地址，靠前的词表优先 (默认: 下载 CMUdict)')
+    parser.add_argument('-o', '--output', default=Config.PHONETIC_DICT,
+                        help=f'输出文件 (默认: {Config.PHONETIC_DICT})')
+    args = parser.parse_args()
+
+    entries = []
+    for source in args.sources:
+        entries.extend(parse_lines(read_source(source)))
+    count = write_dict(entries, args.output)
+    print(f"✅ 已写入 {count} 个词条: {args.output} ({os.path.getsize(args.output) / 1024 / 1024:.1f} MB)")
+
+    phonetics = PhoneticDict(args.output)
+    words = [word for word, _ in entries[::max(1, len(entries) // 1000)]]
+    start = time.perf_counter()
+    for word in words:
+        phonetics.lookup(word)
+    elapsed = (time.perf_counter() - start) / max(1, len(words)) * 1e6
+    print(f"   单次查询平均 {elapsed:.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,7 @@ import os
 import sys
 import webbrowser
 import time
+import signal
 import threading
 
 
@@ -53,22 +54,96 @@ def setup_environment():
             sys.exit(0)
 
 
+class StartupProfiler:
+    """记录启动各阶段耗时（--profile-startup）"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.marks = []
+
+    def mark(self, label):
+        now = time.perf_counter()
+        self.marks.append((label, (now - self.last) * 1000))
+        self.last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+        print("\n⏱️  启动耗时分析")
+        print("-" * 40)
+        for label, elapsed_ms in self.marks:
+            print(f"  {label:<24}{elapsed_ms:>8.1f} ms")
+        print("-" * 40)
+        print(f"  {'端口就绪 (合计)':<24}{(self.last - self.start) * 1000:>8.1f} ms\n")
+
+
+# 启动计时从脚本加载开始
+profiler = StartupProfiler()
+
+# 端口开始监听后置位，浏览器线程据此打开页面
+server_ready = threading.Event()
+
+
+def warm_up_sdk():
+    """端口就绪后在后台预加载 dashscope，避免首个生成请求承担导入开销"""
+    start = time.perf_counter()
+    try:
+        import dashscope  # noqa: F401
+    except ImportError:
+        return
+    if profiler.enabled:
+        print(f"⏱️  后台预加载 dashscope: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
 def start_server(port=5000):
     """启动 Flask 服务器"""
     # 添加项目路径
     exe_dir = get_exe_dir()
     sys.path.insert(0, exe_dir)
     
-    from backend.app import app
+    import flask  # noqa: F401
+    profiler.mark('导入 flask')
+    from backend.app import app, shutdown_tasks, start_background_work
+    profiler.mark('加载应用 (backend.app)')
+    from werkzeug.serving import make_server
     print(f"🚀 启动服务器... (端口: {port})")
     print(f"📂 工作目录: {os.getcwd()}")
+    # 先绑定端口再做其他初始化，尽早响应浏览器请求
     # 使用多线程模式，避免长请求阻塞其他请求
-    app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
+    server = make_server('0.0.0.0', port, app, threaded=True)
+    profiler.mark('绑定端口')
+    server_ready.set()
+    profiler.report()
+    
+    # 恢复任务、为已有课程建立索引（读取所有学习记录）在端口就绪后于后台进行
+    start_background_work()
+    
+    warm_up_thread = threading.Thread(target=warm_up_sdk)
+    warm_up_thread.daemon = True
+    warm_up_thread.start()
+    
+    # SIGTERM 与 Ctrl+C 一样退出服务循环，进入优雅停机流程
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("\n🛑 服务器已停止，正在结束后台任务...")
+        # 停止接收新任务，等待运行中的生成任务完成
+        shutdown_tasks()
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
 
 
 def open_browser(port=5000):
-    """自动打开浏览器"""
-    time.sleep(2)
+    """端口就绪后自动打开浏览器"""
+    if not server_ready.wait(timeout=60):
+        return
     url = f'http://localhost:{port}'
     print(f"🌐 正在打开浏览器: {url}")
     webbrowser.open(url)
@@ -82,24 +157,27 @@ def main():
         print("🎯 英语口语练习程序")
         print("=" * 50)
     
-    # 设置环境
-    setup_environment()
-    
-    # 检查依赖
-    try:
-        import flask
-        import dashscope
-    except ImportError as e:
-        print(f"❌ 缺少依赖: {e}")
-        if hasattr(sys, '_MEIPASS'):
-            input("按回车键退出...")
-        sys.exit(1)
-    
     # 解析参数
     import argparse
     parser = argparse.ArgumentParser(description='英语口语练习程序')
     parser.add_argument('-p', '--port', type=int, default=5000, help='服务器端口 (默认: 5000)')
+    parser.add_argument('--profile-startup', action='store_true', help='打印启动各阶段耗时')
     args = parser.parse_args()
+    profiler.enabled = args.profile_startup
+    
+    # 设置环境
+    setup_environment()
+    profiler.mark('环境准备')
+    
+    # 检查依赖（只查找模块，不实际导入，dashscope 在首次使用时才加载）
+    import importlib.util
+    for module_name in ('flask', 'dashscope'):
+        if importlib.util.find_spec(module_name) is None:
+            print(f"❌ 缺少依赖: No module named '{module_name}'")
+            if hasattr(sys, '_MEIPASS'):
+                input("按回车键退出...")
+            sys.exit(1)
+    profiler.mark('检查依赖')
     
     # 启动浏览器线程
     browser_thread = threading.Thread(target=open_browser, args=(args.port,))
@@ -3,19 +3,21 @@ from PyInstaller.utils.hooks import collect_all
 
 datas = [('backend', 'backend'), ('.env.example', '.')]
 binaries = []
-hiddenimports = ['flask', 'flask_cors', 'dashscope', 'python-dotenv', 'requests', 'werkzeug', 'jinja2', 'markupsafe', 'itsdangerous', 'click', 'backend.app', 'backend.config', 'backend.services.tts_service', 'backend.services.llm_service']
+hiddenimports = ['flask', 'flask_cors', 'dashscope', 'python-dotenv', 'requests', 'werkzeug', 'jinja2', 'markupsafe', 'itsdangerous', 'click', 'backend.app', 'backend.config', 'backend.templating', 'backend.compression', 'backend.utils', 'backend.aio', 'backend.http_pool', 'backend.json_repair', 'backend.retry', 'backend.services.tts_service', 'backend.services.llm_service', 'backend.services.task_manager', 'backend.services.lesson_store', 'backend.services.batch_scheduler', 'backend.services.model_router', 'backend.services.key_pool', 'backend.services.audio_repair', 'backend.services.prefetch', 'backend.services.topic_index', 'backend.services.topic_suggest', 'backend.services.vocabulary', 'backend.services.phonetics', 'backend.services.audio_variants', 'numpy', 'pypinyin']
 tmp_ret = collect_all('dashscope')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 tmp_ret = collect_all('flask')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 tmp_ret = collect_all('flask_cors')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
+tmp_ret = collect_all('pypinyin')
+datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 
 # 排除不需要的 Qt 绑定和其他大型库
 excludes = [
     'PyQt5', 'PyQt6', 'PySide2', 'PySide6',  # Qt 绑定
     'matplotlib', 'plotly', 'seaborn',        # 绘图库
-    'pandas', 'numpy',                        # 数据分析（dashscope 可能依赖）
+    'pandas',                                 # 数据分析（dashscope 可能依赖；numpy 用于话题相似度，需保留）
     'torch', 'tensorflow', 'jax',             # 深度学习框架
     'scipy', 'sklearn',                       # 科学计算
     'sqlalchemy',                             # ORM